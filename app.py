@@ -1,30 +1,106 @@
-import asyncio
+import logging
 import threading
 import time
+import click
 from flask import Flask
-from telegram.ext import ApplicationBuilder, PicklePersistence
-from config import BOT_TOKEN, DATABASE_URL
+from telegram.ext import ApplicationBuilder
+from config import (
+    BOT_TOKEN, DATABASE_URL, DATABASE_REPLICA_URL, SQL_SUMMARY_INTERVAL_SEC, WORKING_SET_EVICTION_INTERVAL_SEC,
+    PENDING_SWEEP_INTERVAL_SEC, BOT_MODE, METRICS_ENABLED, PROFILE_HANDLERS, PROFILE_SECONDS, PROFILE_MODE,
+    HANDLER_PRELOAD_DELAY_SEC, BOT_API_BASE_URL, WAL_REPLAY_INTERVAL_SEC,
+)
 from bot.models import db
-from bot.commands.reminder import check_reminders, reminder_loop, worker
+from bot.commands.reminder import check_reminders, init_reminder_system, worker
+from bot.commands.pomodoro import track_active_timers
+from bot.logic.stats import backfill_statistics, BACKFILL_WORKERS, BACKFILL_CHUNK_SIZE
+from bot.infra.db_executor import shutdown_db_executor
+from bot.infra.db_pool import engine_options
+from bot.infra.db_routing import REPLICA_BIND_KEY
+from bot.infra.persistence import SQLPersistence
+from bot.infra.group_commit import entry_writer
+from bot.infra.write_ahead import replay_write_ahead_job
+from bot.infra.working_set import install_working_set
+from bot.infra.middleware import BotApplication, add_update_middleware
+from bot.infra.update_processor import KeyedUpdateProcessor
+from bot.infra.outbound import outbound
+from bot.infra.unit_of_work import unit_of_work
+from bot.infra.sql_instrumentation import instrument_handlers, track_update_statements, log_sql_summary_job
+from bot.infra.logging_setup import configure_logging, log_context
+from bot.infra.loop_monitor import start_loop_monitor, stop_loop_monitor
+from bot.infra.lazy_handlers import preload_handler_modules_job
+from bot.logic.pending_input import sweep_pending_states_job
+
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(DATABASE_URL)
+if DATABASE_REPLICA_URL:
+    app.config['SQLALCHEMY_BINDS'] = {
+        REPLICA_BIND_KEY: {'url': DATABASE_REPLICA_URL, **engine_options(DATABASE_REPLICA_URL, pool_name='replica')}
+    }
 db.init_app(app)
 
 
+def _serves_metrics() -> bool:
+    # У режимі вебхука /metrics віддає сервер вебхука
+    return METRICS_ENABLED and BOT_MODE != 'webhook'
+
+
+async def on_startup(application):
+    """post_init: фонові служби спостереження в циклі подій бота."""
+    start_loop_monitor()
+    # Необов'язкові підсистеми імпортуються лише тоді, коли вони ввімкнені
+    if _serves_metrics():
+        from bot.infra.metrics_server import start_metrics_server
+        await start_metrics_server(application)
+    # Профілювання з запуску (PROFILE_HANDLERS): звіт пишеться в лог і зберігається в PROFILE_DIR
+    if PROFILE_HANDLERS:
+        from bot.infra.profiling import parse_targets, start_profiling
+        from bot.commands.admin import finish_profiling_job
+        start_profiling(parse_targets(PROFILE_HANDLERS), PROFILE_SECONDS, PROFILE_MODE)
+        application.job_queue.run_once(finish_profiling_job, PROFILE_SECONDS, name="profiling")
+    application.job_queue.run_once(preload_handler_modules_job, HANDLER_PRELOAD_DELAY_SEC, name="preload_handlers")
+
+
+async def on_shutdown(application):
+    # Записи журналу, що ще чекають у черзі спільного коміту, потрапляють у БД до зупинки
+    await entry_writer.close()
+    stop_loop_monitor()
+    if _serves_metrics():
+        from bot.infra.metrics_server import stop_metrics_server
+        await stop_metrics_server()
+
+
 def create_bot():
-    persistence = PicklePersistence(filepath="data/bot_persistence.pickle")
+    persistence = SQLPersistence(app, lazy=True)
 
-    app_builder = ApplicationBuilder().token(BOT_TOKEN).persistence(persistence)
+    app_builder = ApplicationBuilder().token(BOT_TOKEN).base_url(BOT_API_BASE_URL).persistence(persistence) \
+        .application_class(BotApplication).concurrent_updates(KeyedUpdateProcessor()) \
+        .rate_limiter(outbound).post_init(on_startup).post_shutdown(on_shutdown)
     bot = app_builder.build()
+    working_set = install_working_set(bot, persistence)
+    add_update_middleware(log_context)
+    add_update_middleware(working_set.preload)
+    add_update_middleware(track_update_statements)
+    add_update_middleware(unit_of_work)
+    bot.job_queue.run_repeating(log_sql_summary_job, interval=SQL_SUMMARY_INTERVAL_SEC,
+                                first=SQL_SUMMARY_INTERVAL_SEC, name="sql_summary")
+    bot.job_queue.run_repeating(working_set.evict_idle, interval=WORKING_SET_EVICTION_INTERVAL_SEC,
+                                first=WORKING_SET_EVICTION_INTERVAL_SEC, name="working_set_eviction")
+    bot.job_queue.run_repeating(sweep_pending_states_job, interval=PENDING_SWEEP_INTERVAL_SEC,
+                                first=PENDING_SWEEP_INTERVAL_SEC, name="pending_input_sweep")
+    # Перший прогін одразу після старту переносить записи, що лишилися в локальному журналі з минулого запуску
+    bot.job_queue.run_repeating(replay_write_ahead_job, interval=WAL_REPLAY_INTERVAL_SEC, first=1, name="wal_replay")
+    track_active_timers(bot.job_queue)
 
     return bot
 
 
-def start_reminder_system():
-    """Запуск системи нагадувань у окремому потоці"""
-    asyncio.set_event_loop(reminder_loop)
+def start_reminder_system(bot):
+    """Запуск системи нагадувань: відправка в циклі подій бота, пошук — у окремому потоці"""
+    reminder_loop = init_reminder_system(bot.bot)
     reminder_loop.create_task(worker())
 
     def run_checks():
@@ -33,12 +109,28 @@ def start_reminder_system():
                 with app.app_context():
                     check_reminders()
             except Exception as e:
-                print(f"Помилка перевірки: {e}")
+                logger.error('Помилка перевірки нагадувань: %s', e)
             time.sleep(30)
 
-    thread = threading.Thread(target=run_checks, daemon=True)
-    thread.start()
-    return thread
+    threading.Thread(target=run_checks, daemon=True).start()
+    return reminder_loop
+
+
+@app.cli.command('backfill-stats')
+@click.option('--workers', default=BACKFILL_WORKERS, show_default=True, help='Кількість паралельних потоків.')
+@click.option('--chunk-size', default=BACKFILL_CHUNK_SIZE, show_default=True, help='Користувачів на одну частину.')
+def backfill_stats_command(workers, chunk_size):
+    """Заповнює user_daily_stats з наявних завдань та сесій Pomodoro."""
+    processed = backfill_statistics(app, workers=workers, chunk_size=chunk_size)
+    print(f"Зведену статистику перераховано для {processed} користувачів.")
+
+
+@app.cli.command('import-pickle-persistence')
+@click.option('--filepath', default='data/bot_persistence.pickle', show_default=True, help='Файл PicklePersistence.')
+def import_pickle_persistence_command(filepath):
+    """Переносить стан бота з файлу PicklePersistence у таблицю bot_persistence."""
+    imported = SQLPersistence(app).import_pickle_file(filepath)
+    print(f"Перенесено {imported} записів стану бота.")
 
 
 @app.route('/')
@@ -47,20 +139,26 @@ def home():
 
 
 if __name__ == '__main__':
+    configure_logging()
     with app.app_context():
         db.create_all()
 
         from bot.bot import register_handlers
 
-        reminder_thread = start_reminder_system()
-
         bot = create_bot()
+        reminder_loop = start_reminder_system(bot)
 
         register_handlers(bot)
+        instrument_handlers(bot)
 
-        print("Бот запущений. Система нагадувань активна.")
+        logger.info('Бот запущений. Система нагадувань активна.')
 
         try:
-            bot.run_polling()
+            if BOT_MODE == 'webhook':
+                from bot.infra.webhook import run_webhook
+                run_webhook(bot)
+            else:
+                bot.run_polling()
         finally:
             reminder_loop.stop()
+            shutdown_db_executor()
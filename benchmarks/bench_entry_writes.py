@@ -0,0 +1,117 @@
+"""
+Пропускна здатність запису журналу: записів/с і затримка підтвердження за різної кількості
+одночасних користувачів.
+
+Порівнює режими ENTRY_WRITE_MODE (bot.logic.entry_writes.save_entry):
+  * sync  — як було раніше: INSERT + COMMIT на кожен запис у пулі потоків БД;
+  * group — спільний коміт пакета, відповідь після коміту (bot.infra.group_commit);
+  * async — відповідь одразу після постановки в чергу; час прогону включає дозапис черги.
+
+Кожен «користувач» — корутина, що по черзі зберігає свої записи (/idea з тегом). За замовчуванням
+БД — SQLite-файл у тимчасовому каталозі (кожен коміт — fsync); інша БД — --database-url
+(таблиці створюються, записи бенчмарку видаляються після прогону).
+
+Запуск:
+    python benchmarks/bench_entry_writes.py --entries 2000 --concurrency 1,8,64,256
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("BOT_TOKEN", "1:bench")
+
+from flask import Flask  # noqa: E402
+
+from bot.models import db, JournalEntry  # noqa: E402
+from bot.infra.db_executor import shutdown_db_executor  # noqa: E402
+from bot.infra.group_commit import entry_writer  # noqa: E402
+from bot.logic.entry_writes import save_entry  # noqa: E402
+
+MODES = ("sync", "group", "async")
+BENCH_USER_BASE = 9_000_000_000
+
+
+def make_app(database_url: str) -> Flask:
+    flask_app = Flask(__name__)
+    flask_app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    flask_app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(flask_app)
+    with flask_app.app_context():
+        db.create_all()
+    return flask_app
+
+
+async def run_case(mode: str, concurrency: int, entries: int) -> tuple[float, list[float]]:
+    """(записів/с, затримки підтвердження в мс) для одного режиму й рівня паралельності."""
+    per_user = max(1, entries // concurrency)
+    latencies: list[float] = []
+
+    async def user(index: int):
+        user_id = BENCH_USER_BASE + index
+        for number in range(per_user):
+            started = time.perf_counter()
+            saved, message, _tags, _text = await save_entry(user_id, "idea", f"Ідея {number} #bench", mode=mode)
+            if not saved:
+                raise RuntimeError(message)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user(index) for index in range(concurrency)))
+    await entry_writer.flush()
+    elapsed = time.perf_counter() - started
+    return per_user * concurrency / elapsed, latencies
+
+
+def count_and_clean() -> int:
+    table = JournalEntry.__table__
+    with db.engine.begin() as connection:
+        condition = table.c.user_id >= BENCH_USER_BASE
+        count = connection.execute(db.select(db.func.count()).select_from(table).where(condition)).scalar_one()
+        connection.execute(table.delete().where(condition))
+    return count
+
+
+async def main_async(args, flask_app: Flask):
+    with flask_app.app_context():
+        print(f"{'режим':<6} {'паралельно':>10} {'записів/с':>10} {'p50, мс':>9} {'p99, мс':>9}")
+        for concurrency in args.concurrency:
+            for mode in args.modes:
+                throughput, latencies = await run_case(mode, concurrency, args.entries)
+                written = count_and_clean()
+                expected = max(1, args.entries // concurrency) * concurrency
+                if written != expected:
+                    sys.exit(f"{mode}/{concurrency}: записано {written} з {expected}")
+                latencies.sort()
+                p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+                print(f"{mode:<6} {concurrency:>10} {throughput:>10.0f} {statistics.median(latencies):>9.2f} {p99:>9.2f}")
+        await entry_writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=2000, help="Записів на один прогін.")
+    parser.add_argument("--concurrency", type=lambda value: [int(part) for part in value.split(",")],
+                        default=[1, 8, 64, 256], help="Рівні паралельності через кому.")
+    parser.add_argument("--modes", type=lambda value: value.split(","), default=list(MODES),
+                        help="Режими через кому: sync, group, async.")
+    parser.add_argument("--flush-ms", type=float, default=entry_writer.flush_seconds * 1000,
+                        help="Найдовше очікування на наступні записи пакета, мс (ENTRY_WRITE_FLUSH_MS).")
+    parser.add_argument("--database-url", help="БД для прогону (за замовчуванням — тимчасовий SQLite-файл).")
+    args = parser.parse_args()
+    entry_writer.flush_seconds = args.flush_ms / 1000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        try:
+            asyncio.run(main_async(args, make_app(database_url)))
+        finally:
+            shutdown_db_executor()
+
+
+if __name__ == "__main__":
+    main()
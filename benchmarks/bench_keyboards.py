@@ -0,0 +1,160 @@
+"""
+Алокації та час побудови інлайн-клавіатур: тік таймера Pomodoro і сторінка /list з 5 завдань.
+
+Порівнює два способи:
+  * legacy — як було раніше в update_timer_message / list_tasks: нові InlineKeyboardButton і
+    InlineKeyboardMarkup на кожен виклик, callback_data через CallbackRoute.pack();
+  * cached — bot.logic.keyboards: незмінні розмітки з кешу за (вид, стан, пауза), рядки кнопок
+    завдань — за id, callback_data — з наперед серіалізованого префікса (CallbackRoute.packer).
+
+Алокації вимірює tracemalloc: скільки байт і блоків пам'яті займає результат одного виклику
+(пік і те, що лишилось після нього) у сталому стані, коли кеш уже прогрітий. Для /list окремо
+показано холодний кеш — перший показ сторінки з новими завданнями (вона лишається в кеші, тож
+«лишилось» — це ціна запису в кеші). Колонка «+to_json» — те саме разом із серіалізацією
+розмітки, яку PTB робить для кожного запиту до Bot API. Клавіатури legacy і cached звіряються.
+
+Запуск:
+    python benchmarks/bench_keyboards.py --number 20000
+"""
+import argparse
+import itertools
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("BOT_TOKEN", "1:bench")
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup  # noqa: E402
+
+from bot.logic.callback_data import TASK_ACTION, POMODORO_ACTION  # noqa: E402
+from bot.logic import keyboards  # noqa: E402
+
+TASK_IDS = (101, 102, 1003, 10004, 100005)
+PAGE = 1
+TASKS_PER_PAGE = 5
+TOTAL_TASKS = 17
+
+
+def legacy_pomodoro_keyboard(state, paused=False):
+    buttons = []
+    if state == 'idle':
+        buttons.append([InlineKeyboardButton("🚀 Розпочати (25 хв)", callback_data=POMODORO_ACTION.pack(action="start_work"))])
+    elif state in ['work', 'short_break', 'long_break']:
+        row = []
+        if paused:
+            row.append(InlineKeyboardButton("▶️ Відновити", callback_data=POMODORO_ACTION.pack(action="resume")))
+        else:
+            row.append(InlineKeyboardButton("⏸️ Пауза", callback_data=POMODORO_ACTION.pack(action="pause")))
+        row.append(InlineKeyboardButton("⏹️ Зупинити", callback_data=POMODORO_ACTION.pack(action="stop")))
+        buttons.append(row)
+    return InlineKeyboardMarkup(buttons)
+
+
+def legacy_task_list_keyboard():
+    keyboard = []
+    for task_id in TASK_IDS:
+        keyboard.append([
+            InlineKeyboardButton(f"✅ {task_id}", callback_data=TASK_ACTION.pack(action="done", target=task_id)),
+            InlineKeyboardButton(f"📊 {task_id}", callback_data=TASK_ACTION.pack(action="prio", target=task_id)),
+            InlineKeyboardButton(f"⏰ {task_id}", callback_data=TASK_ACTION.pack(action="remind", target=task_id))
+        ])
+    pagination_row = []
+    if PAGE > 0:
+        pagination_row.append(InlineKeyboardButton("⬅️ Попередня",
+                                                   callback_data=TASK_ACTION.pack(action="page", target=PAGE - 1)))
+    if (PAGE + 1) * TASKS_PER_PAGE < TOTAL_TASKS:
+        pagination_row.append(InlineKeyboardButton("Вперед ➡️", callback_data=TASK_ACTION.pack(action="page", target=PAGE + 1)))
+    if pagination_row:
+        keyboard.append(pagination_row)
+    return InlineKeyboardMarkup(keyboard) if keyboard else None
+
+
+def legacy_tick():
+    return legacy_pomodoro_keyboard('work', False)
+
+
+def cached_tick():
+    return keyboards.get_pomodoro_keyboard('work', False)
+
+
+def cached_task_list_keyboard():
+    return keyboards.task_list_keyboard(TASK_IDS, PAGE, (PAGE + 1) * TASKS_PER_PAGE < TOTAL_TASKS)
+
+
+def cold_task_list_keyboard(ids=itertools.count(1_000_000)):
+    # щоразу нові id — сторінка, якої ще немає в кеші (перший показ /list користувачем)
+    task_ids = tuple(next(ids) for _ in TASK_IDS)
+    return keyboards.task_list_keyboard(task_ids, PAGE, (PAGE + 1) * TASKS_PER_PAGE < TOTAL_TASKS)
+
+
+def with_json(func):
+    return lambda: func().to_json()
+
+
+def allocation(func, calls: int = 200) -> tuple[float, float, float]:
+    """(пік, байт; залишок, байт; залишок, блоків) на один виклик, середнє за calls викликів."""
+    func()
+    peak_total = kept_total = blocks_total = 0
+    for _ in range(calls):
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        result = func()
+        current, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        peak_total += peak - base
+        kept_total += current - base
+        blocks_total += sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+        del result
+    return peak_total / calls, kept_total / calls, blocks_total / calls
+
+
+def measure(func, number: int, repeat: int) -> float:
+    """Найкращий час одного виклику, мкс."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000, help="Викликів у одному прогоні.")
+    parser.add_argument("--repeat", type=int, default=5, help="Прогонів (береться найкращий).")
+    parser.add_argument("--calls", type=int, default=200, help="Викликів під tracemalloc (усереднюються).")
+    args = parser.parse_args()
+
+    for state in ('idle', 'work', 'short_break', 'long_break', 'done'):
+        for paused in (False, True):
+            if keyboards.get_pomodoro_keyboard(state, paused) != legacy_pomodoro_keyboard(state, paused):
+                sys.exit(f"клавіатура Pomodoro ({state}, paused={paused}) відрізняється від legacy")
+    if cached_task_list_keyboard().to_dict() != legacy_task_list_keyboard().to_dict():
+        sys.exit("клавіатура /list відрізняється від legacy")
+
+    cases = [
+        ("tick", legacy_tick, cached_tick),
+        ("tick +to_json", with_json(legacy_tick), with_json(cached_tick)),
+        ("/list (5)", legacy_task_list_keyboard, cached_task_list_keyboard),
+        ("/list (5) cold", legacy_task_list_keyboard, cold_task_list_keyboard),
+        ("/list +to_json", with_json(legacy_task_list_keyboard), with_json(cached_task_list_keyboard)),
+    ]
+
+    tracemalloc.start()
+    allocations = [(allocation(legacy, args.calls), allocation(cached, args.calls)) for _name, legacy, cached in cases]
+    tracemalloc.stop()
+
+    print("алокації на виклик: пік, байт / лишилось, байт / нових блоків")
+    print(f"{'сценарій':<16} {'legacy':>24} {'cached':>24}")
+    for (name, _legacy, _cached), (legacy_alloc, cached_alloc) in zip(cases, allocations):
+        legacy_str = "{:.0f} / {:.0f} / {:.0f}".format(*legacy_alloc)
+        cached_str = "{:.0f} / {:.0f} / {:.0f}".format(*cached_alloc)
+        print(f"{name:<16} {legacy_str:>24} {cached_str:>24}")
+
+    print(f"\n{'сценарій':<16} {'legacy, мкс':>12} {'cached, мкс':>12} {'прискорення':>12}")
+    for name, legacy, cached in cases:
+        legacy_us = measure(legacy, args.number, args.repeat)
+        cached_us = measure(cached, args.number, args.repeat)
+        print(f"{name:<16} {legacy_us:>12.2f} {cached_us:>12.2f} {legacy_us / cached_us:>11.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Мікробенчмарк накладних витрат на маршрутизацію звичайного текстового повідомлення.
+
+Порівнює два способи обробки очікування текстового вводу:
+  * chained — як було раніше: два catch-all MessageHandler(filters.TEXT & ~filters.COMMAND)
+    у групах 0 і 1; обидва колбеки викликаються на кожне повідомлення й самі шукають
+    свої ключі в chat_data (без DEBUG-друку всього chat_data, який робив старий код);
+  * router  — один PendingInputHandler: тип очікування читається з chat_data одним
+    зверненням, колбек викликається лише для чатів, що на щось чекають.
+
+Вимірюється лише цикл груп/обробників Application (check_update + handle_update) з
+колбеками-заглушками, без мережі, БД і middleware.
+
+Запуск:
+    python benchmarks/bench_pending_dispatch.py --messages 200000 --waiting-percent 1
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram import Chat, Message, Update, User  # noqa: E402
+from telegram.ext import ApplicationBuilder, MessageHandler, filters  # noqa: E402
+
+from bot.logic.pending_input import (  # noqa: E402
+    PendingInputHandler, set_pending_input, REMINDER_TIME, DELAY_TIME,
+)
+
+CHATS = 1000
+
+
+async def legacy_reminder_input(update, context):
+    if 'remind_task_id_from_button' in context.chat_data:
+        return context.chat_data['remind_task_id_from_button']
+    if 'set_reminder_task_id' in context.chat_data:
+        return context.chat_data['set_reminder_task_id']
+
+
+async def legacy_delay_input(update, context):
+    return context.chat_data.get('delay_task_id')
+
+
+async def router_input(update, context):
+    # Очікування не знімається, щоб кожен прогін бачив ту саму частку чатів, що чекають
+    return context.chat_data.get('pending_input')
+
+
+def build_application(mode: str, waiting: int):
+    application = ApplicationBuilder().token("1:bench").updater(None).job_queue(None).build()
+    for chat_id in range(CHATS):
+        chat_data = application.chat_data[chat_id]
+        if chat_id < waiting:
+            if mode == "chained":
+                chat_data['delay_task_id'] = chat_id
+            else:
+                set_pending_input(chat_data, DELAY_TIME, chat_id)
+    if mode == "chained":
+        application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, legacy_reminder_input), group=0)
+        application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, legacy_delay_input), group=1)
+    else:
+        application.add_handler(PendingInputHandler(application, {
+            REMINDER_TIME: router_input,
+            DELAY_TIME: router_input,
+        }))
+    return application
+
+
+def build_updates(count: int) -> list[Update]:
+    now = datetime.now(timezone.utc)
+    updates = []
+    for update_id in range(count):
+        chat_id = update_id % CHATS
+        user = User(id=chat_id, first_name="bench", is_bot=False)
+        message = Message(message_id=update_id, date=now, chat=Chat(id=chat_id, type="private"),
+                          from_user=user, text="15:30")
+        updates.append(Update(update_id=update_id, message=message))
+    return updates
+
+
+async def dispatch(application, updates: list[Update]) -> tuple[float, int]:
+    """Той самий обхід груп, що й Application.process_update, без побічних ефектів."""
+    invoked = 0
+    started = time.perf_counter()
+    for update in updates:
+        context = None
+        for handlers in application.handlers.values():
+            for handler in handlers:
+                check = handler.check_update(update)
+                if check is not None and check is not False:
+                    if context is None:
+                        context = application.context_types.context.from_update(update, application)
+                    await handler.handle_update(update, application, check, context)
+                    invoked += 1
+                    break
+    return time.perf_counter() - started, invoked
+
+
+async def run(mode: str, messages: int, waiting_percent: float) -> tuple[float, int]:
+    waiting = int(CHATS * waiting_percent / 100)
+    application = build_application(mode, waiting)
+    updates = build_updates(messages)
+    await dispatch(application, updates[:1000])
+    return await dispatch(application, updates)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=200000, help="Кількість текстових повідомлень.")
+    parser.add_argument("--waiting-percent", default="0,1,10",
+                        help="Частки чатів, що чекають на ввід, %% (через кому).")
+    args = parser.parse_args()
+
+    print(f"{'waiting, %':>10} {'mode':>8} {'µs/message':>11} {'callbacks':>10}")
+    for waiting_percent in (float(value) for value in args.waiting_percent.split(",")):
+        for mode in ("chained", "router"):
+            seconds, invoked = asyncio.run(run(mode, args.messages, waiting_percent))
+            print(f"{waiting_percent:>10g} {mode:>8} {seconds / args.messages * 1e6:>11.2f} {invoked:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Мікробенчмарк формування повідомлень у MarkdownV2: сторінка журналу з 5 записів і таблиця завдань.
+
+Порівнює два способи:
+  * legacy    — як було раніше в list_tasks / show_paginated_entries: telegram.helpers.escape_markdown
+    (регулярний вираз) окремо для кожного поля кожного запису, .ljust() після екранування;
+  * rendering — bot.logic.rendering: екранування str.translate, заздалегідь підготовлені шаблони
+    рядків і перевірка validate_markdown_v2 перед відправкою (вона входить у виміряний час).
+
+Окремо вимірюється сама перевірка. Вивід legacy і rendering для сторінки журналу звіряється —
+символ у символ. Без мережі й БД: записи — прості об'єкти з тими ж атрибутами, що й моделі.
+
+Запуск:
+    python benchmarks/bench_rendering.py --number 20000
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram.helpers import escape_markdown  # noqa: E402
+
+from bot.logic.rendering import (  # noqa: E402
+    render_task_table, render_journal_entry, render_entries_page, validate_markdown_v2,
+)
+
+PRIORITY_ICONS = {"high": "🔴", "medium": "🟡", "low": "🟢"}
+DEFAULT_PRIORITY_ICON = "⚪️"
+TYPE_DISPLAY = {"idea": "Ідея", "thought": "Думка", "dream": "Сон", "note": "Замітка"}
+HEADER = "✒️ Ваш Журнал (Стор. 1 з 3)"
+
+ENTRIES = [
+    SimpleNamespace(created_at=datetime(2025, 5, 1, 9, 30), entry_type="idea", tags_str="робота, бот",
+                    content="Зробити кеш клавіатур (див. issue #12) — менше алокацій!"),
+    SimpleNamespace(created_at=datetime(2025, 5, 2, 22, 5), entry_type="thought", tags_str="",
+                    content="Якщо a*b = c, то [c/b] == a... хіба що b=0."),
+    SimpleNamespace(created_at=datetime(2025, 5, 3, 7, 0), entry_type="dream", tags_str="сон, море, дитинство",
+                    content="Снилося, що я пливу на човні через туман. " * 12),
+    SimpleNamespace(created_at=datetime(2025, 5, 4, 13, 45), entry_type="note", tags_str="покупки",
+                    content="Купити: молоко, хліб, 2-3 яблука; ціна ~40 грн. {терміново}"),
+    SimpleNamespace(created_at=None, entry_type=None, tags_str=None, content="Короткий запис."),
+]
+
+TASKS = [
+    SimpleNamespace(id=1, priority="high", description="Підготувати звіт за квітень (v2.1)", remind_at=datetime(2025, 5, 1, 9, 0)),
+    SimpleNamespace(id=2, priority="medium", description="Купити квитки", remind_at=None),
+    SimpleNamespace(id=3, priority="low", description="Прочитати `README` і README_dev.md", remind_at=datetime(2025, 5, 3, 18, 30)),
+    SimpleNamespace(id=4, priority=None, description="Подзвонити мамі!", remind_at=None),
+    SimpleNamespace(id=5, priority="high", description="Виправити баг #42 у бекапі [terminal]", remind_at=datetime(2025, 5, 5, 8, 0)),
+]
+
+
+def type_display(entry) -> str:
+    return TYPE_DISPLAY.get(entry.entry_type, entry.entry_type.capitalize() if entry.entry_type else "Запис")
+
+
+def legacy_journal_page() -> str:
+    message_parts = [escape_markdown(HEADER, version=2) + "\n"]
+    for entry in ENTRIES:
+        date_str_raw = entry.created_at.strftime('%d.%m.%Y %H:%M') if entry.created_at else "невідомо"
+        parts = [f"*{escape_markdown(type_display(entry), version=2)}*"]
+        if entry.content:
+            parts.append(escape_markdown(entry.content, version=2))
+        tags = ""
+        if entry.tags_str:
+            tags_escaped = [f"\\#{escape_markdown(tag.strip(), version=2)}" for tag in entry.tags_str.split(',') if tag.strip()]
+            if tags_escaped:
+                tags = "\n*Теги:* " + ", ".join(tags_escaped)
+        text = f"\n🗓️ *{escape_markdown(date_str_raw, version=2)}*"
+        joined = " \\- ".join(filter(None, parts))
+        if joined:
+            text += f" \\- {joined}"
+        message_parts.append(text + f"{tags}\n────────────────────")
+    return "\n".join(message_parts)
+
+
+def legacy_task_table() -> str:
+    header = escape_markdown("Ваші активні завдання (Стор. 1 з 1)", version=2)
+    lines = [f"{'П':<3}{'ID':<1}  {'Завдання':<25}  {'Нагадування':<12}", "--+--+---------------------------+-------------"]
+    for t in TASKS:
+        description = (t.description[:22] + "...") if len(t.description) > 25 else t.description
+        reminder = f"⏰{t.remind_at.strftime('%d.%m %H:%M')}" if t.remind_at else ""
+        lines.append(f"{PRIORITY_ICONS.get(t.priority, DEFAULT_PRIORITY_ICON):<3}{str(t.id):<1}  "
+                     f"{escape_markdown(description, version=2, entity_type='pre').ljust(25)}  "
+                     f"{escape_markdown(reminder, version=2, entity_type='pre').ljust(12)}")
+    table = "\n".join(lines)
+    return f"{header}\n```\n{table}\n```"
+
+
+def new_journal_page() -> str:
+    return render_entries_page(HEADER, [render_journal_entry(entry, type_display(entry)) for entry in ENTRIES]).text
+
+
+def new_task_table() -> str:
+    return render_task_table("Ваші активні завдання (Стор. 1 з 1)", TASKS, PRIORITY_ICONS, DEFAULT_PRIORITY_ICON).text
+
+
+def measure(func, number: int, repeat: int) -> float:
+    """Найкращий час одного виклику, мкс."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000, help="Викликів у одному прогоні.")
+    parser.add_argument("--repeat", type=int, default=5, help="Прогонів (береться найкращий).")
+    args = parser.parse_args()
+
+    journal_text = new_journal_page()
+    if journal_text != legacy_journal_page():
+        sys.exit("сторінка журналу відрізняється від legacy")
+    validate_markdown_v2(new_task_table())
+
+    cases = [
+        ("journal page (5)", legacy_journal_page, new_journal_page),
+        ("task table (5)", legacy_task_table, new_task_table),
+    ]
+    print(f"{'сценарій':<18} {'legacy, мкс':>12} {'rendering, мкс':>15} {'прискорення':>12}")
+    for name, legacy, new in cases:
+        legacy_us = measure(legacy, args.number, args.repeat)
+        new_us = measure(new, args.number, args.repeat)
+        print(f"{name:<18} {legacy_us:>12.1f} {new_us:>15.1f} {legacy_us / new_us:>11.1f}x")
+
+    validate_us = measure(lambda: validate_markdown_v2(journal_text), args.number, args.repeat)
+    print(f"\nз них перевірка validate_markdown_v2 сторінки журналу ({len(journal_text)} символів): {validate_us:.1f} мкс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Час холодного старту бота: імпорти (-X importtime) і старт процесу до першої обробленої відповіді.
+
+  * import — `python -X importtime -c "import app, bot.bot"` у свіжому інтерпретаторі: сумарний
+    час імпорту, найдорожчі пакети за власним часом і модулі bot.* за сукупним;
+  * first-update — `python app.py` (polling) проти фейкового Telegram (benchmarks/fake_telegram.py),
+    у черзі якого вже лежить /start: час від запуску процесу до першого sendMessage бота.
+    SQLite у тимчасовому каталозі, сервер метрик на вільному порту.
+
+Бюджет холодного старту (медіана first-update) — --budget-ms; якщо перевищено, код виходу 1,
+тож скрипт можна запускати в CI після змін імпортів.
+
+Запуск:
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --only import --top 30
+"""
+import argparse
+import asyncio
+import collections
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_telegram import FakeTelegram  # noqa: E402
+
+TOKEN = "1:bench"
+IMPORT_TARGET = "import app, bot.bot"
+DEFAULT_BUDGET_MS = 1500
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def bot_env(database_url: str, api_port: int | None = None) -> dict:
+    env = dict(os.environ, BOT_TOKEN=TOKEN, DATABASE_URL=database_url, BOT_MODE="polling",
+               METRICS_PORT=str(free_port()), LOG_LEVEL="WARNING")
+    if api_port is not None:
+        env["BOT_API_BASE_URL"] = f"http://127.0.0.1:{api_port}/bot"
+    return env
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """(модуль з відступом, власний час мкс, сукупний мкс) з виводу -X importtime."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.rstrip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure_imports(env: dict) -> list[tuple[str, int, int]]:
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", IMPORT_TARGET], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    return parse_importtime(result.stderr)
+
+
+def report_imports(runs: list[list[tuple[str, int, int]]], top: int):
+    totals = [sum(self_us for _name, self_us, _cumulative in rows) / 1000 for rows in runs]
+    print(f"import ({IMPORT_TARGET}): медіана {statistics.median(totals):.0f} мс за {len(totals)} прогонів")
+
+    last = runs[-1]
+    packages: collections.Counter = collections.Counter()
+    for name, self_us, _cumulative in last:
+        module = name.strip()
+        packages[".".join(module.split(".")[:2]) if module.startswith("bot.") else module.split(".")[0]] += self_us
+    print(f"\n{'власний, мс':>12}  пакет")
+    for package, self_us in packages.most_common(top):
+        print(f"{self_us / 1000:>12.1f}  {package}")
+
+    own = sorted(((cumulative, name.strip()) for name, _self_us, cumulative in last
+                  if name.strip().startswith("bot.") or name.strip() == "app"), reverse=True)
+    print(f"\n{'сукупний, мс':>12}  модуль")
+    for cumulative, module in own[:top]:
+        print(f"{cumulative / 1000:>12.1f}  {module}")
+
+
+def make_start_update(update_id: int = 1, chat_id: int = 1) -> dict:
+    user = {"id": chat_id, "is_bot": False, "first_name": "bench"}
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id, "date": int(time.time()), "text": "/start",
+            "entities": [{"type": "bot_command", "offset": 0, "length": 6}],
+            "chat": {"id": chat_id, "type": "private"}, "from": user,
+        },
+    }
+
+
+async def measure_first_update(timeout: float) -> float:
+    fake = FakeTelegram(port=free_port())
+    await fake.start()
+    try:
+        await fake.enqueue([make_start_update()])
+        with tempfile.TemporaryDirectory() as tmp:
+            env = bot_env(f"sqlite:///{os.path.join(tmp, 'bench.db')}", fake.port)
+            started = time.perf_counter()
+            process = await asyncio.create_subprocess_exec(sys.executable, "app.py", cwd=ROOT, env=env,
+                                                           stdout=subprocess.DEVNULL)
+            try:
+                await asyncio.wait_for(fake.replied.wait(), timeout)
+                return time.perf_counter() - started
+            finally:
+                process.send_signal(signal.SIGINT)
+                try:
+                    await asyncio.wait_for(process.wait(), 10)
+                except asyncio.TimeoutError:
+                    process.kill()
+                    await process.wait()
+    finally:
+        await fake.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", choices=("import", "first-update"), help="Лише один із вимірів.")
+    parser.add_argument("--runs", type=int, default=5, help="Прогонів кожного виміру (свіжий процес щоразу).")
+    parser.add_argument("--top", type=int, default=15, help="Рядків у таблицях імпорту.")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="Бюджет холодного старту до першої відповіді (медіана), мс.")
+    parser.add_argument("--timeout", type=float, default=60, help="Найдовше очікування першої відповіді, с.")
+    args = parser.parse_args()
+
+    if args.only != "first-update":
+        env = bot_env("sqlite://")
+        report_imports([measure_imports(env) for _ in range(args.runs)], args.top)
+
+    if args.only != "import":
+        durations = [asyncio.run(measure_first_update(args.timeout)) * 1000 for _ in range(args.runs)]
+        median = statistics.median(durations)
+        print(f"\nfirst-update: медіана {median:.0f} мс, min {min(durations):.0f}, max {max(durations):.0f} "
+              f"(бюджет {args.budget_ms:.0f} мс)")
+        if median > args.budget_ms:
+            print("БЮДЖЕТ ХОЛОДНОГО СТАРТУ ПЕРЕВИЩЕНО")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
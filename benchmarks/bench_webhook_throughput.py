@@ -0,0 +1,131 @@
+"""
+Наскрізна пропускна здатність (оновлень/с) та затримка: polling проти webhook.
+
+Фейковий Telegram (benchmarks/fake_telegram.py, окремий процес) видає оновлення через
+getUpdates або POST-ить їх на вебхук бота, а бот відповідає на кожне повідомлення
+sendMessage назад у фейк. Затримка — від відправки оновлення до отримання відповіді;
+усі оновлення подаються одразу, тож вона включає очікування в черзі.
+Обробник — ехо без БД: вимірюється транспорт і диспетчеризація PTB, а не логіка бота.
+
+Запуск:
+    python benchmarks/bench_webhook_throughput.py --updates 5000 --max-connections 40
+    python benchmarks/bench_webhook_throughput.py --mode webhook --concurrent-updates 64
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import ClientSession, ClientTimeout  # noqa: E402
+from telegram.ext import ApplicationBuilder, MessageHandler, filters  # noqa: E402
+
+from bot.infra.webhook import WebhookServer, serve_webhook  # noqa: E402
+
+TOKEN = "1:bench"
+FAKE_TELEGRAM = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_telegram.py")
+
+
+async def echo(update, context):
+    await update.message.reply_text(update.message.text)
+
+
+def build_application(api_port: int, concurrent_updates: int, with_updater: bool):
+    builder = ApplicationBuilder().token(TOKEN).base_url(f"http://127.0.0.1:{api_port}/bot").job_queue(None) \
+        .concurrent_updates(concurrent_updates or False).connection_pool_size(max(8, concurrent_updates))
+    if not with_updater:
+        builder = builder.updater(None)
+    application = builder.build()
+    application.add_handler(MessageHandler(filters.TEXT, echo))
+    return application
+
+
+async def control_run(api_port: int, run: dict) -> tuple[float, list[float]]:
+    async with ClientSession(timeout=ClientTimeout(total=900)) as session:
+        async with session.post(f"http://127.0.0.1:{api_port}/control/run", json=run) as response:
+            result = await response.json()
+    return result["elapsed"], result["latencies"]
+
+
+async def bench_polling(args) -> tuple[float, list[float]]:
+    application = build_application(args.api_port, args.concurrent_updates, with_updater=True)
+    async with application:
+        await application.start()
+        await application.updater.start_polling(poll_interval=0, timeout=10)
+        try:
+            return await control_run(args.api_port, {"mode": "polling", "updates": args.updates})
+        finally:
+            await application.updater.stop()
+            await application.stop()
+
+
+async def bench_webhook(args) -> tuple[float, list[float]]:
+    application = build_application(args.api_port, args.concurrent_updates, with_updater=False)
+    server = WebhookServer(application, listen="127.0.0.1", port=args.webhook_port, path="/telegram")
+    stop_event = asyncio.Event()
+    serving = asyncio.create_task(serve_webhook(application, server, f"http://127.0.0.1:{args.webhook_port}",
+                                                max_connections=args.max_connections, stop_event=stop_event))
+    while not application.running:
+        await asyncio.sleep(0.01)
+    try:
+        return await control_run(args.api_port, {
+            "mode": "webhook", "updates": args.updates, "url": f"http://127.0.0.1:{args.webhook_port}/telegram",
+            "secret_token": server.secret_token, "max_connections": args.max_connections,
+        })
+    finally:
+        stop_event.set()
+        await serving
+
+
+async def wait_for_port(port: int, timeout: float = 10.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        try:
+            _reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            if asyncio.get_running_loop().time() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def run(args) -> list[tuple[str, float, list[float]]]:
+    await wait_for_port(args.api_port)
+    results = []
+    for mode in ("polling", "webhook") if args.mode == "both" else (args.mode,):
+        elapsed, latencies = await (bench_polling(args) if mode == "polling" else bench_webhook(args))
+        results.append((mode, elapsed, latencies))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("polling", "webhook", "both"), default="both")
+    parser.add_argument("--updates", type=int, default=5000, help="Кількість оновлень.")
+    parser.add_argument("--max-connections", type=int, default=40, help="Одночасні POST-и фейка на вебхук.")
+    parser.add_argument("--concurrent-updates", type=int, default=0,
+                        help="concurrent_updates Application (0 — послідовна обробка).")
+    parser.add_argument("--api-port", type=int, default=8081)
+    parser.add_argument("--webhook-port", type=int, default=8082)
+    args = parser.parse_args()
+
+    fake = subprocess.Popen([sys.executable, FAKE_TELEGRAM, "--port", str(args.api_port)], stdout=subprocess.DEVNULL)
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        fake.terminate()
+        fake.wait()
+
+    print(f"{'mode':>8} {'updates/s':>10} {'p50, ms':>8} {'p95, ms':>8} {'p99, ms':>8}")
+    for mode, elapsed, latencies in results:
+        quantiles = statistics.quantiles(latencies, n=100)
+        print(f"{mode:>8} {len(latencies) / elapsed:>10.0f} {quantiles[49] * 1000:>8.1f} "
+              f"{quantiles[94] * 1000:>8.1f} {quantiles[98] * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Локальний фейковий Telegram для бенчмарків режиму отримання оновлень.
+
+  * Bot API (/bot<token>/<method>): getMe, setWebhook, getUpdates (long polling з черги),
+    sendMessage (фіксує час відповіді бота); решта методів повертає True;
+  * генератор оновлень: POST на вебхук бота (з секретним токеном, не більше
+    max_connections одночасних запитів, як робить Telegram) або черга для getUpdates.
+
+Затримка — від відправки оновлення фейком до отримання sendMessage з відповіддю бота;
+replied спрацьовує на перший sendMessage взагалі (холодний старт, bench_startup.py).
+Працює окремим процесом (щоб не ділити цикл подій з ботом); прогін запускається
+POST /control/run з JSON {"mode", "updates", "url", "secret_token", "max_connections"}.
+
+Запуск:
+    python benchmarks/fake_telegram.py --port 8081
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import time
+
+from aiohttp import ClientSession, TCPConnector, web
+
+CHATS = 500
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "bench", "username": "bench_bot"}
+
+
+def make_update(update_id: int, chat_id: int) -> dict:
+    user = {"id": chat_id, "is_bot": False, "first_name": f"user{chat_id}"}
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id, "date": int(time.time()), "text": f"u{update_id}",
+            "chat": {"id": chat_id, "type": "private"}, "from": user,
+        },
+    }
+
+
+class FakeTelegram:
+    def __init__(self, host: str = "127.0.0.1", port: int = 8081):
+        self.host = host
+        self.port = port
+        self.sent_at: dict[str, float] = {}
+        self.latencies: list[float] = []
+        self._pending: list[dict] = []
+        self._pending_changed = asyncio.Condition()
+        self._all_answered = asyncio.Event()
+        self.replied = asyncio.Event()
+        self._expected = 0
+        self._message_ids = itertools.count(1)
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/bot"
+
+    async def start(self):
+        web_app = web.Application()
+        web_app.router.add_route("*", "/bot{token}/{method}", self._api)
+        web_app.router.add_post("/control/run", self._control_run)
+        self._runner = web.AppRunner(web_app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _control_run(self, request: web.Request) -> web.Response:
+        run = await request.json()
+        updates = [make_update(update_id, update_id % CHATS + 1) for update_id in range(1, run["updates"] + 1)]
+        self.expect(len(updates))
+        started = time.perf_counter()
+        if run["mode"] == "webhook":
+            await self.post_updates(run["url"], run["secret_token"], updates, run["max_connections"])
+        else:
+            await self.enqueue(updates)
+        await self.wait_answered(timeout=600)
+        return web.json_response({"elapsed": time.perf_counter() - started, "latencies": self.latencies})
+
+    async def _params(self, request: web.Request) -> dict:
+        if request.content_type == "application/json":
+            return await request.json()
+        return dict(await request.post())
+
+    async def _api(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = await self._params(request)
+        if method == "getMe":
+            result = BOT_USER
+        elif method == "getUpdates":
+            result = await self._get_updates(int(params.get("offset") or 0), float(params.get("timeout") or 0))
+        elif method == "sendMessage":
+            result = self._record_reply(params)
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    def _record_reply(self, params: dict) -> dict:
+        self.replied.set()
+        text = params.get("text", "")
+        sent_at = self.sent_at.pop(text, None)
+        if sent_at is not None:
+            self.latencies.append(time.perf_counter() - sent_at)
+            if len(self.latencies) >= self._expected:
+                self._all_answered.set()
+        chat_id = int(params.get("chat_id", 0))
+        return {"message_id": next(self._message_ids), "date": int(time.time()), "text": text,
+                "chat": {"id": chat_id, "type": "private"}, "from": BOT_USER}
+
+    async def _get_updates(self, offset: int, timeout: float) -> list[dict]:
+        async with self._pending_changed:
+            self._pending = [update for update in self._pending if update["update_id"] >= offset]
+            if not self._pending and timeout:
+                try:
+                    await asyncio.wait_for(self._pending_changed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            return self._pending[:100]
+
+    def expect(self, count: int):
+        self.latencies = []
+        self._expected = count
+        self._all_answered.clear()
+
+    async def wait_answered(self, timeout: float):
+        await asyncio.wait_for(self._all_answered.wait(), timeout)
+
+    async def enqueue(self, updates: list[dict]):
+        """Оновлення для getUpdates (режим polling)."""
+        async with self._pending_changed:
+            now = time.perf_counter()
+            for update in updates:
+                self.sent_at[update["message"]["text"]] = now
+            self._pending.extend(updates)
+            self._pending_changed.notify_all()
+
+    async def post_updates(self, url: str, secret_token: str, updates: list[dict], max_connections: int):
+        """POST-ить оновлення на вебхук, тримаючи не більше max_connections одночасних запитів."""
+        headers = {"X-Telegram-Bot-Api-Secret-Token": secret_token, "Content-Type": "application/json"}
+        queue: asyncio.Queue = asyncio.Queue()
+        for update in updates:
+            queue.put_nowait(update)
+
+        async def connection(session: ClientSession):
+            while not queue.empty():
+                update = queue.get_nowait()
+                self.sent_at[update["message"]["text"]] = time.perf_counter()
+                async with session.post(url, data=json.dumps(update), headers=headers) as response:
+                    if response.status != 200:
+                        raise RuntimeError(f"Вебхук відповів {response.status}")
+
+        async with ClientSession(connector=TCPConnector(limit=max_connections)) as session:
+            await asyncio.gather(*(connection(session) for _ in range(max_connections)))
+
+
+async def serve(host: str, port: int):
+    fake = FakeTelegram(host, port)
+    await fake.start()
+    print(f"FAKE TELEGRAM: {fake.base_url}", flush=True)
+    await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,141 +1,141 @@
-from telegram.ext import CommandHandler, filters, MessageHandler, CallbackQueryHandler, ConversationHandler
+from telegram import Update
+from telegram.ext import CommandHandler, filters, MessageHandler, CallbackQueryHandler, ConversationHandler, \
+    TypeHandler
+
+from config import CONVERSATION_TIMEOUT_SEC, ADMIN_USER_IDS
+from bot.infra.callback_router import CallbackRouter
+from bot.logic.callback_data import (
+    TASK_ACTION, TASKS_SUBMENU, REMINDER_ACTION, JOURNAL_VIEW_ALL, MOOD_VIEW_ALL, ENTRIES_PAGE,
+    FILTERED_ENTRIES_PAGE, ENTRY_EXPAND, POMODORO_ACTION, POMODORO_SUBMENU, POMODORO_SUBMENU_TARGET,
+)
+from bot.logic.pending_input import PendingInputHandler, REMINDER_TIME, DELAY_TIME
 
 from bot.logic.menu_navigation import (
     MENU_TASKS_TEXT, MENU_JOURNAL_TEXT, MENU_MOOD_TEXT,
     MENU_POMODORO_TEXT, MENU_STATS_TEXT, MENU_TIP_TEXT,
 )
 
-from .commands.general import (
-    start,
-    show_stats,
-    tip_command,
-    cancel_conversation,
-    fallback_in_conversation,
-    menu_command,  # Команда /menu
-    handle_menu_button_stats,
-    handle_menu_button_tip
-
-)
-from bot.commands.tasks import (
-    add_task_conversation_starter,
-    list_tasks_command,
-    done,
-    set_reminder,
-    handle_delay_time_input,
-    handle_reminder_time_input,
-    handle_button,
-    handle_task_button,
-    handle_priority_selection,
-    handle_pomodoro_confirm,
-    handle_reminder_confirm,
-    handle_reminder_time_input_conv,
-    ASK_PRIORITY, AWAIT_POMODORO_CONFIRM, AWAIT_REMINDER_CONFIRM, GET_REMINDER_TIME_CONV,
-    handle_menu_button_tasks, prompt_for_task_description_conv_entry, GET_TASK_DESCRIPTION,
-    received_task_description_conv_state, handle_tasks_submenu_action
+from bot.logic.conversation_states import (
+    GET_TASK_DESCRIPTION, ASK_PRIORITY, AWAIT_POMODORO_CONFIRM, AWAIT_REMINDER_CONFIRM, GET_REMINDER_TIME_CONV,
+    GET_JOURNAL_ENTRY_TEXT_FROM_MENU, GET_MOOD_ENTRY_FROM_MENU,
 )
-from .commands.journaling import (
-    save_generic_entry,
-    show_journal_command,
-    show_mood_command,
-    handle_generic_pagination, handle_menu_button_journal, handle_menu_button_mood, prompt_for_journal_text_menu_entry,
-    GET_JOURNAL_ENTRY_TEXT_FROM_MENU, received_journal_text_menu_state, cancel_journal_entry_conversation,
-    handle_journal_submenu_view_all, prompt_for_mood_entry_menu, GET_MOOD_ENTRY_FROM_MENU,
-    cancel_mood_entry_conversation, received_mood_entry_menu_state, handle_mood_submenu_view_all
-)
-
+from bot.infra.lazy_handlers import LazyHandlerModule
+# Pomodoro завантажується під час запуску: app.py рахує його таймери для метрик
+from bot.commands import pomodoro
 
-from bot.commands.pomodoro import start_pomodoro_command, handle_pomodoro_button, handle_menu_button_pomodoro, \
-    handle_pomodoro_submenu_action
+# Решта модулів обробників імпортується під час першого виклику (або у фоні після старту), а не під час запуску
+general = LazyHandlerModule("bot.commands.general")
+tasks = LazyHandlerModule("bot.commands.tasks")
+journaling = LazyHandlerModule("bot.commands.journaling")
+admin = LazyHandlerModule("bot.commands.admin")
 
 
 def register_handlers(app_bot):
+    # Покинута розмова завершується сама, інакше її стан висить у persistence безстроково
+    conversation_timeout = CONVERSATION_TIMEOUT_SEC or None
+    timed_out = {ConversationHandler.TIMEOUT: [TypeHandler(Update, general.conversation_timed_out)]}
     add_task_conv_handler = ConversationHandler(
-        entry_points=[CommandHandler('add', add_task_conversation_starter),
-                      CallbackQueryHandler(prompt_for_task_description_conv_entry, pattern=r"^tasks_submenu:add$")],
+        entry_points=[CommandHandler('add', tasks.add_task_conversation_starter),
+                      CallbackQueryHandler(tasks.prompt_for_task_description_conv_entry, pattern=r"^tasks_submenu:add$")],
         states={
             GET_TASK_DESCRIPTION: [
-                MessageHandler(filters.TEXT & ~filters.COMMAND, received_task_description_conv_state)],
+                MessageHandler(filters.TEXT & ~filters.COMMAND, tasks.received_task_description_conv_state)],
 
-            ASK_PRIORITY: [CallbackQueryHandler(handle_priority_selection, pattern=r"^conv_prio:")],
-            AWAIT_POMODORO_CONFIRM: [CallbackQueryHandler(handle_pomodoro_confirm, pattern=r"^conv_sugg:pom_")],
-            AWAIT_REMINDER_CONFIRM: [CallbackQueryHandler(handle_reminder_confirm, pattern=r"^conv_sugg:rem_")],
-            GET_REMINDER_TIME_CONV: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_reminder_time_input_conv)],
+            ASK_PRIORITY: [CallbackQueryHandler(tasks.handle_priority_selection, pattern=r"^conv_prio:")],
+            AWAIT_POMODORO_CONFIRM: [CallbackQueryHandler(tasks.handle_pomodoro_confirm, pattern=r"^conv_sugg:pom_")],
+            AWAIT_REMINDER_CONFIRM: [CallbackQueryHandler(tasks.handle_reminder_confirm, pattern=r"^conv_sugg:rem_")],
+            GET_REMINDER_TIME_CONV: [MessageHandler(filters.TEXT & ~filters.COMMAND, tasks.handle_reminder_time_input_conv)],
+            **timed_out,
         },
         fallbacks=[
-            CommandHandler('cancel', cancel_conversation),
-            MessageHandler(filters.COMMAND | filters.TEXT, fallback_in_conversation)
+            CommandHandler('cancel', general.cancel_conversation),
+            MessageHandler(filters.COMMAND | filters.TEXT, general.fallback_in_conversation)
         ],
         name="add_task_conversation",
-        persistent=True
+        persistent=True,
+        conversation_timeout=conversation_timeout
     )
     new_journal_entry_conv_handler = ConversationHandler(
         entry_points=[
-            CallbackQueryHandler(prompt_for_journal_text_menu_entry,
+            CallbackQueryHandler(journaling.prompt_for_journal_text_menu_entry,
                                  pattern=r"^journal_submenu:new:(idea|thought|dream)$")
         ],
         states={
             GET_JOURNAL_ENTRY_TEXT_FROM_MENU: [
-                MessageHandler(filters.TEXT & ~filters.COMMAND, received_journal_text_menu_state)],
+                MessageHandler(filters.TEXT & ~filters.COMMAND, journaling.received_journal_text_menu_state)],
+            **timed_out,
         },
         fallbacks=[
-            CommandHandler('cancel', cancel_journal_entry_conversation)
+            CommandHandler('cancel', journaling.cancel_journal_entry_conversation)
         ],
         name="new_journal_entry_conversation",
-        persistent=True
+        persistent=True,
+        conversation_timeout=conversation_timeout
     )
     new_mood_entry_conv_handler = ConversationHandler(
         entry_points=[
-            CallbackQueryHandler(prompt_for_mood_entry_menu, pattern=r"^mood_submenu:new$")
+            CallbackQueryHandler(journaling.prompt_for_mood_entry_menu, pattern=r"^mood_submenu:new$")
         ],
         states={
-            GET_MOOD_ENTRY_FROM_MENU: [MessageHandler(filters.TEXT & ~filters.COMMAND, received_mood_entry_menu_state)],
+            GET_MOOD_ENTRY_FROM_MENU: [
+                MessageHandler(filters.TEXT & ~filters.COMMAND, journaling.received_mood_entry_menu_state)],
+            **timed_out,
         },
         fallbacks=[
-            CommandHandler('cancel', cancel_mood_entry_conversation)
+            CommandHandler('cancel', journaling.cancel_mood_entry_conversation)
         ],
         name="new_mood_entry_conversation",
-        persistent=True
+        persistent=True,
+        conversation_timeout=conversation_timeout
     )
     app_bot.add_handler(add_task_conv_handler)
     app_bot.add_handler(new_journal_entry_conv_handler)
     app_bot.add_handler(new_mood_entry_conv_handler)
 
-    app_bot.add_handler(CommandHandler('start', start))
-    app_bot.add_handler(CommandHandler('menu', menu_command))
-    app_bot.add_handler(CommandHandler('list', list_tasks_command))
-    app_bot.add_handler(CommandHandler('done', done))
-    app_bot.add_handler(CommandHandler('remind', set_reminder))
-    app_bot.add_handler(CommandHandler('pomodoro', start_pomodoro_command))
-    app_bot.add_handler(CommandHandler('stats', show_stats))
-    app_bot.add_handler(CommandHandler('tip', tip_command))
-
-    app_bot.add_handler(CommandHandler('idea', save_generic_entry))
-    app_bot.add_handler(CommandHandler('thought', save_generic_entry))
-    app_bot.add_handler(CommandHandler('dream', save_generic_entry))
-    app_bot.add_handler(CommandHandler('my_journal', show_journal_command))
-    app_bot.add_handler(CommandHandler('mood', save_generic_entry))
-    app_bot.add_handler(CommandHandler('my_moods', show_mood_command))
-    app_bot.add_handler(MessageHandler(filters.Text([MENU_STATS_TEXT]), handle_menu_button_stats), group=-1)
-    app_bot.add_handler(MessageHandler(filters.Text([MENU_TIP_TEXT]), handle_menu_button_tip), group=-1)
-    app_bot.add_handler(MessageHandler(filters.Text([MENU_TASKS_TEXT]), handle_menu_button_tasks), group=-1)
-    app_bot.add_handler(MessageHandler(filters.Text([MENU_JOURNAL_TEXT]), handle_menu_button_journal), group=-1)
-    app_bot.add_handler(MessageHandler(filters.Text([MENU_MOOD_TEXT]), handle_menu_button_mood), group=-1)
-    app_bot.add_handler(MessageHandler(filters.Text([MENU_POMODORO_TEXT]), handle_menu_button_pomodoro), group=-1)
-    app_bot.add_handler(MessageHandler(filters.Text([MENU_POMODORO_TEXT]), handle_menu_button_pomodoro), group=-1)
+    app_bot.add_handler(CommandHandler('start', general.start))
+    app_bot.add_handler(CommandHandler('menu', general.menu_command))
+    app_bot.add_handler(CommandHandler('list', tasks.list_tasks_command))
+    app_bot.add_handler(CommandHandler('done', tasks.done))
+    app_bot.add_handler(CommandHandler('remind', tasks.set_reminder))
+    app_bot.add_handler(CommandHandler('pomodoro', pomodoro.start_pomodoro_command))
+    app_bot.add_handler(CommandHandler('stats', general.show_stats))
+    app_bot.add_handler(CommandHandler('tip', general.tip_command))
 
-    app_bot.add_handler(MessageHandler(filters.Regex(r'^/done_(\d+)$'), done))
-    app_bot.add_handler(MessageHandler(filters.Regex(r'^/remind_(\d+)$'), set_reminder))
+    app_bot.add_handler(CommandHandler('idea', journaling.save_generic_entry))
+    app_bot.add_handler(CommandHandler('thought', journaling.save_generic_entry))
+    app_bot.add_handler(CommandHandler('dream', journaling.save_generic_entry))
+    app_bot.add_handler(CommandHandler('my_journal', journaling.show_journal_command))
+    app_bot.add_handler(CommandHandler('mood', journaling.save_generic_entry))
+    app_bot.add_handler(CommandHandler('my_moods', journaling.show_mood_command))
+    if ADMIN_USER_IDS:
+        app_bot.add_handler(CommandHandler('profile', admin.profile_command, filters=filters.User(user_id=ADMIN_USER_IDS)))
+    app_bot.add_handler(MessageHandler(filters.Text([MENU_STATS_TEXT]), general.handle_menu_button_stats), group=-1)
+    app_bot.add_handler(MessageHandler(filters.Text([MENU_TIP_TEXT]), general.handle_menu_button_tip), group=-1)
+    app_bot.add_handler(MessageHandler(filters.Text([MENU_TASKS_TEXT]), tasks.handle_menu_button_tasks), group=-1)
+    app_bot.add_handler(MessageHandler(filters.Text([MENU_JOURNAL_TEXT]), journaling.handle_menu_button_journal), group=-1)
+    app_bot.add_handler(MessageHandler(filters.Text([MENU_MOOD_TEXT]), journaling.handle_menu_button_mood), group=-1)
+    app_bot.add_handler(MessageHandler(filters.Text([MENU_POMODORO_TEXT]), pomodoro.handle_menu_button_pomodoro), group=-1)
+    app_bot.add_handler(MessageHandler(filters.Text([MENU_POMODORO_TEXT]), pomodoro.handle_menu_button_pomodoro), group=-1)
 
-    app_bot.add_handler(CallbackQueryHandler(handle_task_button, pattern=r"^task:"))
-    app_bot.add_handler(CallbackQueryHandler(handle_tasks_submenu_action, pattern=r"^tasks_submenu:"))
-    app_bot.add_handler(CallbackQueryHandler(handle_journal_submenu_view_all, pattern=r"^journal_submenu:view_all$"))
-    app_bot.add_handler(CallbackQueryHandler(handle_mood_submenu_view_all, pattern=r"^mood_submenu:view_all$"))
-    app_bot.add_handler(CallbackQueryHandler(handle_pomodoro_submenu_action, pattern=r"^pomodoro_submenu:"))
+    app_bot.add_handler(MessageHandler(filters.Regex(r'^/done_(\d+)$'), tasks.done))
+    app_bot.add_handler(MessageHandler(filters.Regex(r'^/remind_(\d+)$'), tasks.set_reminder))
 
-    app_bot.add_handler(CallbackQueryHandler(handle_pomodoro_button, pattern=r"^pom:"))
-    app_bot.add_handler(CallbackQueryHandler(handle_button, pattern=r"^(done|delay):"))
-    app_bot.add_handler(
-        CallbackQueryHandler(handle_generic_pagination, pattern=r"^(journal|mood)(:(tag|type):[^:]+)?:page:\d+"))
+    # Кнопки поза розмовами: один обробник з префіксним деревом замість послідовних regex
+    callback_router = CallbackRouter()
+    callback_router.add(TASK_ACTION, tasks.handle_task_button)
+    callback_router.add(TASKS_SUBMENU, tasks.handle_tasks_submenu_action)
+    callback_router.add(REMINDER_ACTION, tasks.handle_button)
+    callback_router.add(JOURNAL_VIEW_ALL, journaling.handle_journal_submenu_view_all)
+    callback_router.add(MOOD_VIEW_ALL, journaling.handle_mood_submenu_view_all)
+    callback_router.add(ENTRIES_PAGE, journaling.handle_generic_pagination)
+    callback_router.add(FILTERED_ENTRIES_PAGE, journaling.handle_generic_pagination)
+    callback_router.add(ENTRY_EXPAND, journaling.expand_entry)
+    callback_router.add(POMODORO_ACTION, pomodoro.handle_pomodoro_button)
+    callback_router.add(POMODORO_SUBMENU, pomodoro.handle_pomodoro_submenu_action)
+    callback_router.add(POMODORO_SUBMENU_TARGET, pomodoro.handle_pomodoro_submenu_action)
+    app_bot.add_handler(callback_router)
 
-    app_bot.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_reminder_time_input), group=0)
-    app_bot.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_delay_time_input), group=1)
+    app_bot.add_handler(PendingInputHandler(app_bot, {
+        REMINDER_TIME: tasks.handle_reminder_time_input,
+        DELAY_TIME: tasks.handle_delay_time_input,
+    }))
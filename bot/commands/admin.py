@@ -0,0 +1,65 @@
+import logging
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from bot.infra.profiling import PROFILE_MODES, parse_targets, start_profiling, finish_profiling
+from bot.infra.sql_instrumentation import handler_names
+from config import PROFILE_MAX_SECONDS
+
+logger = logging.getLogger(__name__)
+
+PROFILE_USAGE = ("Використання: /profile <обробник[,обробник...]|all> <секунди> [sampling|cprofile]\n"
+                 "Наприклад: /profile list_tasks_command 60")
+
+
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Профілює вказані обробники (або весь диспетчер) протягом заданого часу; лише для адміністраторів."""
+    args = context.args or []
+    if len(args) < 2:
+        await update.message.reply_text(PROFILE_USAGE)
+        return
+    mode = args[2].lower() if len(args) > 2 else "sampling"
+    try:
+        seconds = float(args[1])
+    except ValueError:
+        await update.message.reply_text(PROFILE_USAGE)
+        return
+    if mode not in PROFILE_MODES or not 0 < seconds <= PROFILE_MAX_SECONDS:
+        await update.message.reply_text(f"{PROFILE_USAGE}\nТривалість — до {PROFILE_MAX_SECONDS} с.")
+        return
+
+    targets = parse_targets(args[0])
+    if targets is not None:
+        unknown = targets - handler_names()
+        if unknown or not targets:
+            known = ", ".join(sorted(handler_names()))
+            await update.message.reply_text(f"Невідомі обробники: {', '.join(sorted(unknown))}\nДоступні: {known}")
+            return
+
+    try:
+        session = start_profiling(targets, seconds, mode)
+    except RuntimeError as e:
+        await update.message.reply_text(str(e))
+        return
+    context.job_queue.run_once(finish_profiling_job, seconds, chat_id=update.effective_chat.id, name="profiling")
+    await update.message.reply_text(f"⏱ Профілюю {session.label} ({mode}) {seconds:g} с, звіт надішлю файлом.")
+
+
+async def finish_profiling_job(context: ContextTypes.DEFAULT_TYPE):
+    """Завершує сеанс профілювання: звіт — документом у чат (або в лог, якщо сеанс запущено з оточення)."""
+    session = finish_profiling()
+    if session is None:
+        return
+    report = session.report()
+    paths = session.save()
+    if paths:
+        logger.info('профіль збережено: %s', ', '.join(paths))
+    chat_id = context.job.chat_id
+    if chat_id is None:
+        logger.info('%s', report)
+        return
+    caption = f"Профіль {session.label} ({session.mode}, {session.seconds:g} с)"
+    if paths:
+        caption += f"\nЗбережено: {', '.join(paths)}"
+    await context.bot.send_document(chat_id=chat_id, document=report.encode("utf-8"),
+                                    filename=f"profile-{session.started_at:%Y%m%d-%H%M%S}.txt", caption=caption[:1024])
@@ -1,7 +1,10 @@
+import logging
 import random
 import os
 import json
 
+logger = logging.getLogger(__name__)
+
 
 FOCUS_TIPS_JSON_PATH = "/Users/sviat13/PycharmProjects/telegram_bot_pt1/data/focus_tips.json"
 _cached_focus_intro = None
@@ -20,7 +23,7 @@ def _load_mood_advice_from_json():
     file_path = MOOD_ADVICE_JSON_PATH
 
     if not os.path.exists(file_path):
-        print(f"ПОПЕРЕДЖЕННЯ: Файл з порадами для настрою '{file_path}' не знайдено.")
+        logger.warning("Файл з порадами для настрою '%s' не знайдено.", file_path)
         return
 
     try:
@@ -34,20 +37,20 @@ def _load_mood_advice_from_json():
                             "advice" in item and isinstance(item["advice"], str):
                         valid_rules.append(item)
                     else:
-                        print(f"ПОПЕРЕДЖЕННЯ: Неправильний формат запису в '{file_path}': {item}")
+                        logger.warning("Неправильний формат запису в '%s': %s", file_path, item)
 
                 _cached_mood_advice_rules = valid_rules
                 if _cached_mood_advice_rules:
-                    print(
-                        f"Успішно завантажено {len(_cached_mood_advice_rules)} правил для порад настрою з '{file_path}'.")
+                    logger.info("Успішно завантажено %s правил для порад настрою з '%s'.",
+                                len(_cached_mood_advice_rules), file_path)
                 else:
-                    print(f"ПОПЕРЕДЖЕННЯ: Не знайдено валідних правил у '{file_path}'.")
+                    logger.warning("Не знайдено валідних правил у '%s'.", file_path)
             else:
-                print(f"ПОМИЛКА ФОРМАТУ: Файл '{file_path}' має містити JSON список (масив).")
+                logger.error("ПОМИЛКА ФОРМАТУ: Файл '%s' має містити JSON список (масив).", file_path)
     except json.JSONDecodeError as e:
-        print(f"ПОМИЛКА JSON ДЕКОДУВАННЯ у файлі '{file_path}': {e}")
+        logger.error("ПОМИЛКА JSON ДЕКОДУВАННЯ у файлі '%s': %s", file_path, e)
     except Exception as e:
-        print(f"ПОМИЛКА при читанні файлу з порадами для настрою '{file_path}': {e}")
+        logger.error("ПОМИЛКА при читанні файлу з порадами для настрою '%s': %s", file_path, e)
 
 
 def get_mood_advice_rules() -> list:
@@ -66,7 +69,7 @@ def _load_focus_tips_from_json():
     file_path = FOCUS_TIPS_JSON_PATH
 
     if not os.path.exists(file_path):
-        print(f"ПОПЕРЕДЖЕННЯ: Файл '{file_path}' не знайдено.")
+        logger.warning("Файл '%s' не знайдено.", file_path)
         _cached_focus_intro = "Помилка: Вступ для порад з фокусування не знайдено."
         _cached_focus_detailed_sections.append("Помилка: Детальні поради з фокусування не знайдено.")
         return
@@ -78,12 +81,12 @@ def _load_focus_tips_from_json():
                 if isinstance(data["detailed_sections"], list):
                     _cached_focus_detailed_sections = data["detailed_sections"]
                 else:
-                    print(f"ПОПЕРЕДЖЕННЯ: 'detailed_sections' у '{file_path}' не є списком.")
+                    logger.warning("'detailed_sections' у '%s' не є списком.", file_path)
                     _cached_focus_detailed_sections.append("Помилка: Неправильний формат детальних порад.")
                 if _cached_focus_intro and _cached_focus_detailed_sections and not (
                         "Помилка" in _cached_focus_detailed_sections[0] if _cached_focus_detailed_sections else True):
-                    print(
-                        f"Успішно завантажено вступ та {len(_cached_focus_detailed_sections)} детальних порад з фокусування з '{file_path}'.")
+                    logger.info("Успішно завантажено вступ та %s детальних порад з фокусування з '%s'.",
+                                len(_cached_focus_detailed_sections), file_path)
                 else:
                     if not _cached_focus_intro:
                         _cached_focus_intro = "Помилка завантаження вступу для фокус-порад."
@@ -92,15 +95,15 @@ def _load_focus_tips_from_json():
                             "Помилка завантаження детальних фокус-порад."
                         )
             else:
-                print(
-                    f"ПОМИЛКА ФОРМАТУ: Файл '{file_path}' має містити об'єкт з ключами 'introduction' та 'detailed_sections'.")
+                logger.error("ПОМИЛКА ФОРМАТУ: Файл '%s' має містити об'єкт з ключами 'introduction' та 'detailed_sections'.",
+                             file_path)
                 _cached_focus_intro = "Помилка формату файлу фокус-порад (вступ)."
                 _cached_focus_detailed_sections.append("Помилка формату файлу фокус-порад (секції).")
     except json.JSONDecodeError as e:
-        print(f"ПОМИЛКА JSON ДЕКОДУВАННЯ у файлі '{file_path}': {e}")
+        logger.error("ПОМИЛКА JSON ДЕКОДУВАННЯ у файлі '%s': %s", file_path, e)
     except Exception as e:
 
-        print(f"ПОМИЛКА при читанні файлу '{file_path}': {e}")
+        logger.error("ПОМИЛКА при читанні файлу '%s': %s", file_path, e)
 
 
 def get_structured_focus_tip() -> str:
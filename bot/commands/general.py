@@ -1,5 +1,5 @@
+import logging
 import datetime
-from telegram.helpers import escape_markdown
 from telegram.constants import ParseMode
 from telegram.error import BadRequest
 from telegram.ext import ContextTypes, ConversationHandler
@@ -9,6 +9,11 @@ from bot.commands.content import get_structured_focus_tip
 from bot.logic.logic import get_statistics_logic
 from bot.commands.pomodoro import WORK_DURATION_MIN
 from bot.logic.menu_navigation import send_main_menu
+from bot.logic.rendering import escape_markdown_v2, finalize
+from bot.infra.db_executor import run_db
+from bot.logic.pending_input import forget_state, CONVERSATION_STATE_KEYS
+
+logger = logging.getLogger(__name__)
 
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -42,13 +47,13 @@ async def tip_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         try:
             await update.message.reply_text(tip_article, parse_mode=ParseMode.MARKDOWN_V2)
         except BadRequest as e:
-            print(f"Telegram BadRequest при надсиланні поради з MarkdownV2: {e}")
-            print(f"Оригінальний текст поради був:\n{tip_article}")
+            logger.error('Telegram BadRequest при надсиланні поради з MarkdownV2: %s\nОригінальний текст поради:\n%s',
+                         e, tip_article)
             await update.message.reply_text(
                 "Виникла невелика проблема з форматуванням поради. Ось вона у простому вигляді:\n\n" + tip_article
             )
         except Exception as e:
-            print(f"Неочікувана помилка в tip_command: {e}")
+            logger.error('Неочікувана помилка в tip_command: %s', e)
 
             await update.message.reply_text("Ой, сталася помилка при відображенні поради.")
 
@@ -59,7 +64,7 @@ async def cancel_conversation(update: Update, context: ContextTypes.DEFAULT_TYPE
     cleaned_any = False
     for key in keys_to_pop:
         if key in context.user_data:
-            context.user_data.pop(key, None)
+            forget_state(context.user_data, key)
             cleaned_any = True
     if cleaned_any:
         await update.message.reply_text("Дію скасовано.")
@@ -69,12 +74,20 @@ async def cancel_conversation(update: Update, context: ContextTypes.DEFAULT_TYPE
     return ConversationHandler.END
 
 
+async def conversation_timed_out(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Розмова завершена за CONVERSATION_TIMEOUT_SEC: прибирає її проміжний стан."""
+    if context.user_data is not None:
+        for key in CONVERSATION_STATE_KEYS:
+            forget_state(context.user_data, key)
+    return ConversationHandler.END
+
+
 async def show_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     now_display_raw = datetime.datetime.now(datetime.timezone.utc).strftime('%d.%m.%Y')
-    now_display_escaped = escape_markdown(now_display_raw, version=2)
+    now_display_escaped = escape_markdown_v2(now_display_raw)
 
-    stats = get_statistics_logic(user_id)
+    stats = await run_db(get_statistics_logic, user_id)
 
     if not stats:
         await update.message.reply_text("Не вдалося отримати статистику. Спробуйте пізніше.")
@@ -103,7 +116,7 @@ async def show_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if completed_pom_per_task:
         message_parts.append("\n*Завершені Pomodoro по завданнях \\(топ\\-5\\):*")
         for desc_raw, count in completed_pom_per_task:
-            desc_escaped = escape_markdown(desc_raw or "Невідоме завдання", version=2)
+            desc_escaped = escape_markdown_v2(desc_raw or "Невідоме завдання")
             focus_time_minutes = count * WORK_DURATION_MIN
             message_parts.append(
                 f"  \\- «{desc_escaped}»: {count} сесій \\(≈ {focus_time_minutes // 60} год {focus_time_minutes % 60} хв\\)"
@@ -116,18 +129,15 @@ async def show_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"  \\- Загальний витрачений час: ≈ {tsmw_minutes // 60} год {tsmw_minutes % 60} хв"
     )
 
-    final_message = "\n".join(message_parts)
+    rendered = finalize("\n".join(message_parts))
 
     try:
-        await update.message.reply_text(final_message, parse_mode=ParseMode.MARKDOWN_V2)
+        await update.message.reply_text(rendered.text, parse_mode=rendered.parse_mode)
     except BadRequest as e_stats_br:
-        print(f"Помилка Markdown в show_stats ПІСЛЯ ВИПРАВЛЕНЬ: {e_stats_br}")
-        print(f"Проблемний текст:\n{final_message}")
-        plain_text_parts = [f"Ваша статистика ({now_display_raw})\n"]
-        plain_text_parts.append(f"Виконано завдань:\n  - Сьогодні: {stats.get('tasks_today', 0)}\n  - ...")
+        logger.error('BadRequest в show_stats: %s', e_stats_br)
         await update.message.reply_text("Виникла помилка форматування статистики. Спробуйте пізніше.")
     except Exception as e_stats:
-        print(f"Загальна помилка в show_stats: {e_stats}")
+        logger.error('Загальна помилка в show_stats: %s', e_stats)
         await update.message.reply_text("Не вдалося відобразити статистику.")
 
 
@@ -1,18 +1,28 @@
-from telebot.formatting import escape_markdown
-from telegram.constants import ParseMode
+import logging
 from telegram.error import BadRequest
 from telegram.ext import ContextTypes, ConversationHandler
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
-from bot.logic.logic import save_generic_entry_logic, ENTRY_TYPE_CONFIG_LOGIC, get_paginated_entries_logic
+from bot.logic.logic import ENTRY_TYPE_CONFIG_LOGIC, get_entries_window_logic, get_entry_logic
+from bot.logic.entry_writes import save_entry
 
 from bot.commands.content import get_mood_advice_rules
 from bot.logic.menu_navigation import show_journal_submenu, show_mood_submenu, send_main_menu
 from bot.models import JournalEntry, MoodEntry
+from bot.infra.db_executor import run_db
+from bot.logic.pending_input import remember_state, forget_state
+from bot.logic.callback_data import ENTRIES_PAGE, FILTERED_ENTRIES_PAGE, ENTRY_EXPAND
+from bot.logic.entry_pages import page_layouts
+from bot.logic.rendering import render_journal_entry, render_mood_entry, render_entries_page, render_full_entry, \
+    markdown_v2_length, telegram_length, MESSAGE_LIMIT
+from bot.logic.conversation_states import GET_JOURNAL_ENTRY_TEXT_FROM_MENU, GET_MOOD_ENTRY_FROM_MENU
 
+logger = logging.getLogger(__name__)
 
+
+# Найбільше записів на сторінці; скільки з них уміщується в одне повідомлення, вирішує довжина записів
 ENTRIES_PER_PAGE_CONFIG = {
-    "journal": 5,
-    "mood": 5
+    "journal": 10,
+    "mood": 10
 }
 
 ENTRY_TYPE_DISPLAY_CONFIG = {
@@ -46,9 +56,6 @@ NO_ENTRIES_MESSAGE_CONFIG = {
     "mood": "У вас ще немає жодного запису про настрій. Спробуйте /mood!"
 }
 
-GET_JOURNAL_ENTRY_TEXT_FROM_MENU = range(20, 21)
-GET_MOOD_ENTRY_FROM_MENU = range(21, 22)
-
 
 async def save_generic_entry(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
@@ -80,27 +87,25 @@ async def save_generic_entry(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
     full_content_input = command_parts[1].strip()
 
-    created_entry, confirmation_message, _parsed_tags, text_for_analysis = save_generic_entry_logic(
-        user_id, command, full_content_input
-    )
+    saved, confirmation_message, _parsed_tags, text_for_analysis = await save_entry(user_id, command, full_content_input)
 
     await update.message.reply_text(confirmation_message)
 
-    if created_entry and command == "mood" and text_for_analysis:
+    if saved and command == "mood" and text_for_analysis:
         normalized_text = text_for_analysis.lower()
         advice_to_send = None
         mood_advice_rules = get_mood_advice_rules()
 
         for rule in mood_advice_rules:
             if not isinstance(rule, dict) or "keywords" not in rule or "advice" not in rule:
-                print(f"ПОПЕРЕДЖЕННЯ: Пропускаю неправильно сформоване правило в mood_advice_rules: {rule}")
+                logger.warning('Пропускаю неправильно сформоване правило в mood_advice_rules: %s', rule)
                 continue
 
             current_keywords = rule["keywords"]
             if isinstance(current_keywords, str):
                 current_keywords = [current_keywords]
             if not isinstance(current_keywords, list):
-                print(f"ПОПЕРЕДЖЕННЯ: 'keywords' в правилі не є списком: {rule}")
+                logger.warning("'keywords' в правилі не є списком: %s", rule)
                 continue
 
             for keyword in current_keywords:
@@ -114,6 +119,23 @@ async def save_generic_entry(update: Update, context: ContextTypes.DEFAULT_TYPE)
             await update.message.reply_text(advice_to_send)
 
 
+def _journal_type_display(entry) -> str:
+    entry_type_map = ENTRY_TYPE_DISPLAY_CONFIG.get("journal", {})
+    default_type_display = entry_type_map.get("_default", "Запис")
+    return entry_type_map.get(entry.entry_type, entry.entry_type.capitalize() if entry.entry_type else default_type_display)
+
+
+def _render_entry_block(entry_config_key: str, entry, content_limit: int | None = None) -> str:
+    if entry_config_key == "journal":
+        return render_journal_entry(entry, _journal_type_display(entry), content_limit)
+    return render_mood_entry(entry, content_limit)
+
+
+def _entries_header(header_title: str, page: int, first: int, last: int, total: int) -> str:
+    shown = f"запис {first}" if first == last else f"записи {first}–{last}"
+    return f"{header_title} (Стор. {page + 1}, {shown} з {total})"
+
+
 async def show_paginated_entries(
         update: Update,
         context: ContextTypes.DEFAULT_TYPE,
@@ -137,11 +159,42 @@ async def show_paginated_entries(
             await error_target.reply_text("Невідомий тип журналу.")
         return
 
-    page_size = ENTRIES_PER_PAGE_CONFIG.get(entry_config_key, 5)
-
-    entries_on_page, total_entries, num_pages = get_paginated_entries_logic(
-        user_id, page, page_size, model_to_query_class, tag_filter, entry_type_filter
+    max_entries = ENTRIES_PER_PAGE_CONFIG.get(entry_config_key, 10)
+    layout_key = (user_id, entry_config_key, tag_filter, entry_type_filter)
+    layout = page_layouts.get(layout_key)
+    page_start = layout.start(page) if layout is not None else None
+    # Межі сторінки відомі — лише її записи; інакше — всі записи до неї, щоб розкласти попередні сторінки
+    first_page = page if page_start is not None else 0
+    entries, total_entries = await run_db(
+        get_entries_window_logic, user_id, model_to_query_class, page_start or 0,
+        max_entries * (page + 1 - first_page), tag_filter, entry_type_filter
     )
+    if layout is None or layout.total != total_entries:
+        layout = page_layouts.reset(layout_key, total_entries, stale=layout is not None)
+        if first_page:
+            first_page = 0
+            entries, total_entries = await run_db(
+                get_entries_window_logic, user_id, model_to_query_class, 0, max_entries * (page + 1),
+                tag_filter, entry_type_filter
+            )
+            layout.total = total_entries
+
+    header_title_base = HEADER_TEXT_CONFIG.get(entry_config_key, "Ваші Записи")
+    filter_display_header = ""
+    if tag_filter:
+        filter_display_header += f" (Тег: #{tag_filter})"
+    if entry_config_key == "journal" and entry_type_filter:
+        display_type_header = ENTRY_TYPE_DISPLAY_CONFIG.get("journal", {}).get(entry_type_filter, entry_type_filter)
+        filter_display_header += f" (Тип: {display_type_header})"
+    header_title = f"{header_title_base}{filter_display_header}"
+
+    entry_blocks = [_render_entry_block(entry_config_key, entry) for entry in entries]
+    block_lengths = [markdown_v2_length(block) for block in entry_blocks]
+    # Заголовок з найбільшими можливими числами, щоб межі сторінок не залежали від номера сторінки
+    budget = MESSAGE_LIMIT - telegram_length(
+        _entries_header(header_title, total_entries, total_entries, total_entries, total_entries)) - 1
+    page_slice = layout.locate(page, first_page, block_lengths, budget, max_entries)
+    entries_on_page = entries[page_slice] if page_slice is not None else []
 
     no_entries_base_message = NO_ENTRIES_MESSAGE_CONFIG.get(entry_config_key, "Записів немає.")
     target_message_obj = update.message if not is_callback else update.callback_query.message
@@ -152,7 +205,7 @@ async def show_paginated_entries(
             current_filter_message_part += f" з тегом #{tag_filter}"
         if entry_config_key == "journal" and entry_type_filter:
             display_type = ENTRY_TYPE_DISPLAY_CONFIG.get("journal", {}).get(entry_type_filter, entry_type_filter)
-            current_filter_message_part += f" типу '{escape_markdown(display_type)}'"
+            current_filter_message_part += f" типу '{display_type}'"
 
         no_entries_message = f"Не знайдено записів{current_filter_message_part}." if current_filter_message_part else no_entries_base_message
         if page == 0 and not entries_on_page :
@@ -168,95 +221,85 @@ async def show_paginated_entries(
             current_filter_message_part += f" з тегом #{tag_filter}"
         if entry_config_key == "journal" and entry_type_filter:
             display_type = ENTRY_TYPE_DISPLAY_CONFIG.get("journal", {}).get(entry_type_filter, entry_type_filter)
-            current_filter_message_part += f" типу '{escape_markdown(display_type)}'"
+            current_filter_message_part += f" типу '{display_type}'"
         if is_callback:
             await update.callback_query.answer(f"Більше записів{current_filter_message_part} немає.")
         return
 
-    header_title_base = HEADER_TEXT_CONFIG.get(entry_config_key, "Ваші Записи")
-    filter_display_header = ""
-    if tag_filter:
-        filter_display_header += f" (Тег: \\#{escape_markdown(tag_filter)})"
-    if entry_config_key == "journal" and entry_type_filter:
-        display_type_header = ENTRY_TYPE_DISPLAY_CONFIG.get("journal", {}).get(entry_type_filter, entry_type_filter)
-        filter_display_header += f" (Тип: {escape_markdown(display_type_header)})"
-    header_info_raw = f"{header_title_base}{filter_display_header} (Стор. {page + 1} з {max(1, num_pages)})"
-    header_info_escaped = escape_markdown(header_info_raw)
-    message_parts = [header_info_escaped + "\n"]
-
-    for entry in entries_on_page:
-        date_str_raw = entry.created_at.strftime('%d.%m.%Y %H:%M') if entry.created_at else "невідомо"
-        date_str_escaped = escape_markdown(date_str_raw)
-        entry_specific_parts_md = []
-        if entry_config_key == "journal":
-            entry_type_map = ENTRY_TYPE_DISPLAY_CONFIG.get("journal", {})
-            default_type_display = entry_type_map.get("_default", "Запис")
-            entry_type_raw = entry_type_map.get(entry.entry_type, entry.entry_type.capitalize() if entry.entry_type else default_type_display)
-            entry_type_escaped = escape_markdown(entry_type_raw)
-            entry_specific_parts_md.append(f"*{entry_type_escaped}*")
-            if hasattr(entry, 'content') and entry.content:
-                entry_specific_parts_md.append(escape_markdown(entry.content))
-        elif entry_config_key == "mood":
-            if hasattr(entry, 'rating') and entry.rating is not None:
-                escaped_rating = escape_markdown(str(entry.rating))
-                entry_specific_parts_md.append(f"Оцінка: *{escaped_rating}/5*")
-            if hasattr(entry, 'text') and entry.text:
-                entry_specific_parts_md.append(escape_markdown(entry.text))
-
-        tags_display_formatted = ""
-        if entry.tags_str:
-            tags_list_raw = [tag.strip() for tag in entry.tags_str.split(',') if tag.strip()]
-            tags_list_escaped = [f"\\#{escape_markdown(tag)}" for tag in tags_list_raw]
-            if tags_list_escaped:
-                tags_display_formatted = "\n*Теги:* " + ", ".join(tags_list_escaped)
-
-        entry_header_md = f"🗓️ *{date_str_escaped}*"
-        entry_content_joined_md = " \\- ".join(filter(None, entry_specific_parts_md))
-        full_entry_text = f"\n{entry_header_md}"
-        if entry_content_joined_md:
-            full_entry_text += f" \\- {entry_content_joined_md}"
-        full_entry_text += f"{tags_display_formatted}\n────────────────────"
-        message_parts.append(full_entry_text)
-
-    message_text_final = "\n".join(message_parts)
+    first_entry = layout.starts[page]
+    header_info_raw = _entries_header(header_title, page, first_entry + 1, first_entry + len(entries_on_page), total_entries)
+    page_blocks = entry_blocks[page_slice]
+    truncated_entry = None
+    overflow = telegram_length(header_info_raw) + 1 + sum(block_lengths[page_slice]) + len(page_blocks) - MESSAGE_LIMIT
+    if overflow > 0:
+        # Задовгий запис сам на сторінці: обрізаний текст і кнопка «розгорнути»
+        truncated_entry = entries_on_page[0]
+        content = truncated_entry.content if entry_config_key == "journal" else truncated_entry.text
+        page_blocks = [_render_entry_block(entry_config_key, truncated_entry,
+                                           content_limit=max(telegram_length(content or "") - overflow - 1, 0))]
+    rendered = render_entries_page(header_info_raw, page_blocks)
+
     keyboard_buttons = []
+    if truncated_entry is not None:
+        keyboard_buttons.append([InlineKeyboardButton(
+            "📖 Розгорнути запис",
+            callback_data=ENTRY_EXPAND.pack(entry_config_key=entry_config_key, entry_id=truncated_entry.id))])
     pagination_row = []
-    base_callback_prefix = f"{entry_config_key}"
-    filter_callback_part = ""
+    page_filter = {}
     if tag_filter:
-        safe_tag = tag_filter.replace(":", "_").replace("#", "")
-        filter_callback_part = f":tag:{safe_tag}"
+        page_filter = {"filter_type": "tag", "filter_value": tag_filter.replace(":", "_").replace("#", "")}
     elif entry_type_filter and entry_config_key == "journal":
-        safe_type = entry_type_filter.replace(":", "_")
-        filter_callback_part = f":type:{safe_type}"
-    callback_data_prefix_with_filter = f"{base_callback_prefix}{filter_callback_part}"
-    if page > 0:
-        pagination_row.append(InlineKeyboardButton(
-            "⬅️ Попередня",
-            callback_data=f"{callback_data_prefix_with_filter}:page:{page - 1}"))
-    if (page + 1) * page_size < total_entries:
-        pagination_row.append(InlineKeyboardButton(
-            "Наступна ➡️",
-            callback_data=f"{callback_data_prefix_with_filter}:page:{page + 1}")
-        )
+        page_filter = {"filter_type": "type", "filter_value": entry_type_filter.replace(":", "_")}
+    page_route = FILTERED_ENTRIES_PAGE if page_filter else ENTRIES_PAGE
+    try:
+        if page > 0:
+            pagination_row.append(InlineKeyboardButton(
+                "⬅️ Попередня",
+                callback_data=page_route.pack(entry_config_key=entry_config_key, page=page - 1, **page_filter)))
+        if layout.has_next(page):
+            pagination_row.append(InlineKeyboardButton(
+                "Наступна ➡️",
+                callback_data=page_route.pack(entry_config_key=entry_config_key, page=page + 1, **page_filter))
+            )
+    except ValueError as e_cb:
+        # Задовгий тег не вміщується в 64 байти callback_data — показуємо сторінку без навігації
+        logger.warning('Пагінацію записів пропущено: %s', e_cb)
+        pagination_row = []
     if pagination_row:
         keyboard_buttons.append(pagination_row)
     reply_markup = InlineKeyboardMarkup(keyboard_buttons) if keyboard_buttons else None
 
     try:
         if is_callback:
-            await update.callback_query.edit_message_text(message_text_final, reply_markup=reply_markup, parse_mode=ParseMode.MARKDOWN_V2)
+            await update.callback_query.edit_message_text(rendered.text, reply_markup=reply_markup, parse_mode=rendered.parse_mode)
         else:
-            await target_message_obj.reply_text(message_text_final, reply_markup=reply_markup, parse_mode=ParseMode.MARKDOWN_V2)
+            await target_message_obj.reply_text(rendered.text, reply_markup=reply_markup, parse_mode=rendered.parse_mode)
     except BadRequest as e_br:
-
-        print(f"BadRequest in show_paginated_entries: {e_br}")
+        if "not modified" in str(e_br):
+            return
+        logger.error('BadRequest in show_paginated_entries: %s', e_br)
         await target_message_obj.reply_text("Помилка форматування, спробуйте пізніше.")
     except Exception as e_gen:
-        print(f"Exception in show_paginated_entries: {e_gen}")
+        logger.error('Exception in show_paginated_entries: %s', e_gen)
         await target_message_obj.reply_text("Сталася помилка при відображенні записів.")
 
 
+async def expand_entry(update: Update, context: ContextTypes.DEFAULT_TYPE, entry_config_key: str, entry_id: int):
+    """Кнопка «розгорнути» під обрізаним записом: запис повністю, за потреби кількома повідомленнями."""
+    query = update.callback_query
+    await query.answer()
+
+    model_to_query_class = JournalEntry if entry_config_key == "journal" else MoodEntry
+    entry = await run_db(get_entry_logic, update.effective_user.id, model_to_query_class, entry_id)
+    if entry is None:
+        await query.message.reply_text("Запис не знайдено.")
+        return
+
+    type_display = _journal_type_display(entry) if entry_config_key == "journal" else None
+    for rendered in render_full_entry(entry, type_display):
+        await query.message.reply_text(rendered.text, parse_mode=rendered.parse_mode)
+
+
 async def show_journal_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     tag_filter = None
     entry_type_filter = None
@@ -264,10 +307,10 @@ async def show_journal_command(update: Update, context: ContextTypes.DEFAULT_TYP
         first_arg = context.args[0]
         if first_arg.startswith("#") and len(first_arg) > 1:
             tag_filter = first_arg[1:]
-            print(f"DEBUG: /my_journal called with tag: {tag_filter}")
+            logger.debug('/my_journal called with tag: %s', tag_filter)
         elif first_arg.lower() in ENTRY_TYPE_DISPLAY_CONFIG.get("journal", {}):
             entry_type_filter = first_arg.lower()
-            print(f"DEBUG: /my_journal called with entry_type: {entry_type_filter}")
+            logger.debug('/my_journal called with entry_type: %s', entry_type_filter)
 
     await show_paginated_entries(update, context, page=0, entry_config_key="journal",
                                  tag_filter=tag_filter, entry_type_filter=entry_type_filter)
@@ -279,51 +322,32 @@ async def show_mood_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         tag_arg = context.args[0]
         if tag_arg.startswith("#") and len(tag_arg) > 1:
             tag_filter = tag_arg[1:]
-            print(f"DEBUG: /my_moods called with tag: {tag_filter}")
+            logger.debug('/my_moods called with tag: %s', tag_filter)
 
     await show_paginated_entries(update, context, page=0, entry_config_key="mood", tag_filter=tag_filter)
 
 
-async def handle_generic_pagination(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def handle_generic_pagination(update: Update, context: ContextTypes.DEFAULT_TYPE, entry_config_key: str,
+                                    page: int, filter_type: str | None = None, filter_value: str | None = None):
     query = update.callback_query
     await query.answer()
 
-    data_parts = query.data.split(":")
-
-
-    entry_config_key = data_parts[0]
     tag_filter_cb = None
     entry_type_filter_cb = None
-    page_num_cb = 0
-
-    if entry_config_key not in ["journal", "mood"]:
-        await query.message.reply_text("Помилка: Невідомий тип для пагінації.")
-        return
+    if filter_value is not None:
+        filter_value = filter_value.replace("_", ":")
+        if filter_type == "tag":
+            tag_filter_cb = filter_value
+        elif filter_type == "type":
+            entry_type_filter_cb = filter_value
 
     try:
-        if len(data_parts) == 3 and data_parts[1] == "page":
-            page_num_cb = int(data_parts[2])
-        elif len(data_parts) == 5 and data_parts[3] == "page":
-            filter_type = data_parts[1]
-            filter_value = data_parts[2].replace("_", ":")
-            page_num_cb = int(data_parts[4])
-            if filter_type == "tag":
-                tag_filter_cb = filter_value
-            elif filter_type == "type":
-                entry_type_filter_cb = filter_value
-            print(f"DEBUG: Pagination with filter: type='{filter_type}', value='{filter_value}', page={page_num_cb}")
-        else:
-            await query.message.reply_text("Помилка: Неправильний формат даних пагінації.")
-            return
-
-        await show_paginated_entries(update, context, page=page_num_cb,
+        await show_paginated_entries(update, context, page=page,
                                      entry_config_key=entry_config_key,
                                      tag_filter=tag_filter_cb,
                                      entry_type_filter=entry_type_filter_cb)
-    except ValueError:
-        await query.message.reply_text("Помилка: Неправильний номер сторінки.")
     except Exception as e:
-        print(f"Error in handle_generic_pagination: {e}")
+        logger.error('Error in handle_generic_pagination: %s', e)
         await query.message.reply_text("Помилка обробки пагінації.")
 
 
@@ -348,7 +372,7 @@ async def prompt_for_journal_text_menu_entry(update: Update, context: ContextTyp
         await query.edit_message_text("Помилка: не вдалося визначити тип запису. Спробуйте знову.")
         return ConversationHandler.END
 
-    context.user_data['conv_journal_entry_type'] = entry_type
+    remember_state(context.user_data, 'conv_journal_entry_type', entry_type)
 
     display_name_map = ENTRY_TYPE_DISPLAY_CONFIG.get("journal", {})
     display_name = display_name_map.get(entry_type, entry_type.capitalize())
@@ -362,7 +386,7 @@ async def received_journal_text_menu_state(update: Update, context: ContextTypes
     user_id = update.effective_user.id
     text_content_with_tags = update.message.text.strip()
 
-    entry_type = context.user_data.pop('conv_journal_entry_type', None)
+    entry_type = forget_state(context.user_data, 'conv_journal_entry_type')
 
     if not entry_type:
         await update.message.reply_text("Помилка: тип запису не визначено. Спробуйте знову або /cancel.")
@@ -370,12 +394,10 @@ async def received_journal_text_menu_state(update: Update, context: ContextTypes
 
     if not text_content_with_tags:
         await update.message.reply_text("Текст запису не може бути порожнім. Спробуйте ще раз або /cancel.")
-        context.user_data['conv_journal_entry_type'] = entry_type
+        remember_state(context.user_data, 'conv_journal_entry_type', entry_type)
         return GET_JOURNAL_ENTRY_TEXT_FROM_MENU
 
-    _created_entry, message_for_user, _parsed_tags, _text_for_analysis = save_generic_entry_logic(
-        user_id, entry_type, text_content_with_tags
-    )
+    _saved, message_for_user, _parsed_tags, _text_for_analysis = await save_entry(user_id, entry_type, text_content_with_tags)
 
     await update.message.reply_text(message_for_user)
     await send_main_menu(update, context, "Повертаюся в головне меню...")
@@ -384,7 +406,7 @@ async def received_journal_text_menu_state(update: Update, context: ContextTypes
 
 async def cancel_journal_entry_conversation(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Скасовує розмову створення запису журналу."""
-    context.user_data.pop('conv_journal_entry_type', None)
+    forget_state(context.user_data, 'conv_journal_entry_type')
     await update.message.reply_text("Створення запису в журнал скасовано.")
     await send_main_menu(update, context, "Головне меню:")
     return ConversationHandler.END
@@ -420,13 +442,11 @@ async def received_mood_entry_menu_state(update: Update, context: ContextTypes.D
         await update.message.reply_text("Запис про настрій не може бути порожнім. Спробуйте ще раз або /cancel.")
         return GET_MOOD_ENTRY_FROM_MENU
 
-    created_entry, confirmation_msg, _parsed_tags, text_for_mood_analysis = save_generic_entry_logic(
-        user_id, "mood", full_content_input
-    )
+    saved, confirmation_msg, _parsed_tags, text_for_mood_analysis = await save_entry(user_id, "mood", full_content_input)
 
     await update.message.reply_text(confirmation_msg)
 
-    if created_entry and text_for_mood_analysis:
+    if saved and text_for_mood_analysis:
         normalized_text = text_for_mood_analysis.lower()
         advice_to_send = None
         mood_advice_rules = get_mood_advice_rules()
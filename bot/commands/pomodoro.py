@@ -1,13 +1,23 @@
+import logging
 from datetime import datetime, timedelta, timezone
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes
 from telegram.error import BadRequest
 
-from bot.logic.logic import update_pomodoro_session_db, create_pomodoro_session_db
+from bot.logic.logic import update_pomodoro_session_db, create_pomodoro_session_db, get_user_task_logic
 from bot.logic.menu_navigation import show_pomodoro_submenu
+from bot.logic.keyboards import get_pomodoro_keyboard, pomodoro_options_keyboard
+from bot.infra.db_executor import run_db
+from bot.infra.unit_of_work import rollback_session, close_session
+from bot.infra.db_routing import read_only
+from bot.infra.outbound import Priority
+from bot.infra import metrics
+from bot.logic.callback_data import TASK_ACTION, POMODORO_SUBMENU, POMODORO_SUBMENU_TARGET
 
 from bot.models import db, Task
 
+logger = logging.getLogger(__name__)
+
 # --- Константи ---
 WORK_DURATION_MIN = 25
 SHORT_BREAK_DURATION_MIN = 5
@@ -15,6 +25,14 @@ LONG_BREAK_DURATION_MIN = 15
 POMODOROS_BEFORE_LONG_BREAK = 4
 UPDATE_INTERVAL_SEC = 5
 
+_active_timers = metrics.gauge("pomodoro_active_timers", "Запущені таймери Pomodoro (заплановані зміни фази)")
+
+
+def track_active_timers(job_queue):
+    """Кількість активних таймерів рахується з JobQueue лише під час читання метрик."""
+    _active_timers.set_function(
+        lambda: sum(1 for job in job_queue.jobs() if job.name and job.name.startswith("pomodoro_timer_")))
+
 
 async def clear_jobs(context: ContextTypes.DEFAULT_TYPE, chat_id: int):
     """Видаляє всі активні Pomodoro jobs для чату."""
@@ -22,7 +40,7 @@ async def clear_jobs(context: ContextTypes.DEFAULT_TYPE, chat_id: int):
     update_jobs = context.job_queue.get_jobs_by_name(f"pomodoro_update_{chat_id}")
     for j in timer_jobs + update_jobs:
         j.schedule_removal()
-    print(f"Jobs cleared for {chat_id}")
+    logger.debug('Jobs cleared for %s', chat_id)
 
 
 def generate_progress_bar(current_seconds, total_seconds, length=10):
@@ -35,22 +53,6 @@ def generate_progress_bar(current_seconds, total_seconds, length=10):
     return f"[{bar}]"
 
 
-def get_pomodoro_keyboard(state, paused=False):
-    """Повертає клавіатуру відповідно до стану таймера."""
-    buttons = []
-    if state == 'idle':
-        buttons.append([InlineKeyboardButton("🚀 Розпочати (25 хв)", callback_data="pom:start_work")])
-    elif state in ['work', 'short_break', 'long_break']:
-        row = []
-        if paused:
-            row.append(InlineKeyboardButton("▶️ Відновити", callback_data="pom:resume"))
-        else:
-            row.append(InlineKeyboardButton("⏸️ Пауза", callback_data="pom:pause"))
-        row.append(InlineKeyboardButton("⏹️ Зупинити", callback_data="pom:stop"))
-        buttons.append(row)
-    return InlineKeyboardMarkup(buttons)
-
-
 async def update_timer_message(context: ContextTypes.DEFAULT_TYPE):
     """Оновлює повідомлення таймера з прогресом."""
     job_data = context.job.data
@@ -91,13 +93,14 @@ async def update_timer_message(context: ContextTypes.DEFAULT_TYPE):
             chat_id=chat_id,
             message_id=message_id,
             text=text,
-            reply_markup=get_pomodoro_keyboard(state, paused)
+            reply_markup=get_pomodoro_keyboard(state, paused),
+            rate_limit_args=Priority.TIMER_EDIT
         )
     except BadRequest as e:
         if "Message is not modified" not in str(e):
-            print(f"Error updating message {message_id} for {chat_id}: {e}")
+            logger.error('Error updating message %s for %s: %s', message_id, chat_id, e)
     except Exception as e:
-        print(f"Unexpected error updating message {message_id} for {chat_id}: {e}")
+        logger.error('Unexpected error updating message %s for %s: %s', message_id, chat_id, e)
 
 
 async def run_pomodoro_cycle(context: ContextTypes.DEFAULT_TYPE):
@@ -118,11 +121,11 @@ async def run_pomodoro_cycle(context: ContextTypes.DEFAULT_TYPE):
     notification = ""
 
     if current_state == 'work':
-        update_pomodoro_session_db(current_pomodoro_session_id, 'completed')
+        await run_db(update_pomodoro_session_db, current_pomodoro_session_id, 'completed')
         pom_data['current_session_id'] = None
         pomodoros_done += 1
         pom_data['pomodoros_done'] = pomodoros_done
-        print(f"Pomodoro: Робоча сесія завершена. pomodoros_done тепер: {pomodoros_done}")
+        logger.debug('Робоча сесія завершена. pomodoros_done тепер: %s', pomodoros_done)
         if pomodoros_done % POMODOROS_BEFORE_LONG_BREAK == 0:
             next_state = 'long_break'
             duration_min = LONG_BREAK_DURATION_MIN
@@ -139,36 +142,37 @@ async def run_pomodoro_cycle(context: ContextTypes.DEFAULT_TYPE):
 
     elif current_state == 'long_break':
         await context.bot.send_message(chat_id=chat_id,
-                                       text="🧘 Довга перерва завершена. Повна послідовність Pomodoro закінчена! Гарна робота! 👍")
+                                       text="🧘 Довга перерва завершена. Повна послідовність Pomodoro закінчена! Гарна робота! 👍",
+                                       rate_limit_args=Priority.PHASE)
         if linked_task_id:
             try:
-                task_for_prompt = db.session.query(Task).filter_by(id=linked_task_id, user_id=user_id).first()
+                task_for_prompt = await run_db(get_user_task_logic, user_id, linked_task_id)
                 if task_for_prompt and not task_for_prompt.completed:
                     keyboard_prompt = [[
                         InlineKeyboardButton("✅ Так, позначити виконаним",
-                                             callback_data=f"task:done_pom_end:{linked_task_id}"),
+                                             callback_data=TASK_ACTION.pack(action="done_pom_end", target=linked_task_id)),
                         InlineKeyboardButton("❌ Ні, залишити активним",
-                                             callback_data=f"task:skip_done_pom:{linked_task_id}")
+                                             callback_data=TASK_ACTION.pack(action="skip_done_pom", target=linked_task_id))
                     ]]
                     reply_markup_prompt = InlineKeyboardMarkup(keyboard_prompt)
                     await context.bot.send_message(
                         chat_id=chat_id,
                         text=f"Ви працювали над завданням: «{task_for_prompt.description}».\nБажаєте позначити його як виконане?",
-                        reply_markup=reply_markup_prompt
+                        reply_markup=reply_markup_prompt,
+                        rate_limit_args=Priority.PHASE
                     )
             except Exception as e:
-                print(f"Помилка при спробі запропонувати виконати завдання: {e}")
-            finally:
-                db.session.close()
+                logger.error('Помилка при спробі запропонувати виконати завдання: %s', e)
         if message_id:
             try:
                 await context.bot.edit_message_text(chat_id=chat_id, message_id=message_id,
-                                                    text="🍅 Послідовність Pomodoro завершено!", reply_markup=None)
+                                                    text="🍅 Послідовність Pomodoro завершено!", reply_markup=None,
+                                                    rate_limit_args=Priority.PHASE)
             except Exception as e:
-                print(f"Не вдалося відредагувати фінальне повідомлення Pomodoro: {e}")
+                logger.error('Не вдалося відредагувати фінальне повідомлення Pomodoro: %s', e)
         pom_data.clear()
         pom_data['state'] = 'idle'
-        print(f"Pomodoro: Повна послідовність для user {user_id} завершена. Стан скинуто.")
+        logger.debug('Повна послідовність для user %s завершена. Стан скинуто.', user_id)
         return
 
     elif current_state == 'idle':
@@ -179,9 +183,10 @@ async def run_pomodoro_cycle(context: ContextTypes.DEFAULT_TYPE):
 
     else:
         await context.bot.send_message(chat_id=chat_id,
-                                       text="❌ Виникла невідома помилка стану таймера, таймер зупинено.")
+                                       text="❌ Виникла невідома помилка стану таймера, таймер зупинено.",
+                                       rate_limit_args=Priority.PHASE)
         if current_pomodoro_session_id:
-            update_pomodoro_session_db(current_pomodoro_session_id, 'stopped')
+            await run_db(update_pomodoro_session_db, current_pomodoro_session_id, 'stopped')
         pom_data.clear()
         pom_data['state'] = 'idle'
         return
@@ -189,7 +194,8 @@ async def run_pomodoro_cycle(context: ContextTypes.DEFAULT_TYPE):
     duration = timedelta(minutes=duration_min)
 
     if next_state == 'work':
-        pom_data['current_session_id'] = create_pomodoro_session_db(
+        pom_data['current_session_id'] = await run_db(
+            create_pomodoro_session_db,
             user_id,
             duration_min,
             'work',
@@ -203,20 +209,18 @@ async def run_pomodoro_cycle(context: ContextTypes.DEFAULT_TYPE):
     pom_data['paused_time'] = None
     pom_data['remaining_on_pause'] = None
 
-    await context.bot.send_message(chat_id=chat_id, text=notification)
+    await context.bot.send_message(chat_id=chat_id, text=notification, rate_limit_args=Priority.PHASE)
     progress_text = ""
     current_pomodoros_display = pom_data.get('pomodoros_done', 0)
     if next_state == 'work':
         progress_text = f"💪 Працюємо ({current_pomodoros_display + 1}/{POMODOROS_BEFORE_LONG_BREAK})"
         if linked_task_id:
             try:
-                task_desc_q = db.session.query(Task.description).filter_by(id=linked_task_id, user_id=user_id).scalar()
-                if task_desc_q:
-                    progress_text += f" (завдання: «{task_desc_q}»)"
+                linked_task = await run_db(get_user_task_logic, user_id, linked_task_id)
+                if linked_task:
+                    progress_text += f" (завдання: «{linked_task.description}»)"
             except Exception as e_td:
-                print(f"Не вдалося отримати опис завдання {linked_task_id} для таймера: {e_td}")
-            finally:
-                db.session.close()
+                logger.error('Не вдалося отримати опис завдання %s для таймера: %s', linked_task_id, e_td)
     elif next_state == 'short_break':
         progress_text = "☕️ Коротка перерва"
     elif next_state == 'long_break':
@@ -230,15 +234,18 @@ async def run_pomodoro_cycle(context: ContextTypes.DEFAULT_TYPE):
     try:
         if message_id_to_edit:
             await context.bot.edit_message_text(chat_id=chat_id, message_id=message_id_to_edit, text=text_msg_pom,
-                                                reply_markup=get_pomodoro_keyboard(next_state))
+                                                reply_markup=get_pomodoro_keyboard(next_state),
+                                                rate_limit_args=Priority.PHASE)
         else:
             message_obj = await context.bot.send_message(chat_id=chat_id, text=text_msg_pom,
-                                                         reply_markup=get_pomodoro_keyboard(next_state))
+                                                         reply_markup=get_pomodoro_keyboard(next_state),
+                                                         rate_limit_args=Priority.PHASE)
             pom_data['message_id'] = message_obj.message_id
     except Exception as e:
-        print(f"Error sending/editing message in run_pomodoro_cycle: {e}")
+        logger.error('Error sending/editing message in run_pomodoro_cycle: %s', e)
         message_obj = await context.bot.send_message(chat_id=chat_id, text=text_msg_pom,
-                                                     reply_markup=get_pomodoro_keyboard(next_state))
+                                                     reply_markup=get_pomodoro_keyboard(next_state),
+                                                     rate_limit_args=Priority.PHASE)
         pom_data['message_id'] = message_obj.message_id
 
     job_payload = {'chat_id': chat_id}
@@ -246,9 +253,8 @@ async def run_pomodoro_cycle(context: ContextTypes.DEFAULT_TYPE):
                                name=f"pomodoro_timer_{chat_id}", data=job_payload)
     context.job_queue.run_repeating(update_timer_message, interval=UPDATE_INTERVAL_SEC, first=0, chat_id=chat_id,
                                     user_id=user_id, name=f"pomodoro_update_{chat_id}", data=job_payload)
-    print(
-        f"Scheduled jobs for {chat_id} (user {user_id}): timer in {duration.total_seconds()}s, update every {UPDATE_INTERVAL_SEC}s. "
-        f"Current pomodoros_done: {pom_data.get('pomodoros_done', 0)}")
+    logger.debug('Scheduled jobs for %s (user %s): timer in %ss, update every %ss. Current pomodoros_done: %s',
+                 chat_id, user_id, duration.total_seconds(), UPDATE_INTERVAL_SEC, pom_data.get('pomodoros_done', 0))
 
 
 async def _initiate_pomodoro_sequence(update: Update, context: ContextTypes.DEFAULT_TYPE, chat_id: int, user_id: int,
@@ -286,7 +292,7 @@ async def _initiate_pomodoro_sequence(update: Update, context: ContextTypes.DEFA
             )
             pom_data['message_id'] = source_message_id
         except Exception as e:
-            print(f"Помилка редагування повідомлення для старту Pomodoro: {e}")
+            logger.error('Помилка редагування повідомлення для старту Pomodoro: %s', e)
             message_obj = await context.bot.send_message(chat_id=chat_id, text=start_message_text,
                                                          reply_markup=get_pomodoro_keyboard('idle'))
             pom_data['message_id'] = message_obj.message_id
@@ -294,10 +300,11 @@ async def _initiate_pomodoro_sequence(update: Update, context: ContextTypes.DEFA
         message_obj = await update.message.reply_text(start_message_text, reply_markup=get_pomodoro_keyboard('idle'))
         pom_data['message_id'] = message_obj.message_id
     else:
-        print("Не вдалося надіслати стартове повідомлення Pomodoro")
+        logger.error('Не вдалося надіслати стартове повідомлення Pomodoro')
         return
 
 
+@read_only
 def get_tasks_for_linking_pomodoro(user_id: int, page: int = 0, page_size: int = 5) -> tuple[list[Task], int, int]:
     """Отримує сторінку активних завдань для прив'язки до Pomodoro."""
     session = db.session
@@ -313,11 +320,11 @@ def get_tasks_for_linking_pomodoro(user_id: int, page: int = 0, page_size: int =
             num_pages = 1
         return tasks_on_page, total_tasks, num_pages
     except Exception as e:
-        print(f"Помилка отримання завдань для Pomodoro: {e}")
-        session.rollback()
+        logger.error('Помилка отримання завдань для Pomodoro: %s', e)
+        rollback_session(session)
         return [], 0, 0
     finally:
-        session.close()
+        close_session(session)
 
 
 async def display_tasks_for_pomodoro_linking(update: Update, context: ContextTypes.DEFAULT_TYPE, page: int = 0):
@@ -325,7 +332,7 @@ async def display_tasks_for_pomodoro_linking(update: Update, context: ContextTyp
     query = update.callback_query
     user_id = query.from_user.id
 
-    tasks_on_page, total_tasks, num_pages = get_tasks_for_linking_pomodoro(user_id, page)
+    tasks_on_page, total_tasks, num_pages = await run_db(get_tasks_for_linking_pomodoro, user_id, page)
 
     if not tasks_on_page and page == 0:
         await query.edit_message_text("У вас немає активних завдань для прив'язки Pomodoro.")
@@ -340,33 +347,34 @@ async def display_tasks_for_pomodoro_linking(update: Update, context: ContextTyp
         desc_short = task.description[:30] + "..." if len(task.description) > 30 else task.description
         keyboard.append([
             InlineKeyboardButton(f"🍅 {task.id}. {desc_short}",
-                                 callback_data=f"pomodoro_submenu:start_with_task:{task.id}")
+                                 callback_data=POMODORO_SUBMENU_TARGET.pack(action="start_with_task", target=task.id))
         ])
 
     pagination_row = []
     if page > 0:
-        pagination_row.append(InlineKeyboardButton("⬅️ Назад", callback_data=f"pomodoro_submenu:link_page:{page - 1}"))
+        pagination_row.append(InlineKeyboardButton(
+            "⬅️ Назад", callback_data=POMODORO_SUBMENU_TARGET.pack(action="link_page", target=page - 1)))
     if (page + 1) * 5 < total_tasks:
-        pagination_row.append(InlineKeyboardButton("Вперед ➡️", callback_data=f"pomodoro_submenu:link_page:{page + 1}"))
+        pagination_row.append(InlineKeyboardButton(
+            "Вперед ➡️", callback_data=POMODORO_SUBMENU_TARGET.pack(action="link_page", target=page + 1)))
 
     if pagination_row:
         keyboard.append(pagination_row)
 
-    keyboard.append([InlineKeyboardButton("↩️ Назад до опцій Pomodoro", callback_data="pomodoro_submenu:show_options")])
+    keyboard.append([InlineKeyboardButton("↩️ Назад до опцій Pomodoro",
+                                          callback_data=POMODORO_SUBMENU.pack(action="show_options"))])
 
     reply_markup = InlineKeyboardMarkup(keyboard)
     await query.edit_message_text(message_text, reply_markup=reply_markup)
 
 
-async def handle_pomodoro_submenu_action(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def handle_pomodoro_submenu_action(update: Update, context: ContextTypes.DEFAULT_TYPE, action: str,
+                                         target: int | None = None):
     query = update.callback_query
     await query.answer()
     user_id = query.from_user.id
     chat_id = query.message.chat_id
 
-    action_parts = query.data.split(":")
-    action = action_parts[1]
-
     if action == "start_any":
         await _initiate_pomodoro_sequence(update, context, chat_id, user_id, source_message_id=query.message.message_id,
                                           is_callback=True)
@@ -375,20 +383,14 @@ async def handle_pomodoro_submenu_action(update: Update, context: ContextTypes.D
         await display_tasks_for_pomodoro_linking(update, context, page=0)
 
     elif action == "link_page":
-        page_num = int(action_parts[2])
-        await display_tasks_for_pomodoro_linking(update, context, page=page_num)
+        await display_tasks_for_pomodoro_linking(update, context, page=target or 0)
 
     elif action == "start_with_task":
-        task_id_to_link = int(action_parts[2])
+        task_id_to_link = target
         task_description = "невідоме завдання"
-        try:
-            task_obj = db.session.query(Task).filter_by(id=task_id_to_link, user_id=user_id).first()
-            if task_obj:
-                task_description = task_obj.description
-        except Exception as e:
-            print(f"Помилка отримання опису завдання {task_id_to_link} для Pomodoro: {e}")
-        finally:
-            db.session.close()
+        task_obj = await run_db(get_user_task_logic, user_id, task_id_to_link)
+        if task_obj:
+            task_description = task_obj.description
 
         await _initiate_pomodoro_sequence(update, context, chat_id, user_id,
                                           linked_task_id=task_id_to_link,
@@ -396,19 +398,7 @@ async def handle_pomodoro_submenu_action(update: Update, context: ContextTypes.D
                                           source_message_id=query.message.message_id,
                                           is_callback=True)
     elif action == "show_options":
-        from bot.logic.menu_navigation import show_pomodoro_submenu as show_pom_submenu_nav
-        await query.edit_message_text(
-            text="Налаштування Pomodoro:",
-            reply_markup=show_pom_submenu_nav(None, None).reply_markup
-        )
-
-        pom_keyboard_layout = [
-            [InlineKeyboardButton("🚀 Запустити Pomodoro (без прив'язки)", callback_data="pomodoro_submenu:start_any")],
-            [InlineKeyboardButton("🔗 Запустити для завдання...",
-                                  callback_data="pomodoro_submenu:start_linked_select_task")]
-        ]
-        reply_markup_pom = InlineKeyboardMarkup(pom_keyboard_layout)
-        await query.edit_message_text("Налаштування Pomodoro:", reply_markup=reply_markup_pom)
+        await query.edit_message_text("Налаштування Pomodoro:", reply_markup=pomodoro_options_keyboard())
     else:
         await query.edit_message_text("Невідома дія для Pomodoro меню.")
 
@@ -422,7 +412,7 @@ async def start_pomodoro_command(update: Update, context: ContextTypes.DEFAULT_T
     if context.args:
         try:
             task_id_arg = int(context.args[0])
-            task_to_link = db.session.query(Task).filter_by(id=task_id_arg, user_id=user_id, completed=False).first()
+            task_to_link = await run_db(get_user_task_logic, user_id, task_id_arg, only_active=True)
             if task_to_link:
                 linked_task_id_arg = task_to_link.id
                 linked_task_description_arg = task_to_link.description
@@ -431,14 +421,12 @@ async def start_pomodoro_command(update: Update, context: ContextTypes.DEFAULT_T
                     f"⚠️ Завдання з ID {task_id_arg} не знайдено/виконане. Pomodoro без прив'язки.")
         except (ValueError, IndexError):
             await update.message.reply_text("⚠️ Невірний ID завдання. Pomodoro без прив'язки.")
-        finally:
-            db.session.close()
 
     await _initiate_pomodoro_sequence(update, context, chat_id, user_id, linked_task_id_arg,
                                       linked_task_description_arg)
 
 
-async def handle_pomodoro_button(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def handle_pomodoro_button(update: Update, context: ContextTypes.DEFAULT_TYPE, action: str):
     query = update.callback_query
     await query.answer()
     chat_id = query.message.chat_id
@@ -448,7 +436,6 @@ async def handle_pomodoro_button(update: Update, context: ContextTypes.DEFAULT_T
         await query.edit_message_text("❌ Помилка: Не знайдено даних таймера. Спробуйте /pomodoro знову.")
         return
 
-    action = query.data.split(":")[1]
     state = pom_data.get('state')
     job_payload = {'chat_id': chat_id}
 
@@ -497,7 +484,7 @@ async def handle_pomodoro_button(update: Update, context: ContextTypes.DEFAULT_T
                                            name=f"pomodoro_timer_{chat_id}", data=job_payload)
     elif action == "stop":
         if state == 'work':
-            update_pomodoro_session_db(pom_data.get('current_session_id'), 'stopped')
+            await run_db(update_pomodoro_session_db, pom_data.get('current_session_id'), 'stopped')
 
         await clear_jobs(context, chat_id)
         pom_data.clear()
@@ -524,7 +511,7 @@ async def handle_menu_button_pomodoro(update: Update, context: ContextTypes.DEFA
                 num_pages = 1
             return tasks_on_page, total_tasks, num_pages
         except Exception as e:
-            print(f"Помилка отримання завдань для Pomodoro: {e}")
+            logger.error('Помилка отримання завдань для Pomodoro: %s', e)
             session.rollback()
             return [], 0, 0
         finally:
@@ -550,22 +537,23 @@ async def handle_menu_button_pomodoro(update: Update, context: ContextTypes.DEFA
             desc_short = task.description[:30] + "..." if len(task.description) > 30 else task.description
             keyboard.append([
                 InlineKeyboardButton(f"🍅 {task.id}. {desc_short}",
-                                     callback_data=f"pomodoro_submenu:start_with_task:{task.id}")
+                                     callback_data=POMODORO_SUBMENU_TARGET.pack(action="start_with_task", target=task.id))
             ])
 
         pagination_row = []
         if page > 0:
             pagination_row.append(
-                InlineKeyboardButton("⬅️ Назад", callback_data=f"pomodoro_submenu:link_page:{page - 1}"))
+                InlineKeyboardButton("⬅️ Назад", callback_data=POMODORO_SUBMENU_TARGET.pack(action="link_page", target=page - 1)))
         if (page + 1) * 5 < total_tasks:  # Припускаємо page_size = 5
             pagination_row.append(
-                InlineKeyboardButton("Вперед ➡️", callback_data=f"pomodoro_submenu:link_page:{page + 1}"))
+                InlineKeyboardButton("Вперед ➡️",
+                                     callback_data=POMODORO_SUBMENU_TARGET.pack(action="link_page", target=page + 1)))
 
         if pagination_row:
             keyboard.append(pagination_row)
 
         keyboard.append(
-            [InlineKeyboardButton("↩️ Назад до опцій Pomodoro", callback_data="pomodoro_submenu:show_options")])
+            [InlineKeyboardButton("↩️ Назад до опцій Pomodoro", callback_data=POMODORO_SUBMENU.pack(action="show_options"))])
 
         reply_markup = InlineKeyboardMarkup(keyboard)
         await query.edit_message_text(message_text, reply_markup=reply_markup)
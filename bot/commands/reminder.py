@@ -1,16 +1,40 @@
+import logging
 from datetime import datetime, timedelta
-from telegram import Bot, ReplyKeyboardMarkup, InlineKeyboardMarkup, InlineKeyboardButton
-from telegram.request import HTTPXRequest
-from config import BOT_TOKEN
+from telegram import ReplyKeyboardMarkup
+from telegram.ext import ExtBot
 from bot.models import db, Task
+from bot.infra.db_executor import run_db
+from bot.logic.logic import mark_reminder_sent_logic, mark_follow_up_sent_logic
+from bot.logic.keyboards import reminder_keyboard
+from bot.infra.outbound import Priority
+from bot.infra import metrics
 import asyncio
 
-bot = Bot(token=BOT_TOKEN, request=HTTPXRequest(connection_pool_size=10))
-reminder_loop = asyncio.new_event_loop()
-asyncio.set_event_loop(reminder_loop)
-queue = asyncio.Queue()
+logger = logging.getLogger(__name__)
+
+# Створюються в init_reminder_system(): імпорт модуля не відкриває з'єднань і не змінює цикл подій
+bot: ExtBot | None = None
+reminder_loop: asyncio.AbstractEventLoop | None = None
+queue: asyncio.Queue | None = None
 active_tasks = set()
 
+_queue_size = metrics.gauge("reminder_queue_size", "Нагадування в черзі на відправку")
+
+
+def init_reminder_system(application_bot: ExtBot) -> asyncio.AbstractEventLoop:
+    """
+    Готує систему нагадувань: цикл подій (він же цикл бота) і черга відправки.
+    Нагадування надсилає бот Application — той самий HTTP-клієнт і спільний планувальник
+    вихідних запитів (outbound) із пріоритетом нижчим за відповіді.
+    """
+    global bot, reminder_loop, queue
+    bot = application_bot
+    reminder_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(reminder_loop)
+    queue = asyncio.Queue()
+    _queue_size.set_function(queue.qsize)
+    return reminder_loop
+
 
 async def worker():
 
@@ -28,26 +52,21 @@ async def worker():
                 await send_follow_up(task)
 
         except Exception as e:
-            print(f"Помилка обробки завдання {task.id}: {e}")
+            logger.error('Помилка обробки завдання %s: %s', task.id, e)
         finally:
             queue.task_done()
 
 
 async def send_first_reminder(task):
-    keyboard = InlineKeyboardMarkup([
-        [
-            InlineKeyboardButton("✅ Виконано", callback_data=f"done:{task.id}"),
-            InlineKeyboardButton("⏱ Перенести", callback_data=f"delay:{task.id}")
-        ]
-    ])
     await bot.send_message(
         chat_id=task.user_id,
         text=f"⏰❓ Ви виконали '{task.description}'?",
-        reply_markup=keyboard
+        reply_markup=reminder_keyboard(task.id),
+        rate_limit_args=Priority.REMINDER
     )
     task.reminder_sent = True
     task.follow_up_time = datetime.utcnow() + timedelta(hours=3)
-    db.session.commit()
+    await run_db(mark_reminder_sent_logic, task.id, task.follow_up_time)
 
 
 async def send_follow_up(task):
@@ -57,17 +76,18 @@ async def send_follow_up(task):
         text=f"❓ Ви виконали '{task.description}'?",
         reply_markup=ReplyKeyboardMarkup([
             ["✅ Так, видалити", "⏱ Перенести на 1 год", "🔄 Перенести на 3 год"]
-        ], one_time_keyboard=True)
+        ], one_time_keyboard=True),
+        rate_limit_args=Priority.REMINDER
     )
     task.follow_up_sent = True
-    db.session.commit()
+    await run_db(mark_follow_up_sent_logic, task.id)
 
 
 def check_reminders():
     """Пошук та додавання нагадувань у чергу"""
     try:
         now = datetime.now()
-        print(f"Перевірка нагадувань о {now}")
+        logger.debug('Перевірка нагадувань о %s', now)
 
         first_reminders = db.session.query(Task).filter(
             Task.remind_at <= now,
@@ -79,14 +99,14 @@ def check_reminders():
             Task.follow_up_sent.is_(False),
             Task.reminder_sent.is_(True)
         ).all()
-        print(f"Знайдено {len(first_reminders)} перших та {len(follow_ups)} повторних нагадувань")
+        logger.debug('Знайдено %s перших та %s повторних нагадувань', len(first_reminders), len(follow_ups))
 
         for task in first_reminders + follow_ups:
             asyncio.run_coroutine_threadsafe(queue.put(task), reminder_loop)
 
-        print(f"Додано до черги: {len(first_reminders)} перших та {len(follow_ups)} повторних нагадувань")
+        logger.debug('Додано до черги: %s перших та %s повторних нагадувань', len(first_reminders), len(follow_ups))
 
     except Exception as e:
-        print(f"Помилка пошуку нагадувань: {e}")
+        logger.error('Помилка пошуку нагадувань: %s', e)
     finally:
         db.session.close()
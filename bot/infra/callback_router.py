@@ -0,0 +1,197 @@
+import re
+
+from telegram import Update
+from telegram.ext import BaseHandler
+
+# Версія формату callback_data; дані без префікса версії — кнопки, надіслані до його появи
+CALLBACK_DATA_VERSION = "1"
+# Обмеження Telegram на callback_data, байт
+MAX_CALLBACK_DATA_BYTES = 64
+
+_BASE36_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+# Сегменти шаблону через ':'; двокрапка всередині {name:int} сегмент не розділяє
+_TEMPLATE_SEGMENT = re.compile(r"\{[^}]*\}|[^:]+")
+
+
+def _to_base36(value: int) -> str:
+    if value < 0:
+        return "-" + _to_base36(-value)
+    digits = []
+    while True:
+        value, remainder = divmod(value, 36)
+        digits.append(_BASE36_DIGITS[remainder])
+        if not value:
+            return "".join(reversed(digits))
+
+
+class _Param:
+    """Параметр шаблону: {name} (рядок), {name:int} або {name:a|b} (один із варіантів)."""
+    __slots__ = ("name", "kind", "choices")
+
+    def __init__(self, spec: str):
+        name, _, kind = spec.partition(":")
+        self.name = name
+        self.kind = kind or "str"
+        self.choices = frozenset(kind.split("|")) if "|" in kind else None
+
+    def parse(self, segment: str, versioned: bool):
+        if self.kind == "int":
+            try:
+                return int(segment, 36 if versioned else 10)
+            except ValueError:
+                return None
+        if self.choices is not None and segment not in self.choices:
+            return None
+        return segment or None
+
+    def encode(self, value) -> str:
+        if self.kind == "int":
+            return _to_base36(int(value))
+        value = str(value)
+        if ":" in value or (self.choices is not None and value not in self.choices):
+            raise ValueError(f"Неприпустиме значення параметра {self.name}: {value!r}")
+        return value
+
+
+class CallbackRoute:
+    """
+    Формат callback_data кнопки: сегменти через ':'.
+    Літерал 'task|t' приймається в обох написаннях, у нові кнопки пишеться останнє (коротке);
+    параметри — {name}, {name:int}, {name:a|b}.
+    """
+
+    def __init__(self, template: str):
+        self.template = template
+        self.segments: list[tuple[str, ...] | _Param] = [
+            _Param(segment[1:-1]) if segment.startswith("{") else tuple(segment.split("|"))
+            for segment in _TEMPLATE_SEGMENT.findall(template)
+        ]
+
+    def pack(self, **params) -> str:
+        """callback_data у поточній версії формату (ціле — base36); ValueError, якщо понад 64 байти."""
+        parts = [CALLBACK_DATA_VERSION]
+        for segment in self.segments:
+            parts.append(segment.encode(params[segment.name]) if isinstance(segment, _Param) else segment[-1])
+        data = ":".join(parts)
+        if len(data.encode()) > MAX_CALLBACK_DATA_BYTES:
+            raise ValueError(f"callback_data довша за {MAX_CALLBACK_DATA_BYTES} байт: {data!r}")
+        return data
+
+    def packer(self, **fixed):
+        """
+        Функція value -> callback_data для маршруту, останній сегмент якого — {name:int}, а решта
+        параметрів задана в fixed. Префікс серіалізується один раз; на кнопку лишається base36 числа.
+        """
+        *head, last = self.segments
+        if not isinstance(last, _Param) or last.kind != "int":
+            raise ValueError(f"Останній сегмент {self.template} має бути цілим параметром")
+        parts = [CALLBACK_DATA_VERSION]
+        for segment in head:
+            parts.append(segment.encode(fixed[segment.name]) if isinstance(segment, _Param) else segment[-1])
+        prefix = ":".join(parts) + ":"
+        room = MAX_CALLBACK_DATA_BYTES - len(prefix.encode())
+        if room <= 0:
+            raise ValueError(f"callback_data довша за {MAX_CALLBACK_DATA_BYTES} байт: {prefix!r}")
+
+        def pack(value: int) -> str:
+            digits = _to_base36(int(value))
+            if len(digits) > room:
+                raise ValueError(f"callback_data довша за {MAX_CALLBACK_DATA_BYTES} байт: {prefix + digits!r}")
+            return prefix + digits
+
+        return pack
+
+    def __repr__(self):
+        return f"<CallbackRoute {self.template}>"
+
+
+class _Node:
+    __slots__ = ("literals", "params", "route")
+
+    def __init__(self):
+        self.literals: dict[str, _Node] = {}
+        self.params: list[tuple[_Param, _Node]] = []
+        self.route: CallbackRoute | None = None
+
+
+class CallbackRouter(BaseHandler):
+    """
+    Один обробник для всіх callback-запитів поза розмовами: префіксне дерево за сегментами
+    callback_data замість послідовної перевірки regex-шаблонів. Колбек маршруту отримує
+    розібрані параметри іменованими аргументами: callback(update, context, **params).
+    """
+
+    def __init__(self, block: bool = True):
+        super().__init__(self._dispatch, block=block)
+        self._root = _Node()
+        self.callbacks: dict[CallbackRoute, object] = {}
+
+    def add(self, route: CallbackRoute, callback):
+        node = self._root
+        for segment in route.segments:
+            if isinstance(segment, _Param):
+                for param, child in node.params:
+                    if param.name == segment.name and param.kind == segment.kind:
+                        node = child
+                        break
+                else:
+                    child = _Node()
+                    node.params.append((segment, child))
+                    node = child
+                continue
+            child = node.literals.get(segment[0]) or _Node()
+            for literal in segment:
+                node.literals[literal] = child
+            node = child
+        if node.route is not None:
+            raise ValueError(f"Маршрут {route.template} перетинається з {node.route.template}")
+        node.route = route
+        self.callbacks[route] = callback
+
+    def resolve(self, data: str) -> tuple[CallbackRoute, dict] | None:
+        segments = data.split(":")
+        versioned = segments[0] == CALLBACK_DATA_VERSION
+        if versioned:
+            segments = segments[1:]
+        params: dict = {}
+        route = self._match(self._root, segments, 0, versioned, params)
+        return (route, params) if route is not None else None
+
+    def _match(self, node: _Node, segments: list[str], index: int, versioned: bool, params: dict):
+        if index == len(segments):
+            return node.route
+        segment = segments[index]
+        child = node.literals.get(segment)
+        if child is not None:
+            route = self._match(child, segments, index + 1, versioned, params)
+            if route is not None:
+                return route
+        for param, child in node.params:
+            value = param.parse(segment, versioned)
+            if value is None:
+                continue
+            route = self._match(child, segments, index + 1, versioned, params)
+            if route is not None:
+                params[param.name] = value
+                return route
+        return None
+
+    def check_update(self, update: object) -> tuple[CallbackRoute, dict] | None:
+        if not isinstance(update, Update) or update.callback_query is None:
+            return None
+        data = update.callback_query.data
+        if not isinstance(data, str):
+            return None
+        return self.resolve(data)
+
+    async def handle_update(self, update, application, check_result, context):
+        self.collect_additional_context(context, update, application, check_result)
+        route, params = check_result
+        return await self.callbacks[route](update, context, **params)
+
+    async def _dispatch(self, update: Update, context):
+        check_result = self.check_update(update)
+        if check_result is None:
+            return None
+        route, params = check_result
+        return await self.callbacks[route](update, context, **params)
@@ -0,0 +1,79 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+
+from flask import current_app
+
+from config import DB_EXECUTOR_WORKERS
+
+_executor: ThreadPoolExecutor | None = None
+
+# Спільний контекст застосунку (а отже, й scoped-сесія) для всіх викликів run_db
+# в межах однієї одиниці роботи; lock не дає двом потокам працювати з сесією одночасно,
+# end_call(succeeded) завершує транзакцію в тому ж потоці після кожного виклику.
+_shared_scope: contextvars.ContextVar[tuple | None] = contextvars.ContextVar("db_shared_scope", default=None)
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """Повертає (створюючи за потреби) обмежений пул потоків для роботи з БД."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="db")
+    return _executor
+
+
+def shutdown_db_executor(wait: bool = True):
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=wait)
+        _executor = None
+
+
+@contextmanager
+def shared_db_scope(app_context, end_call=None):
+    """
+    Усі виклики run_db всередині блоку виконуються в переданому контексті застосунку.
+    Контекст має бути вже активований викликачем: тоді вкладені push/pop у потоках пулу
+    не запускають teardown, і сесія живе до виходу викликача з контексту.
+    end_call(succeeded) викликається в потоці пулу після кожної функції (див. unit_of_work).
+    """
+    token = _shared_scope.set((app_context, asyncio.Lock(), end_call))
+    try:
+        yield
+    finally:
+        _shared_scope.reset(token)
+
+
+def _call_in_app_context(app_context, fn, args, kwargs, end_call=None):
+    # Новий контекст застосунку = окрема scoped-сесія Flask-SQLAlchemy для цього виклику;
+    # при виході з контексту сесія прибирається teardown-обробником.
+    with app_context:
+        if end_call is None:
+            return fn(*args, **kwargs)
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException:
+            end_call(False)
+            raise
+        end_call(True)
+        return result
+
+
+async def run_db(fn, *args, **kwargs):
+    """
+    Виконує синхронну функцію роботи з БД у пулі потоків, не блокуючи цикл подій PTB.
+    Контекстні змінні поточного обробника копіюються у потік виконання.
+    """
+    loop = asyncio.get_running_loop()
+    shared = _shared_scope.get()
+    if shared is None:
+        app_context = current_app._get_current_object().app_context()
+        call = partial(contextvars.copy_context().run, _call_in_app_context, app_context, fn, args, kwargs)
+        return await loop.run_in_executor(get_db_executor(), call)
+
+    app_context, lock, end_call = shared
+    async with lock:
+        call = partial(contextvars.copy_context().run, _call_in_app_context, app_context, fn, args, kwargs, end_call)
+        return await loop.run_in_executor(get_db_executor(), call)
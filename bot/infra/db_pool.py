@@ -0,0 +1,86 @@
+import time
+import weakref
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from bot.infra import metrics
+from config import (
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT_SEC, DB_POOL_RECYCLE_SEC,
+    DB_POOL_PRE_PING, DB_STATEMENT_TIMEOUT_MS,
+)
+
+_checkout_wait = metrics.histogram(
+    "db_pool_checkout_wait_seconds", "Очікування вільного з'єднання в пулі", ("pool",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0))
+_checkout_timeouts = metrics.counter(
+    "db_pool_checkout_timeouts_total", "Видачі з'єднання, що завершились тайм-аутом пулу", ("pool",))
+
+_pools: "weakref.WeakSet[InstrumentedQueuePool]" = weakref.WeakSet()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool, що вимірює час очікування з'єднання; ім'я для метрик береться з pool_logging_name."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        _pools.add(self)
+
+    @property
+    def metrics_name(self) -> str:
+        return self.logging_name or "primary"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            _checkout_timeouts.inc(pool=self.metrics_name)
+            raise
+        finally:
+            _checkout_wait.observe(time.perf_counter() - started, pool=self.metrics_name)
+
+
+class _PoolStateMetric(metrics._Metric):
+    """Поточний стан пулів, обчислюється під час читання метрик."""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, read):
+        super().__init__(name, documentation, ("pool",))
+        self._read = read
+
+    def samples(self) -> list[tuple[str, dict, float]]:
+        return [(self.name, {"pool": pool.metrics_name}, float(self._read(pool))) for pool in list(_pools)]
+
+
+metrics.register(_PoolStateMetric("db_pool_checked_out", "З'єднання, видані з пулу зараз", QueuePool.checkedout))
+metrics.register(_PoolStateMetric("db_pool_idle", "Вільні з'єднання в пулі", QueuePool.checkedin))
+metrics.register(_PoolStateMetric("db_pool_overflow", "З'єднання понад pool_size (від'ємне — ще не відкриті)", QueuePool.overflow))
+metrics.register(_PoolStateMetric("db_pool_size", "Налаштований розмір пулу", QueuePool.size))
+
+
+def _is_sqlite_memory(database_url: str) -> bool:
+    return database_url.startswith("sqlite") and (database_url in ("sqlite://", "sqlite:///") or ":memory:" in database_url)
+
+
+def engine_options(database_url: str | None, pool_name: str = "primary") -> dict:
+    """
+    Опції create_engine для SQLALCHEMY_ENGINE_OPTIONS.
+    pre_ping перевіряє з'єднання перед видачею, тож після перезапуску PostgreSQL
+    обробники отримують нове з'єднання замість «мертвого».
+    """
+    if not database_url or _is_sqlite_memory(database_url):
+        return {}
+
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_logging_name": pool_name,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT_SEC,
+        "pool_recycle": DB_POOL_RECYCLE_SEC,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if database_url.startswith("postgres") and DB_STATEMENT_TIMEOUT_MS > 0:
+        options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return options
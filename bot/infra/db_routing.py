@@ -0,0 +1,128 @@
+import contextvars
+import functools
+import inspect
+import threading
+import time
+
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+from bot.infra import metrics
+from config import REPLICA_STICKINESS_SEC
+
+REPLICA_BIND_KEY = "replica"
+
+_NOT_READ_ONLY = object()
+# user_id (або None) поточного read-only виклику; _NOT_READ_ONLY — звичайний режим
+_read_only_user: contextvars.ContextVar = contextvars.ContextVar("db_read_only_user", default=_NOT_READ_ONLY)
+
+_routed_total = metrics.counter(
+    "db_routed_queries_total", "SELECT-запити read-only шляхів за цільовою базою", ("target", "reason"))
+
+
+class _Stickiness:
+    """Після запису читання користувача ще REPLICA_STICKINESS_SEC секунд ідуть на primary (read-your-writes)."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self._until: dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, user_ids):
+        deadline = time.monotonic() + self.seconds
+        with self._lock:
+            for user_id in user_ids:
+                self._until[user_id] = deadline
+            if len(self._until) > 10000:
+                now = time.monotonic()
+                self._until = {uid: until for uid, until in self._until.items() if until > now}
+
+    def is_sticky(self, user_id) -> bool:
+        if user_id is None:
+            return False
+        with self._lock:
+            until = self._until.get(user_id)
+        return until is not None and until > time.monotonic()
+
+
+stickiness = _Stickiness(REPLICA_STICKINESS_SEC)
+
+
+def read_only(fn):
+    """
+    Позначає функцію логіки як таку, що лише читає: її SELECT-запити можуть іти на репліку.
+    Аргумент user_id функції використовується для read-your-writes.
+    """
+    signature = inspect.signature(fn)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        user_id = signature.bind_partial(*args, **kwargs).arguments.get("user_id")
+        token = _read_only_user.set(user_id)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _read_only_user.reset(token)
+
+    return wrapper
+
+
+class RoutingSession(Session):
+    """
+    Сесія Flask-SQLAlchemy, що відправляє SELECT-и read-only шляхів на репліку (bind 'replica'),
+    а все інше — на основну базу. Після запису в поточній транзакції читання лишаються на primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and clause is not None:
+            if getattr(clause, "is_dml", False):
+                self.info["db_wrote"] = True
+            elif getattr(clause, "is_select", False):
+                replica = self._replica_for_read()
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+    def _replica_for_read(self):
+        user_id = _read_only_user.get()
+        if user_id is _NOT_READ_ONLY:
+            return None
+        replica = self._db.engines.get(REPLICA_BIND_KEY)
+        if replica is None:
+            return None
+        if self._flushing or self.info.get("db_wrote") or self.new or self.dirty or self.deleted:
+            _routed_total.inc(target="primary", reason="transaction")
+            return None
+        if stickiness.is_sticky(user_id):
+            _routed_total.inc(target="primary", reason="sticky")
+            return None
+        _routed_total.inc(target="replica", reason="read_only")
+        return replica
+
+
+@event.listens_for(RoutingSession, "before_flush")
+def _remember_written_users(session, flush_context, instances):
+    written = session.info.setdefault("db_written_users", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        user_id = getattr(obj, "user_id", None)
+        if user_id is not None:
+            written.add(user_id)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_wrote(session, flush_context):
+    session.info["db_wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _stick_written_users(session):
+    written = session.info.pop("db_written_users", None)
+    session.info.pop("db_wrote", None)
+    if written:
+        stickiness.mark(written)
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _forget_written_users(session):
+    session.info.pop("db_written_users", None)
+    session.info.pop("db_wrote", None)
@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import time
+from functools import partial
+
+from flask import current_app
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError, DataError
+
+from bot.infra import metrics
+from bot.infra.db_executor import get_db_executor
+from bot.infra.db_routing import stickiness
+from bot.infra.write_ahead import DB_OUTAGE_ERRORS, db_breaker, accepts_direct_writes, buffer_write
+from bot.models import db
+from config import ENTRY_WRITE_BATCH_SIZE, ENTRY_WRITE_FLUSH_MS, ENTRY_WRITE_QUEUE_SIZE
+
+logger = logging.getLogger(__name__)
+
+_commit_seconds = metrics.histogram(
+    "group_commit_seconds", "Тривалість спільного коміту пакета записів",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0))
+_batch_rows = metrics.histogram(
+    "group_commit_batch_rows", "Рядків в одному спільному коміті", buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500))
+_rows_total = metrics.counter(
+    "group_commit_rows_total", "Рядки, передані на спільний коміт: committed, buffered, failed", ("result",))
+_queue_depth = metrics.gauge("group_commit_queue_depth", "Рядки, що чекають у черзі спільного коміту")
+
+# Помилки даних одного рядка: пакет з ними повторюється по рядку, щоб решта записів не втратилась
+_ROW_ERRORS = (IntegrityError, DataError)
+
+
+def _stopped_error() -> RuntimeError:
+    return RuntimeError("конвеєр спільного коміту зупинено, рядок не записано")
+
+
+class _Pending:
+    __slots__ = ("table", "row", "future")
+
+    def __init__(self, table, row: dict, future: asyncio.Future | None):
+        self.table = table
+        self.row = row
+        self.future = future
+
+
+class GroupCommitWriter:
+    """
+    Конвеєр вставки рядків зі спільним комітом. submit() ставить рядок в обмежену чергу (повна черга
+    пригальмовує викликача); фонова задача забирає все, що накопичилось, — до batch_size рядків, чекаючи
+    на нові щонайбільше flush_ms — і вставляє їх у пулі потоків БД одним багаторядковим INSERT на таблицю
+    в одній транзакції. Поки йде коміт, у черзі збирається наступний пакет. Якщо БД недоступна,
+    пакет дописується в локальний журнал (bot.infra.write_ahead) і теж вважається збереженим.
+    """
+
+    def __init__(self, batch_size: int = ENTRY_WRITE_BATCH_SIZE, flush_ms: float = ENTRY_WRITE_FLUSH_MS,
+                 queue_size: int = ENTRY_WRITE_QUEUE_SIZE):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_ms / 1000
+        self.queue_size = queue_size
+        self._flask_app = None
+        self._queue: asyncio.Queue[_Pending] | None = None
+        self._task: asyncio.Task | None = None
+
+    def _ensure_started(self):
+        if self._task is not None and not self._task.done():
+            return
+        # Задача живе в циклі подій бота, а коміт потребує контексту застосунку, в якому працюють обробники
+        self._flask_app = current_app._get_current_object()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        _queue_depth.set_function(self._queue.qsize)
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="group_commit")
+        # Наступний submit() після зупинки задачі запускає нову (див. вище)
+        self._task.add_done_callback(partial(self._on_stopped, self._queue))
+
+    async def submit(self, table, row: dict, wait: bool = True) -> bool:
+        """
+        Додає рядок до наступного пакета. wait — дочекатися коміту (виняток коміту прокидається сюди)
+        і повернути True, якщо рядок потрапив не в БД, а в локальний журнал; інакше повертається False
+        одразу після постановки в чергу, а помилку запису видно лише в лозі й метриках.
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future() if wait else None
+        await self._queue.put(_Pending(table, row, future))
+        if future is None:
+            return False
+        return await future
+
+    async def flush(self):
+        """Чекає, доки закомітяться всі рядки, поставлені в чергу до виклику."""
+        if self._queue is not None and self._task is not None and not self._task.done():
+            await self._queue.join()
+
+    async def close(self):
+        await self.flush()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _collect(self) -> list[_Pending]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_seconds
+        while len(batch) < self.batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            try:
+                buffered, errors = await self._commit(batch)
+            except asyncio.CancelledError:
+                self._resolve(batch, False, [_stopped_error()] * len(batch))
+                raise
+            except Exception as e:
+                # Непередбачена помилка не зупиняє конвеєр: пакет відхиляється, наступні пишуться як звичайно
+                logger.exception('спільний коміт %s рядків перервано', len(batch))
+                buffered, errors = False, [e] * len(batch)
+            self._resolve(batch, buffered, errors)
+
+    async def _commit(self, batch: list[_Pending]) -> tuple[bool, list[Exception | None]]:
+        """Записує пакет у БД або в локальний журнал; повертає (у журналі, помилка для кожного рядка)."""
+        if accepts_direct_writes():
+            try:
+                errors = await asyncio.get_running_loop().run_in_executor(
+                    get_db_executor(), partial(self._write, batch))
+            except DB_OUTAGE_ERRORS as e:
+                db_breaker.record_failure()
+                logger.warning('спільний коміт %s рядків не вдався, БД недоступна: %s', len(batch), e)
+            except Exception as e:
+                db_breaker.record(e)
+                logger.error('спільний коміт %s рядків не вдався: %s', len(batch), e)
+                return False, [e] * len(batch)
+            else:
+                db_breaker.record_success()
+                return False, errors
+        return True, await self._buffer(batch)
+
+    def _resolve(self, batch: list[_Pending], buffered: bool, errors: list[Exception | None]):
+        for pending, error in zip(batch, errors):
+            _rows_total.inc(result="failed" if error else "buffered" if buffered else "committed")
+            if pending.future is not None and not pending.future.done():
+                if error is None:
+                    pending.future.set_result(buffered)
+                else:
+                    pending.future.set_exception(error)
+            self._queue.task_done()
+
+    @staticmethod
+    def _on_stopped(queue: asyncio.Queue, task: asyncio.Task):
+        """Задача конвеєра завершилась: рядки, що лишились у її черзі, відхиляються, а не чекають вічно."""
+        if not task.cancelled() and task.exception() is not None:
+            logger.error('конвеєр спільного коміту зупинився: %s', task.exception())
+        while not queue.empty():
+            pending = queue.get_nowait()
+            _rows_total.inc(result="failed")
+            if pending.future is not None and not pending.future.done():
+                pending.future.set_exception(_stopped_error())
+            queue.task_done()
+
+    @staticmethod
+    async def _buffer(batch: list[_Pending]) -> list[Exception | None]:
+        # Рядки потрапляють у журнал у порядку пакета: кожен append ставить свій рядок у буфер до першого await
+        results = await asyncio.gather(*(buffer_write(pending.table, pending.row) for pending in batch),
+                                       return_exceptions=True)
+        return [result if isinstance(result, Exception) else None for result in results]
+
+    def _write(self, batch: list[_Pending]) -> list[Exception | None]:
+        """Вставляє пакет однією транзакцією (синхронно); повертає помилку для кожного рядка або None."""
+        started = time.perf_counter()
+        with self._flask_app.app_context():
+            engine = db.engine
+            try:
+                with engine.begin() as connection:
+                    self._insert(connection, batch)
+            except _ROW_ERRORS as e:
+                if len(batch) == 1:
+                    logger.error('рядок не записано: %s', e)
+                    return [e]
+                logger.warning('пакет з %s рядків відхилено (%s), повтор по одному рядку', len(batch), e)
+                return [self._write(batch[index:index + 1])[0] for index in range(len(batch))]
+        _commit_seconds.observe(time.perf_counter() - started)
+        _batch_rows.observe(len(batch))
+        stickiness.mark({pending.row["user_id"] for pending in batch if "user_id" in pending.row})
+        return [None] * len(batch)
+
+    @staticmethod
+    def _insert(connection, batch: list[_Pending]):
+        by_table: dict = {}
+        for pending in batch:
+            by_table.setdefault(pending.table, []).append(pending.row)
+        for table, rows in by_table.items():
+            connection.execute(insert(table).values(rows))
+
+
+entry_writer = GroupCommitWriter()
@@ -0,0 +1,78 @@
+import asyncio
+import importlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+_modules: list["LazyHandlerModule"] = []
+
+
+class LazyHandlerModule:
+    """
+    Модуль з обробниками, що імпортується під час першого виклику будь-якого з них, а не під час
+    запуску бота. lazy.handler_name — корутина з тим самим __name__ (за ним інструментуються
+    обробники й вибираються цілі /profile), яка при першому виклику імпортує модуль.
+    """
+
+    def __init__(self, module_name: str):
+        self.module_name = module_name
+        self._module = None
+        self._callbacks: dict[str, object] = {}
+        _modules.append(self)
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self.module_name)
+            missing = [name for name in self._callbacks if not hasattr(self._module, name)]
+            if missing:
+                raise AttributeError(f"{self.module_name} не містить обробників: {', '.join(missing)}")
+        return self._module
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        callback = self._callbacks.get(name)
+        if callback is None:
+            callback = self._callbacks[name] = self._lazy_callback(name)
+        return callback
+
+    def _lazy_callback(self, name: str):
+        target = None
+
+        async def callback(*args, **kwargs):
+            nonlocal target
+            if target is None:
+                target = getattr(self.load(), name)
+            return await target(*args, **kwargs)
+
+        callback.__name__ = callback.__qualname__ = name
+        callback.__module__ = self.module_name
+        return callback
+
+
+def _load_all() -> list[str]:
+    loaded = []
+    for module in _modules:
+        if not module.loaded:
+            module.load()
+            loaded.append(module.module_name)
+    return loaded
+
+
+async def preload_handler_modules_job(context):
+    """
+    Імпортує ще не завантажені модулі обробників у потоці пулу вже після старту бота, щоб перше
+    оновлення кожного типу не чекало на імпорт у циклі подій. Помилка імпорту (зокрема
+    відсутній обробник) потрапляє в лог одразу, а не під час першого виклику.
+    """
+    try:
+        loaded = await asyncio.get_running_loop().run_in_executor(None, _load_all)
+    except Exception:
+        logger.exception('Не вдалося завантажити модулі обробників')
+        return
+    if loaded:
+        logger.info('завантажено модулі обробників: %s', ', '.join(loaded))
@@ -0,0 +1,166 @@
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+from bot.infra import metrics
+from bot.infra.sql_instrumentation import current_handler, BACKGROUND_HANDLER
+from config import LOG_LEVEL, LOG_FORMAT, LOG_DEBUG_RATE, LOG_QUEUE_SIZE
+
+# (update_id, user_id) оновлення, яке зараз обробляється
+_update_context: contextvars.ContextVar[tuple | None] = contextvars.ContextVar("log_update_context", default=None)
+
+_dropped_total = metrics.counter("log_records_dropped_total", "Записи логу, відкинуті через переповнену чергу")
+_suppressed_total = metrics.counter("log_debug_suppressed_total", "Debug-записи, пропущені обмеженням частоти")
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+@asynccontextmanager
+async def log_context(update):
+    """Middleware оновлення: update_id та user_id потрапляють у кожен запис логу під час обробки."""
+    user = getattr(update, "effective_user", None)
+    token = _update_context.set((getattr(update, "update_id", None), user.id if user else None))
+    try:
+        yield
+    finally:
+        _update_context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Додає до запису поля update_id, user_id, handler — у потоці, що пише лог (там видно contextvars)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        update_id, user_id = _update_context.get() or (None, None)
+        record.update_id = update_id
+        record.user_id = user_id
+        handler = current_handler()
+        record.handler = None if handler == BACKGROUND_HANDLER else handler
+        return True
+
+
+class DebugRateLimitFilter(logging.Filter):
+    """
+    Обмежує частоту записів рівня DEBUG: не більше rate на секунду з одного місця виклику.
+    Перший дозволений після пропусків запис отримує поле suppressed — скільки записів пропущено.
+    """
+
+    def __init__(self, rate: float = LOG_DEBUG_RATE):
+        super().__init__()
+        self.rate = rate
+        # (файл, рядок) -> [токени, час оновлення, пропущено]
+        self._buckets: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate <= 0:
+            return True
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.rate, now, 0]
+            bucket[0] = min(self.rate, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                _suppressed_total.inc()
+                return False
+            bucket[0] -= 1
+            if bucket[2]:
+                record.suppressed = bucket[2]
+                bucket[2] = 0
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Один JSON-об'єкт на рядок: ts, level, logger, msg, update_id, user_id, handler[, suppressed, exc]."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for field in ("update_id", "user_id", "handler", "suppressed"):
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        context = " ".join(f"{field}={getattr(record, field)}" for field in ("update_id", "user_id", "handler", "suppressed")
+                           if getattr(record, field, None) is not None)
+        return f"{line} [{context}]" if context else line
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Кладе запис у обмежену чергу й одразу повертається: форматування та запис у stdout
+    виконує потік QueueListener. Якщо черга переповнена, запис відкидається, а не блокує цикл подій.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        # Аргументи підставляються тут: об'єкти можуть змінитися, поки запис чекає в черзі
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _dropped_total.inc()
+
+
+def configure_logging(level: str = LOG_LEVEL, log_format: str = LOG_FORMAT):
+    """Налаштовує кореневий логер: черга + QueueListener, що пише у stdout (JSON або текст)."""
+    global _listener
+    if _listener is not None:
+        return
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter() if log_format == "json" else TextFormatter())
+
+    queue_handler = NonBlockingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    queue_handler.addFilter(DebugRateLimitFilter())
+    queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(level.upper())
+    # httpx пише INFO на кожен запит до Bot API
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    _listener = logging.handlers.QueueListener(queue_handler.queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Дописує чергу та зупиняє потік запису."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,101 @@
+import logging
+import asyncio
+import sys
+import threading
+import time
+import traceback
+
+from bot.infra import metrics
+from bot.infra.sql_instrumentation import handler_in_frame
+from config import LOOP_LAG_INTERVAL_SEC, LOOP_LAG_THRESHOLD_SEC, LOOP_ASYNCIO_DEBUG
+
+logger = logging.getLogger(__name__)
+
+_lag_seconds = metrics.histogram(
+    "event_loop_lag_seconds", "Затримка циклу подій бота: наскільки пізніше запланованого прокидається монітор",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0))
+_stalls_total = metrics.counter(
+    "event_loop_stalls_total", "Блокування циклу подій довші за поріг, за обробником, що виконувався", ("handler",))
+
+_monitor: "LoopMonitor | None" = None
+
+
+class LoopMonitor:
+    """
+    Корутина прокидається кожні interval секунд і записує затримку пробудження в гістограму.
+    Сторожовий потік перевіряє, чи корутина прокинулась вчасно: якщо цикл подій заблоковано
+    довше за threshold, він робить знімок стеку потоку циклу (sys._current_frames) ще під час
+    блокування і пише його в лог разом з ім'ям активного обробника — без профайлера.
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL_SEC, threshold: float = LOOP_LAG_THRESHOLD_SEC):
+        self.interval = interval
+        self.threshold = threshold
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        # Коли корутина мала прокинутися (за годинником циклу, він монотонний)
+        self._expected_wakeup = 0.0
+        self._reported_wakeup = 0.0
+        self._task: asyncio.Task | None = None
+        self._stopped = threading.Event()
+        self._watchdog: threading.Thread | None = None
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        if LOOP_ASYNCIO_DEBUG:
+            # Вбудоване логування asyncio про повільні колбеки; debug-режим помітно сповільнює цикл
+            self._loop.set_debug(True)
+            self._loop.slow_callback_duration = self.threshold
+        self._expected_wakeup = self._loop.time() + self.interval
+        self._task = self._loop.create_task(self._measure())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _measure(self):
+        loop = self._loop
+        while True:
+            self._expected_wakeup = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - self._expected_wakeup)
+            _lag_seconds.observe(lag)
+            if lag > self.threshold:
+                logger.warning('цикл подій відставав на %.0f мс', lag * 1000)
+
+    def _watch(self):
+        check_every = min(self.interval, self.threshold) / 2
+        while not self._stopped.wait(check_every):
+            expected = self._expected_wakeup
+            if expected == self._reported_wakeup or time.monotonic() - expected < self.threshold:
+                continue
+            self._reported_wakeup = expected
+            self._report_stall(time.monotonic() - expected)
+
+    def _report_stall(self, blocked_for: float):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        handler = handler_in_frame(frame) or "unknown"
+        _stalls_total.inc(handler=handler)
+        stack = "".join(traceback.format_stack(frame))
+        logger.warning('цикл подій заблоковано вже %.0f мс, обробник: %s\n%s', blocked_for * 1000, handler, stack)
+
+
+def start_loop_monitor(interval: float = LOOP_LAG_INTERVAL_SEC, threshold: float = LOOP_LAG_THRESHOLD_SEC):
+    global _monitor
+    if _monitor is None:
+        _monitor = LoopMonitor(interval, threshold)
+        _monitor.start()
+
+
+def stop_loop_monitor():
+    global _monitor
+    if _monitor is not None:
+        _monitor.stop()
+        _monitor = None
@@ -0,0 +1,170 @@
+import threading
+
+from config import METRICS_ENABLED
+
+REGISTRY: dict[str, "_Metric"] = {}
+_registry_lock = threading.Lock()
+
+# Якщо метрики вимкнено, запис значень нічого не робить; обчислювані метрики рахуються лише під час читання
+enabled = METRICS_ENABLED
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> list[tuple[str, dict, float]]:
+        """Повертає список (ім'я, мітки, значення) для поточного стану метрики."""
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, dict(zip(self.labelnames, key)), value) for key, value in items]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        if not enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._function = None
+
+    def set(self, value: float, **labels):
+        if not enabled:
+            return
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        if not enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function):
+        """Значення обчислюється під час читання (наприклад, розмір черги)."""
+        self._function = function
+
+    def samples(self) -> list[tuple[str, dict, float]]:
+        if self._function is not None:
+            return [(self.name, {}, float(self._function()))]
+        return super().samples()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # мітки -> [лічильники по бакетах..., сума, кількість]
+        self._series: dict[tuple, list[float]] = {}
+
+    def observe(self, value: float, **labels):
+        if not enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self) -> list[tuple[str, dict, float]]:
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+        result = []
+        for key, series in items:
+            labels = dict(zip(self.labelnames, key))
+            for bound, count in zip(self.buckets, series):
+                result.append((f"{self.name}_bucket", {**labels, "le": repr(bound)}, count))
+            result.append((f"{self.name}_bucket", {**labels, "le": "+Inf"}, series[-1]))
+            result.append((f"{self.name}_sum", labels, series[-2]))
+            result.append((f"{self.name}_count", labels, series[-1]))
+        return result
+
+
+def _get_or_create(metric_class, name: str, documentation: str, labelnames: tuple[str, ...], **kwargs):
+    with _registry_lock:
+        metric = REGISTRY.get(name)
+        if metric is None:
+            metric = metric_class(name, documentation, labelnames, **kwargs)
+            REGISTRY[name] = metric
+        return metric
+
+
+def counter(name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+    return _get_or_create(Counter, name, documentation, labelnames)
+
+
+def gauge(name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+    return _get_or_create(Gauge, name, documentation, labelnames)
+
+
+def histogram(name: str, documentation: str, labelnames: tuple[str, ...] = (),
+              buckets: tuple[float, ...] = Histogram.DEFAULT_BUCKETS) -> Histogram:
+    return _get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+
+def register(metric: _Metric) -> _Metric:
+    """Реєструє метрику власного типу (наприклад, з обчислюваними samples())."""
+    with _registry_lock:
+        return REGISTRY.setdefault(metric.name, metric)
+
+
+def snapshot() -> dict[str, list[tuple[str, dict, float]]]:
+    """Знімок усіх зареєстрованих метрик (для логів та ендпоінту метрик)."""
+    with _registry_lock:
+        metrics = list(REGISTRY.values())
+    return {metric.name: metric.samples() for metric in metrics}
+
+
+def _escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in labels.items()) + "}"
+
+
+def render_prometheus() -> str:
+    """Усі метрики у текстовому форматі експозиції Prometheus."""
+    with _registry_lock:
+        metrics = sorted(REGISTRY.values(), key=lambda metric: metric.name)
+    lines = []
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in metric.samples():
+            lines.append(f"{name}{_format_labels(labels)} {float(value)!r}")
+    return "\n".join(lines) + "\n"
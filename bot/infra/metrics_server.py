@@ -0,0 +1,68 @@
+import logging
+from aiohttp import web
+
+from bot.infra import metrics
+from config import METRICS_LISTEN, METRICS_PORT
+
+logger = logging.getLogger(__name__)
+
+_server: "MetricsServer | None" = None
+
+# Текстовий формат експозиції Prometheus: за версією в Content-Type сервер Prometheus вибирає парсер
+_PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def add_observability_routes(web_app: web.Application, application):
+    """/health (503, поки Application не запущено) і, якщо метрики ввімкнено, /metrics."""
+
+    async def health(request: web.Request) -> web.Response:
+        if not application.running:
+            return web.Response(status=503, text="stopped")
+        return web.Response(text="ok")
+
+    async def metrics_endpoint(request: web.Request) -> web.Response:
+        return web.Response(text=metrics.render_prometheus(), headers={"Content-Type": _PROMETHEUS_CONTENT_TYPE})
+
+    web_app.router.add_get("/health", health)
+    if metrics.enabled:
+        web_app.router.add_get("/metrics", metrics_endpoint)
+
+
+class MetricsServer:
+    """
+    Легкий сервер aiohttp у циклі подій бота для режиму polling: /metrics та /health.
+    Метрики рендеряться в тому ж циклі, де оновлюються, тож читання не конкурує з обробниками.
+    """
+
+    def __init__(self, application, listen: str = METRICS_LISTEN, port: int = METRICS_PORT):
+        self.application = application
+        self.listen = listen
+        self.port = port
+        self._runner: web.AppRunner | None = None
+
+    async def start(self):
+        web_app = web.Application()
+        add_observability_routes(web_app, self.application)
+        self._runner = web.AppRunner(web_app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.listen, self.port).start()
+        logger.info('слухаю %s:%s/metrics', self.listen, self.port)
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def start_metrics_server(application):
+    global _server
+    if _server is None:
+        _server = MetricsServer(application)
+        await _server.start()
+
+
+async def stop_metrics_server():
+    global _server
+    if _server is not None:
+        await _server.stop()
+        _server = None
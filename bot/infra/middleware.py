@@ -0,0 +1,21 @@
+from contextlib import AsyncExitStack
+
+from telegram.ext import Application
+
+# Фабрики асинхронних контекстних менеджерів: factory(update) -> async with ...
+_update_middlewares: list = []
+
+
+def add_update_middleware(factory):
+    """Реєструє middleware, що обгортає обробку кожного оновлення (в порядку реєстрації)."""
+    _update_middlewares.append(factory)
+
+
+class BotApplication(Application):
+    """Application, яке обгортає process_update зареєстрованими middleware."""
+
+    async def process_update(self, update: object) -> None:
+        async with AsyncExitStack() as stack:
+            for factory in _update_middlewares:
+                await stack.enter_async_context(factory(update))
+            await super().process_update(update)
@@ -0,0 +1,275 @@
+import logging
+import asyncio
+import heapq
+import itertools
+from enum import IntEnum
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from bot.infra import metrics
+from config import OUTBOUND_GLOBAL_RATE, OUTBOUND_CHAT_RATE, OUTBOUND_CHAT_BURST, OUTBOUND_MAX_RETRIES
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Клас пріоритету вихідного запиту; передається як rate_limit_args методів бота."""
+    INTERACTIVE = 0  # відповідь на дію користувача (за замовчуванням)
+    PHASE = 1        # сповіщення про зміну фази Pomodoro
+    REMINDER = 2     # нагадування про завдання
+    TIMER_EDIT = 3   # косметичне оновлення повідомлення таймера
+
+
+# Обмежуються лише методи, що надсилають або змінюють повідомлення; решта (answerCallbackQuery, getMe...) — напряму
+_LIMITED_PREFIXES = ("send", "edit", "copy", "forward")
+
+_queue_depth = metrics.gauge("outbound_queue_depth", "Вихідні запити в черзі планувальника", ("priority",))
+_wait_seconds = metrics.histogram(
+    "outbound_wait_seconds", "Очікування вихідного запиту в черзі до відправки", ("priority",),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+_superseded_total = metrics.counter(
+    "outbound_superseded_total", "Косметичні редагування, об'єднані з новішими (merged) або відкинуті (dropped)",
+    ("result",))
+_retry_after_total = metrics.counter("outbound_retry_after_total", "Відповіді Telegram RetryAfter (flood control)")
+_api_requests_total = metrics.counter(
+    "telegram_api_requests_total", "Виклики Bot API за методом і результатом (ok або клас помилки)", ("endpoint", "result"))
+
+
+async def _call_api(endpoint: str, call):
+    try:
+        result = await call()
+    except Exception as e:
+        _api_requests_total.inc(endpoint=endpoint, result=type(e).__name__)
+        raise
+    _api_requests_total.inc(endpoint=endpoint, result="ok")
+    return result
+
+
+class _TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Через скільки секунд буде доступний токен (0 — вже)."""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.burst
+
+
+class _OutboundRequest:
+    __slots__ = ("endpoint", "priority", "chat_id", "merge_key", "call", "future", "enqueued", "attempts", "dropped")
+
+    def __init__(self, endpoint: str, priority: Priority, chat_id, merge_key, call, future, enqueued: float):
+        self.endpoint = endpoint
+        self.priority = priority
+        self.chat_id = chat_id
+        self.merge_key = merge_key
+        self.call = call
+        self.future = future
+        self.enqueued = enqueued
+        self.attempts = 0
+        self.dropped = False
+
+
+class OutboundScheduler(BaseRateLimiter):
+    """
+    Єдиний планувальник вихідних запитів до Telegram для всіх екземплярів бота застосунку.
+
+      * черга з пріоритетами: INTERACTIVE > PHASE > REMINDER > TIMER_EDIT, у межах класу — FIFO;
+      * ліміти: глобальний (OUTBOUND_GLOBAL_RATE/с) і на чат (OUTBOUND_CHAT_RATE/с з запасом
+        OUTBOUND_CHAT_BURST) — запит чату, що вичерпав ліміт, не блокує інші чати;
+      * ще не відправлене редагування таймера того самого повідомлення замінюється новішим
+        (обидва викликачі отримують один результат), а будь-яке інше редагування цього
+        повідомлення його відкидає, щоб застарілий прогрес не перезаписав новий текст;
+      * RetryAfter призупиняє всі відправки на вказаний час і повторює запит.
+    """
+
+    def __init__(self, global_rate: float = OUTBOUND_GLOBAL_RATE, chat_rate: float = OUTBOUND_CHAT_RATE,
+                 chat_burst: float = OUTBOUND_CHAT_BURST, max_retries: int = OUTBOUND_MAX_RETRIES):
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self._heap: list[tuple[int, int, _OutboundRequest]] = []
+        self._sequence = itertools.count()
+        self._mergeable: dict[tuple, _OutboundRequest] = {}
+        self._global: _TokenBucket | None = None
+        self._chats: dict[object, _TokenBucket] = {}
+        self._paused_until = 0.0
+        self._wakeup = asyncio.Event()
+        self._dispatcher: asyncio.Task | None = None
+        self._sending: set[asyncio.Task] = set()
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+        for _priority, _sequence, request in self._heap:
+            if not request.future.done():
+                request.future.cancel()
+        self._heap.clear()
+        self._mergeable.clear()
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        if not endpoint.startswith(_LIMITED_PREFIXES):
+            return await _call_api(endpoint, lambda: callback(*args, **kwargs))
+
+        loop = asyncio.get_running_loop()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._global = self._global or _TokenBucket(self.global_rate, self.global_rate, loop.time())
+            self._wakeup = asyncio.Event()
+            self._dispatcher = loop.create_task(self._dispatch_loop())
+
+        priority = Priority(rate_limit_args) if rate_limit_args is not None else Priority.INTERACTIVE
+        chat_id = data.get("chat_id")
+        merge_key = None
+        if endpoint.startswith("edit") and data.get("message_id") is not None:
+            merge_key = (chat_id, data["message_id"])
+            future = self._supersede(merge_key, priority, lambda: callback(*args, **kwargs))
+            if future is not None:
+                return await asyncio.shield(future)
+
+        request = _OutboundRequest(endpoint, priority, chat_id, merge_key if priority is Priority.TIMER_EDIT else None,
+                                   lambda: callback(*args, **kwargs), loop.create_future(), loop.time())
+        if request.merge_key is not None:
+            self._mergeable[request.merge_key] = request
+        self._push(request)
+        return await asyncio.shield(request.future)
+
+    def _supersede(self, merge_key: tuple, priority: Priority, call):
+        """Редагування вже відкладеного оновлення таймера: об'єднати з ним або відкинути його."""
+        pending = self._mergeable.get(merge_key)
+        if pending is None:
+            return None
+        if priority is Priority.TIMER_EDIT:
+            pending.call = call
+            _superseded_total.inc(result="merged")
+            return pending.future
+        del self._mergeable[merge_key]
+        pending.dropped = True
+        _queue_depth.dec(priority=pending.priority.name)
+        pending.future.set_result(True)
+        _superseded_total.inc(result="dropped")
+        return None
+
+    def _push(self, request: _OutboundRequest):
+        heapq.heappush(self._heap, (request.priority, next(self._sequence), request))
+        _queue_depth.inc(priority=request.priority.name)
+        self._wakeup.set()
+
+    def _chat_bucket(self, chat_id, now: float) -> _TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) > 10_000:
+                self._chats = {key: value for key, value in self._chats.items() if not value.is_full(now)}
+            bucket = self._chats[chat_id] = _TokenBucket(self.chat_rate, self.chat_burst, now)
+        return bucket
+
+    def _pop_ready(self, now: float) -> tuple[_OutboundRequest | None, float | None]:
+        """Найпріоритетніший запит, чат якого не вичерпав ліміт; інакше — час до найближчого токена."""
+        skipped = []
+        wait = None
+        ready = None
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            request = entry[2]
+            if request.dropped:
+                continue
+            if request.chat_id is None:
+                ready = request
+                break
+            delay = self._chat_bucket(request.chat_id, now).delay(now)
+            if delay == 0:
+                ready = request
+                break
+            skipped.append(entry)
+            wait = delay if wait is None else min(wait, delay)
+        for entry in skipped:
+            heapq.heappush(self._heap, entry)
+        return ready, wait
+
+    async def _sleep(self, delay: float | None):
+        """Чекає delay секунд (None — без обмеження) або появи нового запиту."""
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _dispatch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+            if not self._heap:
+                await self._sleep(None)
+                continue
+            global_delay = self._global.delay(now)
+            if global_delay:
+                await asyncio.sleep(global_delay)
+                continue
+            request, wait = self._pop_ready(now)
+            if request is None:
+                await self._sleep(wait)
+                continue
+
+            _queue_depth.dec(priority=request.priority.name)
+            if request.merge_key is not None and self._mergeable.get(request.merge_key) is request:
+                del self._mergeable[request.merge_key]
+            if request.future.done():
+                continue
+            self._global.take(now)
+            if request.chat_id is not None:
+                self._chats[request.chat_id].take(now)
+            _wait_seconds.observe(now - request.enqueued, priority=request.priority.name)
+            task = loop.create_task(self._send(request))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, request: _OutboundRequest):
+        request.attempts += 1
+        try:
+            result = await _call_api(request.endpoint, request.call)
+        except RetryAfter as e:
+            _retry_after_total.inc()
+            retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, "total_seconds") else e.retry_after
+            loop = asyncio.get_running_loop()
+            self._paused_until = max(self._paused_until, loop.time() + retry_after)
+            logger.warning('RetryAfter %s с, відправки призупинено (спроба %s)', retry_after, request.attempts)
+            if request.attempts <= self.max_retries:
+                request.enqueued = loop.time()
+                self._push(request)
+            elif not request.future.done():
+                request.future.set_exception(e)
+        except Exception as e:
+            if not request.future.done():
+                request.future.set_exception(e)
+        else:
+            if not request.future.done():
+                request.future.set_result(result)
+
+
+# Спільний екземпляр: ним користуються Application (app.py) і бот нагадувань
+outbound = OutboundScheduler()
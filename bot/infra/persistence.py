@@ -0,0 +1,302 @@
+import logging
+import asyncio
+import hashlib
+import json
+import pickle
+import time
+from datetime import datetime
+from functools import partial
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from telegram.ext import BasePersistence, PersistenceInput
+
+from bot.infra import metrics
+from bot.infra.db_executor import get_db_executor
+from bot.models import db, BotPersistenceRecord
+from config import PERSISTENCE_UPDATE_INTERVAL_SEC, PERSISTENCE_WRITE_DELAY_SEC, PERSISTENCE_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+USER, CHAT, BOT, CALLBACK, CONVERSATION = "user", "chat", "bot", "callback", "conversation"
+
+_UPSERT_BY_DIALECT = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+_write_seconds = metrics.histogram(
+    "persistence_write_seconds", "Тривалість пакетного запису стану PTB у БД",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0))
+_rows_written = metrics.counter(
+    "persistence_rows_written_total", "Записані рядки bot_persistence", ("op",))
+_dirty_rows = metrics.gauge("persistence_dirty_rows", "Змінені рядки стану, що чекають на запис")
+
+# (kind, namespace, key) -> серіалізовані дані; None означає видалення
+RecordKey = tuple[str, str, str]
+
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _conversation_key(key: tuple) -> str:
+    return json.dumps(list(key))
+
+
+class SQLPersistence(BasePersistence):
+    """
+    BasePersistence на таблиці bot_persistence: один рядок на користувача, чат,
+    bot_data чи стан розмови. PTB передає лише змінені записи; вони буферизуються
+    та за PERSISTENCE_WRITE_DELAY_SEC пишуться пакетними upsert-ами в одній транзакції.
+    Записи, серіалізація яких не змінилась з моменту останнього запису, пропускаються.
+    """
+
+    def __init__(self, flask_app, store_data: PersistenceInput | None = None,
+                 update_interval: float = PERSISTENCE_UPDATE_INTERVAL_SEC,
+                 write_delay: float = PERSISTENCE_WRITE_DELAY_SEC,
+                 batch_size: int = PERSISTENCE_BATCH_SIZE, lazy: bool = False):
+        super().__init__(store_data=store_data, update_interval=update_interval)
+        # lazy: user_data / chat_data не читаються цілком при старті, а підвантажуються
+        # за потреби (див. bot.infra.working_set)
+        self.lazy = lazy
+        self._flask_app = flask_app
+        self._write_delay = write_delay
+        self._batch_size = batch_size
+        self._dirty: dict[RecordKey, bytes | None] = {}
+        self._digests: dict[RecordKey, bytes] = {}
+        self._write_task: asyncio.Task | None = None
+        self._write_lock = asyncio.Lock()
+        # Ключі user_data / chat_data, які не вдалося прочитати через недоступну БД: їхні тимчасові
+        # значення не пишуться поверх збережених (див. bot.infra.working_set)
+        self.unsynced: dict[str, set] = {USER: set(), CHAT: set()}
+        _dirty_rows.set_function(lambda: len(self._dirty))
+
+    # --- Читання ---
+
+    def _load_rows(self, kind: str, namespace: str | None = None,
+                   key: str | None = None) -> list[tuple[str, str, bytes]]:
+        table = BotPersistenceRecord.__table__
+        stmt = select(table.c.namespace, table.c.key, table.c.data).where(table.c.kind == kind)
+        if namespace is not None:
+            stmt = stmt.where(table.c.namespace == namespace)
+        if key is not None:
+            stmt = stmt.where(table.c.key == key)
+        with self._flask_app.app_context():
+            with db.engine.connect() as connection:
+                return list(connection.execute(stmt))
+
+    def _decode(self, kind: str, rows) -> dict[str, object]:
+        result = {}
+        for row_namespace, key, data in rows:
+            self._digests[(kind, row_namespace, key)] = _digest(data)
+            result[key] = pickle.loads(data)
+        return result
+
+    async def _load(self, kind: str, namespace: str | None = None, key: str | None = None) -> dict[str, object]:
+        loop = asyncio.get_running_loop()
+        rows = await loop.run_in_executor(get_db_executor(), partial(self._load_rows, kind, namespace, key))
+        return self._decode(kind, rows)
+
+    def load_record_sync(self, kind: str, key) -> object | None:
+        """Один запис user_data / chat_data (None, якщо його немає). Блокує — лише як запасний шлях."""
+        return self._decode(kind, self._load_rows(kind, "", str(key))).get(str(key))
+
+    async def load_record(self, kind: str, key) -> object | None:
+        """Один запис user_data / chat_data, прочитаний у пулі потоків БД."""
+        return (await self._load(kind, "", str(key))).get(str(key))
+
+    async def get_user_data(self) -> dict[int, dict]:
+        if self.lazy:
+            return {}
+        return {int(key): value for key, value in (await self._load(USER)).items()}
+
+    async def get_chat_data(self) -> dict[int, dict]:
+        if self.lazy:
+            return {}
+        return {int(key): value for key, value in (await self._load(CHAT)).items()}
+
+    async def get_bot_data(self) -> dict:
+        return (await self._load(BOT)).get("", {})
+
+    async def get_callback_data(self):
+        return (await self._load(CALLBACK)).get("")
+
+    async def get_conversations(self, name: str) -> dict[tuple, object]:
+        return {tuple(json.loads(key)): value for key, value in (await self._load(CONVERSATION, name)).items()}
+
+    # --- Запис ---
+
+    def _stage(self, record_key: RecordKey, value):
+        if value is None:
+            # У lazy-режимі запис вивантаженого з пам'яті ключа може бути в БД і без дайджесту
+            lazy_record = self.lazy and record_key[0] in (USER, CHAT)
+            if not lazy_record and record_key not in self._digests and record_key not in self._dirty:
+                return
+            self._dirty[record_key] = None
+        else:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            if record_key not in self._dirty and self._digests.get(record_key) == _digest(data):
+                return
+            self._dirty[record_key] = data
+        if self._write_task is None or self._write_task.done():
+            self._write_task = asyncio.get_running_loop().create_task(self._write_after_delay())
+
+    async def update_user_data(self, user_id: int, data: dict) -> None:
+        if user_id not in self.unsynced[USER]:
+            self._stage((USER, "", str(user_id)), data)
+
+    async def update_chat_data(self, chat_id: int, data: dict) -> None:
+        if chat_id not in self.unsynced[CHAT]:
+            self._stage((CHAT, "", str(chat_id)), data)
+
+    async def update_bot_data(self, data) -> None:
+        self._stage((BOT, "", ""), data)
+
+    async def update_callback_data(self, data) -> None:
+        self._stage((CALLBACK, "", ""), data)
+
+    async def update_conversation(self, name: str, key: tuple, new_state: object | None) -> None:
+        self._stage((CONVERSATION, name, _conversation_key(key)), new_state)
+
+    def stage_records(self, kind: str, records: dict[int, object]) -> None:
+        """
+        Ставить у буфер кілька записів user_data / chat_data одним викликом (вивантаження робочого набору).
+        Значення серіалізуються одразу, тож копіювати їх перед викликом не треба; незмінені пропускаються за дайджестом.
+        """
+        unsynced = self.unsynced[kind]
+        for key, value in records.items():
+            if key not in unsynced:
+                self._stage((kind, "", str(key)), value)
+
+    def forget(self, kind: str, key: int) -> None:
+        """Запис вивантажено з пам'яті: дайджест прибирається і з'явиться знову при наступному читанні."""
+        self._digests.pop((kind, "", str(key)), None)
+
+    async def drop_user_data(self, user_id: int) -> None:
+        if user_id not in self.unsynced[USER]:
+            self._stage((USER, "", str(user_id)), None)
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        if chat_id not in self.unsynced[CHAT]:
+            self._stage((CHAT, "", str(chat_id)), None)
+
+    async def refresh_user_data(self, user_id: int, user_data: dict) -> None:
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data) -> None:
+        pass
+
+    async def _write_after_delay(self):
+        # Усі update_* одного циклу PTB встигають потрапити в буфер до запису
+        await asyncio.sleep(self._write_delay)
+        await self._write_dirty()
+
+    async def _write_dirty(self) -> bool:
+        async with self._write_lock:
+            batch, self._dirty = self._dirty, {}
+            if not batch:
+                return True
+            loop = asyncio.get_running_loop()
+            started = time.perf_counter()
+            try:
+                await loop.run_in_executor(get_db_executor(), partial(self.write_batch, batch))
+            except Exception as e:
+                # Новіші зміни, що прийшли під час запису, мають пріоритет
+                for record_key, data in batch.items():
+                    self._dirty.setdefault(record_key, data)
+                logger.error('не вдалося записати %s рядків, повтор у наступному циклі: %s', len(batch), e)
+                return False
+            _write_seconds.observe(time.perf_counter() - started)
+            for record_key, data in batch.items():
+                if data is None:
+                    self._digests.pop(record_key, None)
+                else:
+                    self._digests[record_key] = _digest(data)
+            return True
+
+    def write_batch(self, batch: dict[RecordKey, bytes | None]):
+        """Записує пакет змін однією транзакцією (синхронно, в контексті застосунку)."""
+        table = BotPersistenceRecord.__table__
+        now = datetime.utcnow()
+        upserts = [
+            {"kind": kind, "namespace": namespace, "key": key, "data": data, "updated_at": now}
+            for (kind, namespace, key), data in batch.items() if data is not None
+        ]
+        deletions: dict[tuple[str, str], list[str]] = {}
+        for (kind, namespace, key), data in batch.items():
+            if data is None:
+                deletions.setdefault((kind, namespace), []).append(key)
+
+        with self._flask_app.app_context():
+            engine = db.engine
+            insert_for_dialect = _UPSERT_BY_DIALECT.get(engine.dialect.name)
+            with engine.begin() as connection:
+                if insert_for_dialect is None:
+                    # Без ON CONFLICT: старі версії видаляються й вставляються нові в тій самій транзакції
+                    replaced: dict[tuple[str, str], list[str]] = {}
+                    for row in upserts:
+                        replaced.setdefault((row["kind"], row["namespace"]), []).append(row["key"])
+                    self._delete(connection, replaced)
+                self._delete(connection, deletions)
+                for start in range(0, len(upserts), self._batch_size):
+                    chunk = upserts[start:start + self._batch_size]
+                    if insert_for_dialect is None:
+                        connection.execute(insert(table), chunk)
+                        continue
+                    stmt = insert_for_dialect(table)
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=["kind", "namespace", "key"],
+                        set_={"data": stmt.excluded.data, "updated_at": stmt.excluded.updated_at}
+                    )
+                    connection.execute(stmt, chunk)
+        _rows_written.inc(len(upserts), op="upsert")
+        _rows_written.inc(sum(len(keys) for keys in deletions.values()), op="delete")
+
+    def _delete(self, connection, deletions: dict[tuple[str, str], list[str]]):
+        table = BotPersistenceRecord.__table__
+        for (kind, namespace), keys in deletions.items():
+            for start in range(0, len(keys), self._batch_size):
+                connection.execute(delete(table).where(
+                    table.c.kind == kind, table.c.namespace == namespace,
+                    table.c.key.in_(keys[start:start + self._batch_size])))
+
+    async def flush(self) -> bool:
+        """Записує всі накопичені зміни; False — запис не вдався, зміни лишились у буфері для повтору."""
+        task = self._write_task
+        if task is not None and not task.done():
+            await task
+        return await self._write_dirty()
+
+    def is_unsaved(self, kind: str, key: int) -> bool:
+        """Чи є у user_data / chat_data зміни, яких ще немає в БД (або запис не вдалося прочитати з БД)."""
+        return (kind, "", str(key)) in self._dirty or key in self.unsynced[kind]
+
+    # --- Міграція ---
+
+    def import_pickle_file(self, filepath: str) -> int:
+        """Переносить дані з файлу PicklePersistence (single_file) у таблицю; повертає кількість рядків."""
+        with open(filepath, "rb") as file:
+            data = pickle.load(file)
+
+        def dump(value) -> bytes:
+            return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+        batch: dict[RecordKey, bytes | None] = {}
+        for user_id, user_data in (data.get("user_data") or {}).items():
+            batch[(USER, "", str(user_id))] = dump(user_data)
+        for chat_id, chat_data in (data.get("chat_data") or {}).items():
+            batch[(CHAT, "", str(chat_id))] = dump(chat_data)
+        if data.get("bot_data"):
+            batch[(BOT, "", "")] = dump(data["bot_data"])
+        if data.get("callback_data") is not None:
+            batch[(CALLBACK, "", "")] = dump(data["callback_data"])
+        for name, states in (data.get("conversations") or {}).items():
+            for key, state in states.items():
+                if state is not None:
+                    batch[(CONVERSATION, name, _conversation_key(key))] = dump(state)
+        self.write_batch(batch)
+        return len(batch)
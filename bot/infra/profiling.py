@@ -0,0 +1,178 @@
+import logging
+import cProfile
+import collections
+import io
+import os
+import pstats
+import signal
+import threading
+from datetime import datetime
+
+from bot.infra.sql_instrumentation import handler_in_frame, set_handler_profiler
+from config import PROFILE_DIR, PROFILE_TOP_N, PROFILE_SAMPLE_INTERVAL_SEC
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("sampling", "cprofile")
+
+_session: "ProfilingSession | None" = None
+
+
+def _is_idle(frame) -> bool:
+    """Цикл подій чекає на введення-виведення (selectors.*.select), а не виконує код."""
+    return frame.f_code.co_name == "select" and frame.f_code.co_filename.endswith("selectors.py")
+
+
+def _describe(code) -> str:
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+
+class ProfilingSession:
+    """
+    Сеанс профілювання обробників у циклі подій бота.
+
+      * cprofile — cProfile увімкнено на весь сеанс (targets=None, увесь диспетчер) або лише
+        поки виконується хоча б один із вказаних обробників; у звіт потрапляє й код інших
+        оновлень, що виконувались між їхніми await;
+      * sampling — таймер SIGPROF кожні PROFILE_SAMPLE_INTERVAL_SEC процесорного часу; обробник
+        сигналу виконується в головному потоці (де працює цикл подій) і отримує кадр, що виконується
+        саме зараз. Знімок враховується, якщо в стеку вказаний обробник (для targets=None — будь-який
+        код, окрім очікування I/O). Накладні витрати не залежать від кількості викликів.
+        Знімки з окремого потоку тут не годяться: цикл віддає GIL у select(), тож потік бачив би
+        майже лише очікування.
+    """
+
+    def __init__(self, targets: frozenset[str] | None, seconds: float, mode: str = "sampling",
+                 top_n: int = PROFILE_TOP_N, sample_interval: float = PROFILE_SAMPLE_INTERVAL_SEC):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Невідомий режим профілювання: {mode}")
+        self.targets = targets
+        self.seconds = seconds
+        self.mode = mode
+        self.top_n = top_n
+        self.sample_interval = sample_interval
+        self.started_at = datetime.now()
+        self._profile = cProfile.Profile() if mode == "cprofile" else None
+        self._active = 0
+        self._previous_handler = None
+        self.samples = 0
+        self.cumulative: collections.Counter = collections.Counter()
+        self.own: collections.Counter = collections.Counter()
+        # згорнуті стеки (root;...;leaf -> кількість) для flame graph
+        self.stacks: collections.Counter = collections.Counter()
+
+    @property
+    def label(self) -> str:
+        return "all" if self.targets is None else ",".join(sorted(self.targets))
+
+    def start(self):
+        if self.mode == "cprofile":
+            if self.targets is None:
+                self._profile.enable()
+            else:
+                set_handler_profiler(self)
+        else:
+            if not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+                raise RuntimeError("Режим sampling потребує Unix і циклу подій у головному потоці; використайте cprofile")
+            self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+            signal.setitimer(signal.ITIMER_PROF, self.sample_interval, self.sample_interval)
+
+    def stop(self):
+        if self.mode == "cprofile":
+            set_handler_profiler(None)
+            self._profile.disable()
+        else:
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+
+    # Виклики з обгортки обробника (sql_instrumentation) у режимі cprofile з переліком обробників
+    def enter(self, handler: str):
+        if handler in self.targets:
+            if self._active == 0:
+                self._profile.enable()
+            self._active += 1
+
+    def exit(self, handler: str):
+        if handler in self.targets:
+            self._active -= 1
+            if self._active == 0:
+                self._profile.disable()
+
+    def _sample(self, signum, frame):
+        if frame is None or _is_idle(frame):
+            return
+        if self.targets is not None and handler_in_frame(frame) not in self.targets:
+            return
+        self.samples += 1
+        self.own[_describe(frame.f_code)] += 1
+        stack = []
+        while frame is not None:
+            stack.append(frame.f_code)
+            frame = frame.f_back
+        for name in {_describe(code) for code in stack}:
+            self.cumulative[name] += 1
+        self.stacks[";".join(code.co_name for code in reversed(stack))] += 1
+
+    def report(self) -> str:
+        header = (f"Профіль: {self.label}, режим {self.mode}, {self.seconds:g} с "
+                  f"з {self.started_at:%Y-%m-%d %H:%M:%S}\n")
+        if self.mode == "cprofile":
+            stream = io.StringIO()
+            stats = pstats.Stats(self._profile, stream=stream)
+            stats.sort_stats("cumulative").print_stats(self.top_n)
+            return header + stream.getvalue()
+        lines = [header, f"Знімків: {self.samples} (кожні {self.sample_interval * 1000:g} мс)\n",
+                 f"{'cum %':>7} {'cum':>7} {'own':>7}  функція"]
+        for name, count in self.cumulative.most_common(self.top_n):
+            lines.append(f"{count * 100 / max(self.samples, 1):>6.1f}% {count:>7} {self.own[name]:>7}  {name}")
+        return "\n".join(lines) + "\n"
+
+    def save(self, directory: str = PROFILE_DIR) -> list[str]:
+        """Зберігає звіт (і .prof для cprofile або згорнуті стеки для sampling) у directory."""
+        if not directory:
+            return []
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f"profile-{self.started_at:%Y%m%d-%H%M%S}-{self.mode}")
+        paths = [base + ".txt"]
+        with open(paths[0], "w", encoding="utf-8") as f:
+            f.write(self.report())
+        if self.mode == "cprofile":
+            self._profile.dump_stats(base + ".prof")
+            paths.append(base + ".prof")
+        else:
+            with open(base + ".folded", "w", encoding="utf-8") as f:
+                f.writelines(f"{stack} {count}\n" for stack, count in self.stacks.items())
+            paths.append(base + ".folded")
+        return paths
+
+
+def parse_targets(spec: str) -> frozenset[str] | None:
+    """'all' — увесь диспетчер (None), інакше імена обробників через кому."""
+    if spec.strip().lower() == "all":
+        return None
+    return frozenset(name.strip() for name in spec.split(",") if name.strip())
+
+
+def current_session() -> ProfilingSession | None:
+    return _session
+
+
+def start_profiling(targets: frozenset[str] | None, seconds: float, mode: str = "sampling") -> ProfilingSession:
+    """Починає сеанс; одночасно може бути лише один. Викликати з потоку циклу подій (головного)."""
+    global _session
+    if _session is not None:
+        raise RuntimeError(f"Вже триває профілювання {_session.label}")
+    session = ProfilingSession(targets, seconds, mode)
+    session.start()
+    _session = session
+    logger.info('почато %s (%s) на %g с', session.label, mode, seconds)
+    return session
+
+
+def finish_profiling() -> ProfilingSession | None:
+    global _session
+    session, _session = _session, None
+    if session is not None:
+        session.stop()
+        logger.info('завершено %s', session.label)
+    return session
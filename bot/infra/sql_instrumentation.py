@@ -0,0 +1,275 @@
+import logging
+import collections
+import contextvars
+import functools
+import re
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from telegram.ext import ConversationHandler
+
+from bot.infra import metrics
+from config import SQL_N_PLUS_ONE_THRESHOLD, SQL_SLOWEST_STATEMENTS
+
+logger = logging.getLogger(__name__)
+
+BACKGROUND_HANDLER = "background"
+
+_current_handler: contextvars.ContextVar[str] = contextvars.ContextVar("sql_handler", default=BACKGROUND_HANDLER)
+# (обробник, нормалізований запит) -> кількість виконань у поточному оновленні
+_update_statements: contextvars.ContextVar[collections.Counter | None] = contextvars.ContextVar(
+    "sql_update_statements", default=None)
+
+_statements_total = metrics.counter(
+    "sql_statements_total", "Виконані SQL-запити за обробником", ("handler",))
+_statement_seconds = metrics.histogram(
+    "sql_statement_duration_seconds", "Тривалість SQL-запитів за обробником", ("handler",),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0))
+_n_plus_one_total = metrics.counter(
+    "sql_n_plus_one_total", "Оновлення, в яких обробник повторив однаковий запит понад поріг", ("handler",))
+_handler_updates_total = metrics.counter(
+    "handler_updates_total", "Оновлення, оброблені обробником, за результатом (ok/error)", ("handler", "result"))
+_handler_seconds = metrics.histogram(
+    "handler_duration_seconds", "Тривалість виконання обробника", ("handler",),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0))
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST_RE = re.compile(r"\(\s*(?:\?|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+))+\s*\)")
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize_statement(statement: str) -> str:
+    """Приводить запит до форми без літералів, щоб однакові запити з різними параметрами збігалися."""
+    normalized = _WHITESPACE_RE.sub(" ", statement).strip()
+    normalized = _STRING_RE.sub("?", normalized)
+    normalized = _NUMBER_RE.sub("?", normalized)
+    return _PLACEHOLDER_LIST_RE.sub("(...)", normalized)
+
+
+class _StatementStats:
+    __slots__ = ("count", "total_seconds", "max_seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+
+class SqlStats:
+    """Накопичена статистика SQL за обробниками та нормалізованими запитами."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_handler: dict[str, dict[str, _StatementStats]] = {}
+        self._n_plus_one: dict[str, dict[str, int]] = {}
+
+    def record(self, handler: str, statement: str, seconds: float):
+        with self._lock:
+            stats = self._by_handler.setdefault(handler, {}).get(statement)
+            if stats is None:
+                stats = self._by_handler[handler][statement] = _StatementStats()
+            stats.count += 1
+            stats.total_seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+
+    def record_n_plus_one(self, handler: str, statement: str, repeats: int):
+        with self._lock:
+            flagged = self._n_plus_one.setdefault(handler, {})
+            flagged[statement] = max(flagged.get(statement, 0), repeats)
+
+    def summary(self, top: int = SQL_SLOWEST_STATEMENTS) -> list[dict]:
+        """Обробники за сумарним часом у БД, з найповільнішими запитами та підозрами на N+1."""
+        with self._lock:
+            result = []
+            for handler, statements in self._by_handler.items():
+                slowest = sorted(statements.items(), key=lambda item: item[1].max_seconds, reverse=True)[:top]
+                result.append({
+                    "handler": handler,
+                    "count": sum(s.count for s in statements.values()),
+                    "total_seconds": sum(s.total_seconds for s in statements.values()),
+                    "slowest": [(statement, s.max_seconds, s.count) for statement, s in slowest],
+                    "n_plus_one": dict(self._n_plus_one.get(handler, {})),
+                })
+        result.sort(key=lambda item: item["total_seconds"], reverse=True)
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._by_handler.clear()
+            self._n_plus_one.clear()
+
+
+sql_stats = SqlStats()
+
+
+class _SlowestStatementsMetric(metrics._Metric):
+    """Найповільніші нормалізовані запити кожного обробника (обмежена кількість рядків)."""
+    kind = "gauge"
+
+    def samples(self) -> list[tuple[str, dict, float]]:
+        return [
+            (self.name, {"handler": item["handler"], "statement": statement[:200]}, seconds)
+            for item in sql_stats.summary()
+            for statement, seconds, _count in item["slowest"]
+        ]
+
+
+metrics.register(_SlowestStatementsMetric(
+    "sql_slowest_statement_seconds", "Максимальна тривалість найповільніших запитів обробника",
+    ("handler", "statement")))
+
+
+def current_handler() -> str:
+    return _current_handler.get()
+
+
+# Імена всіх інструментованих обробників (для перевірки аргументів /profile)
+_handler_names: set[str] = set()
+# Сеанс cProfile для окремих обробників (bot/infra/profiling.py): enter/exit навколо їхніх викликів
+_handler_profiler = None
+
+
+def handler_names() -> set[str]:
+    return set(_handler_names)
+
+
+def set_handler_profiler(profiler):
+    global _handler_profiler
+    _handler_profiler = profiler
+
+
+def _wrap_callback(callback, name: str):
+    @functools.wraps(callback)
+    async def wrapper(update, context, *args, **kwargs):
+        token = _current_handler.set(name)
+        profiler = _handler_profiler
+        if profiler is not None:
+            profiler.enter(name)
+        started = time.perf_counter()
+        result = "error"
+        try:
+            value = await callback(update, context, *args, **kwargs)
+            result = "ok"
+            return value
+        finally:
+            if profiler is not None:
+                profiler.exit(name)
+            _current_handler.reset(token)
+            if metrics.enabled:
+                _handler_seconds.observe(time.perf_counter() - started, handler=name)
+                _handler_updates_total.inc(handler=name, result=result)
+
+    wrapper.__sql_instrumented__ = True
+    _handler_names.add(name)
+    return wrapper
+
+
+_WRAPPER_CODE = _wrap_callback(lambda update, context: None, "").__code__
+_handler_names.discard("")
+
+
+def handler_in_frame(frame) -> str | None:
+    """Ім'я інструментованого обробника в стеку frame (для знімків стеку з іншого потоку)."""
+    while frame is not None:
+        if frame.f_code is _WRAPPER_CODE:
+            return frame.f_locals.get("name")
+        frame = frame.f_back
+    return None
+
+
+def _instrument_handler(handler):
+    if isinstance(handler, ConversationHandler):
+        inner = list(handler.entry_points) + list(handler.fallbacks)
+        for state_handlers in handler.states.values():
+            inner.extend(state_handlers)
+        for inner_handler in inner:
+            _instrument_handler(inner_handler)
+        return
+    # Обробники-маршрутизатори (PendingInputHandler, CallbackRouter) передають оновлення колбекам зі словника
+    routes = getattr(handler, "callbacks", None)
+    if isinstance(routes, dict):
+        for key, route in routes.items():
+            if not getattr(route, "__sql_instrumented__", False):
+                routes[key] = _wrap_callback(route, getattr(route, "__name__", str(key)))
+    callback = getattr(handler, "callback", None)
+    if callback is None or getattr(callback, "__sql_instrumented__", False):
+        return
+    handler.callback = _wrap_callback(callback, getattr(callback, "__name__", type(handler).__name__))
+
+
+def instrument_handlers(application):
+    """Обгортає колбеки всіх зареєстрованих обробників: SQL-запити приписуються їм, рахуються виклики й тривалість."""
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            _instrument_handler(handler)
+
+
+@asynccontextmanager
+async def track_update_statements(update):
+    """Middleware оновлення: рахує повтори однакових запитів і позначає ймовірні N+1."""
+    counts = collections.Counter()
+    token = _update_statements.set(counts)
+    try:
+        yield counts
+    finally:
+        _update_statements.reset(token)
+        for (handler, statement), repeats in counts.items():
+            if repeats > SQL_N_PLUS_ONE_THRESHOLD:
+                sql_stats.record_n_plus_one(handler, statement, repeats)
+                _n_plus_one_total.inc(handler=handler)
+                logger.warning('можливий N+1 в %s (оновлення %s): %s x %s',
+                               handler, getattr(update, 'update_id', None), repeats, statement[:200])
+
+
+def log_sql_summary(top: int = SQL_SLOWEST_STATEMENTS):
+    """Записує в лог зведення SQL-статистики за обробниками."""
+    summary = sql_stats.summary(top)
+    if not summary:
+        return
+    lines = ["зведення за обробниками"]
+    for item in summary:
+        lines.append(f"  {item['handler']}: {item['count']} запитів, {item['total_seconds'] * 1000:.1f} мс")
+        for statement, seconds, count in item["slowest"]:
+            lines.append(f"    {seconds * 1000:.1f} мс (x{count}): {statement[:200]}")
+        for statement, repeats in item["n_plus_one"].items():
+            lines.append(f"    N+1 (до {repeats} повторів): {statement[:200]}")
+    logger.info("\n".join(lines))
+
+
+async def log_sql_summary_job(context):
+    """Періодична задача JobQueue для log_sql_summary."""
+    log_sql_summary()
+
+
+# Час початку зберігається в контексті виконання запиту: він живе, лише поки виконується запит,
+# тож після помилки (after_cursor_execute не викликається) нічого не накопичується на з'єднанні пулу
+_QUERY_START_ATTR = "_sql_instrumentation_start"
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        setattr(context, _QUERY_START_ATTR, time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, _QUERY_START_ATTR, None)
+    if started is None:
+        return
+    seconds = time.perf_counter() - started
+    handler = _current_handler.get()
+    normalized = normalize_statement(statement)
+
+    sql_stats.record(handler, normalized, seconds)
+    _statements_total.inc(handler=handler)
+    _statement_seconds.observe(seconds, handler=handler)
+
+    counts = _update_statements.get()
+    if counts is not None:
+        counts[(handler, normalized)] += 1
@@ -0,0 +1,150 @@
+import logging
+import contextvars
+from contextlib import asynccontextmanager
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import scoped_session
+from sqlalchemy.pool import Pool
+
+from bot.infra import metrics
+from bot.infra.db_executor import shared_db_scope
+from bot.models import db
+
+logger = logging.getLogger(__name__)
+
+_current_uow: contextvars.ContextVar["UnitOfWork | None"] = contextvars.ContextVar("unit_of_work", default=None)
+
+_update_statements = metrics.histogram(
+    "db_update_statements", "SQL-запитів на одне оновлення Telegram",
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100))
+_update_checkouts = metrics.histogram(
+    "db_update_connection_checkouts", "Видач з'єднань із пулу на одне оновлення Telegram",
+    buckets=(0, 1, 2, 3, 5, 10))
+_update_rollbacks = metrics.counter(
+    "db_update_rollbacks_total", "Оновлення, транзакцію яких було відкочено")
+
+
+class UnitOfWork:
+    """
+    Одна сесія на все оновлення Telegram. Транзакція — на кожен виклик run_db: наприкінці виклику
+    вона фіксується (або відкочується), і з'єднання повертається в пул, а не чекає на await обробника.
+    """
+
+    def __init__(self, app_context, update_id: int | None):
+        self.app_context = app_context
+        self.update_id = update_id
+        self.statements = 0
+        self.checkouts = 0
+        self.failed = False
+
+
+def current_unit_of_work() -> UnitOfWork | None:
+    return _current_uow.get()
+
+
+def commit_session(session, durable: bool = False):
+    """
+    Поза одиницею роботи — звичайний commit.
+    Всередині — лише flush (з'являються id, зміни видно наступним запитам),
+    а фіксує транзакцію одиниця роботи наприкінці виклику run_db.
+    durable — зміни, про які користувачу одразу відповідають «збережено»: commit одразу, щоб збій
+    коміту потрапив у обробку помилок самої логіки.
+    """
+    if _current_uow.get() is None:
+        session.commit()
+    elif durable:
+        _commit_keeping_objects(session)
+    else:
+        session.flush()
+
+
+def _commit_keeping_objects(session):
+    # Об'єкти не прострочуються: обробник читає їх уже в циклі подій, і запитів до БД там бути не має
+    target = session() if isinstance(session, scoped_session) else session
+    expire_on_commit, target.expire_on_commit = target.expire_on_commit, False
+    try:
+        target.commit()
+    finally:
+        target.expire_on_commit = expire_on_commit
+
+
+def rollback_session(session):
+    """Відкат; в одиниці роботи також позначає, що в кінці оновлення треба відкотити все."""
+    uow = _current_uow.get()
+    if uow is not None:
+        uow.failed = True
+    session.rollback()
+
+
+def close_session(session):
+    """В одиниці роботи сесію (та її identity map) закриває middleware, а не окрема функція логіки."""
+    if _current_uow.get() is None:
+        session.close()
+
+
+def _end_call(succeeded: bool):
+    """Кінець виклику run_db в одиниці роботи (у потоці пулу): commit або rollback звільняє з'єднання."""
+    session = db.session
+    if not succeeded:
+        _current_uow.get().failed = True
+        session.rollback()
+        return
+    try:
+        _commit_keeping_objects(session)
+    except Exception:
+        _current_uow.get().failed = True
+        session.rollback()
+        raise
+
+
+@asynccontextmanager
+async def unit_of_work(update):
+    """
+    Middleware оновлення: відкриває контекст застосунку (і, отже, одну scoped-сесію),
+    який спільно використовують усі виклики run_db обробників. Кожен виклик завершується
+    commit (або rollback після помилки), тож між await обробника з'єднання з пулу не тримається:
+    інакше оновлення, що тримають з'єднання, чекали б на вільний потік пулу БД, а потоки — на з'єднання.
+    """
+    app_context = current_app._get_current_object().app_context()
+    uow = UnitOfWork(app_context, getattr(update, "update_id", None))
+    token = _current_uow.set(uow)
+    app_context.push()
+    try:
+        with shared_db_scope(app_context, _end_call):
+            try:
+                yield uow
+            except Exception:
+                uow.failed = True
+                raise
+    finally:
+        # Останній pop запускає teardown Flask-SQLAlchemy, який закриває сесію
+        app_context.pop()
+        _current_uow.reset(token)
+        _record(uow)
+
+
+def _record(uow: UnitOfWork):
+    if uow.failed:
+        _update_rollbacks.inc()
+    if not uow.statements and not uow.checkouts:
+        return
+    _update_statements.observe(uow.statements)
+    _update_checkouts.observe(uow.checkouts)
+    logger.debug("оновлення %s: %s SQL-запитів, %s видач з'єднань, %s",
+                 uow.update_id, uow.statements, uow.checkouts, 'rollback' if uow.failed else 'commit')
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    uow = _current_uow.get()
+    if uow is not None:
+        uow.statements += 1
+
+
+@event.listens_for(Pool, "checkout")
+def _count_checkout(dbapi_connection, connection_record, connection_proxy):
+    uow = _current_uow.get()
+    if uow is not None:
+        uow.checkouts += 1
@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from bot.infra import metrics
+from config import UPDATE_CONCURRENCY
+
+# Семафор BaseUpdateProcessor.process_update береться ще до черги користувача: з реальним
+# лімітом оновлення одного «гарячого» користувача займали б усі слоти, чекаючи одне на одне.
+# Тому там фактично без обмеження, а ліміт (concurrency_limit) застосовується вже після черги.
+_UNBOUNDED = 1_000_000
+
+_wait_seconds = metrics.histogram(
+    "update_wait_seconds", "Очікування оновлення перед обробкою: черга користувача/чату (key) та вільний слот (slot)",
+    ("stage",), buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0))
+_queue_depth = metrics.gauge("update_queue_depth", "Оновлення, що чекають на свою чергу або вільний слот")
+_in_flight = metrics.gauge("update_in_flight", "Оновлення, що обробляються зараз")
+
+
+def update_keys(update: object) -> tuple:
+    """Ключі впорядкування: оновлення з тим самим користувачем або чатом обробляються по черзі."""
+    if not isinstance(update, Update):
+        return ()
+    keys = []
+    if update.effective_user is not None:
+        keys.append(("user", update.effective_user.id))
+    if update.effective_chat is not None:
+        keys.append(("chat", update.effective_chat.id))
+    return tuple(keys)
+
+
+class KeyedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Паралельна обробка оновлень різних користувачів (не більше concurrency_limit одночасно)
+    зі збереженням порядку для одного користувача/чату: розмови ConversationHandler і
+    user_data['pomodoro'] бачать оновлення строго в порядку надходження.
+
+    Черга ключа — ланцюжок: кожне оновлення чекає завершення попереднього з тим самим ключем.
+    """
+
+    def __init__(self, max_concurrent_updates: int = UPDATE_CONCURRENCY):
+        if max_concurrent_updates < 1:
+            raise ValueError("max_concurrent_updates має бути додатним")
+        super().__init__(_UNBOUNDED)
+        self.concurrency_limit = max_concurrent_updates
+        self._slots = asyncio.BoundedSemaphore(max_concurrent_updates)
+        # ключ -> подія завершення останнього поставленого в чергу оновлення з цим ключем
+        self._tails: dict[tuple, asyncio.Event] = {}
+        self._waiting = 0
+        self._running = 0
+        _queue_depth.set_function(lambda: self._waiting)
+        _in_flight.set_function(lambda: self._running)
+
+    async def do_process_update(self, update: object, coroutine) -> None:
+        keys = update_keys(update)
+        # Без await до цього місця: черги ключів будуються в порядку надходження оновлень
+        predecessors = {self._tails[key] for key in keys if key in self._tails}
+        done = asyncio.Event()
+        for key in keys:
+            self._tails[key] = done
+
+        self._waiting += 1
+        waiting = True
+        try:
+            started = time.perf_counter()
+            for predecessor in predecessors:
+                await predecessor.wait()
+            queued = time.perf_counter()
+            _wait_seconds.observe(queued - started, stage="key")
+            async with self._slots:
+                _wait_seconds.observe(time.perf_counter() - queued, stage="slot")
+                self._waiting -= 1
+                waiting = False
+                self._running += 1
+                try:
+                    await coroutine
+                finally:
+                    self._running -= 1
+        finally:
+            if waiting:
+                self._waiting -= 1
+                coroutine.close()
+            done.set()
+            for key in keys:
+                if self._tails.get(key) is done:
+                    del self._tails[key]
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
@@ -0,0 +1,126 @@
+import logging
+import asyncio
+import hmac
+import json
+import secrets
+import signal
+import time
+
+from aiohttp import web
+from telegram import Update
+
+from bot.infra import metrics
+from bot.infra.metrics_server import add_observability_routes
+from config import (
+    WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_SECRET_TOKEN, WEBHOOK_MAX_CONNECTIONS,
+)
+
+logger = logging.getLogger(__name__)
+
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+_requests_total = metrics.counter(
+    "webhook_requests_total", "Запити Telegram до вебхука за результатом", ("status",))
+_request_seconds = metrics.histogram(
+    "webhook_request_seconds", "Час прийому оновлення вебхуком (до постановки в чергу)",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1))
+_update_queue_size = metrics.gauge("webhook_update_queue_size", "Оновлення в черзі Application, ще не взяті в обробку")
+
+
+class WebhookServer:
+    """
+    HTTP-сервер на aiohttp у циклі подій бота: приймає оновлення від Telegram на WEBHOOK_PATH
+    (з перевіркою секретного токена) і кладе їх у application.update_queue;
+    також віддає /health та /metrics.
+    """
+
+    def __init__(self, application, listen: str = WEBHOOK_LISTEN, port: int = WEBHOOK_PORT,
+                 path: str = WEBHOOK_PATH, secret_token: str = WEBHOOK_SECRET_TOKEN):
+        self.application = application
+        self.listen = listen
+        self.port = port
+        self.path = path
+        # Без явного токена генерується випадковий — перевірка запитів діє завжди
+        self.secret_token = secret_token or secrets.token_urlsafe(32)
+        self._runner: web.AppRunner | None = None
+        _update_queue_size.set_function(lambda: application.update_queue.qsize())
+
+    def create_app(self) -> web.Application:
+        web_app = web.Application()
+        web_app.router.add_post(self.path, self._receive_update)
+        add_observability_routes(web_app, self.application)
+        return web_app
+
+    async def _receive_update(self, request: web.Request) -> web.Response:
+        started = time.perf_counter()
+        if not hmac.compare_digest(request.headers.get(SECRET_TOKEN_HEADER, ""), self.secret_token):
+            _requests_total.inc(status="forbidden")
+            return web.Response(status=403)
+        try:
+            update = Update.de_json(await request.json(), self.application.bot)
+        except (json.JSONDecodeError, TypeError, KeyError, ValueError) as e:
+            logger.error('некоректне оновлення: %s', e)
+            _requests_total.inc(status="bad_request")
+            return web.Response(status=400)
+        await self.application.update_queue.put(update)
+        _requests_total.inc(status="ok")
+        _request_seconds.observe(time.perf_counter() - started)
+        return web.Response()
+
+    async def start(self):
+        self._runner = web.AppRunner(self.create_app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.listen, self.port).start()
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def serve_webhook(application, server: WebhookServer, webhook_url: str = WEBHOOK_URL,
+                        max_connections: int = WEBHOOK_MAX_CONNECTIONS, stop_event: asyncio.Event | None = None,
+                        register: bool = True):
+    """
+    Запускає Application та сервер вебхука; працює, доки не встановлено stop_event.
+    Як і run_polling, викликає post_init, post_stop і post_shutdown застосунку.
+    """
+    stop_event = stop_event or asyncio.Event()
+    async with application:
+        if application.post_init:
+            await application.post_init(application)
+        await application.start()
+        await server.start()
+        if register:
+            await application.bot.set_webhook(
+                url=webhook_url.rstrip("/") + server.path,
+                secret_token=server.secret_token,
+                max_connections=max_connections,
+                allowed_updates=Update.ALL_TYPES,
+            )
+        logger.info('слухаю %s:%s%s, max_connections=%s', server.listen, server.port, server.path, max_connections)
+        try:
+            await stop_event.wait()
+        finally:
+            await server.stop()
+            await application.stop()
+            if application.post_stop:
+                await application.post_stop(application)
+    if application.post_shutdown:
+        await application.post_shutdown(application)
+
+
+def run_webhook(application, webhook_url: str = WEBHOOK_URL):
+    """Блокуючий аналог Application.run_polling() для режиму вебхука (SIGINT/SIGTERM зупиняють)."""
+    if not webhook_url:
+        raise RuntimeError("Для BOT_MODE=webhook потрібно задати WEBHOOK_URL")
+    # Той самий цикл подій, що й у run_polling: на ньому також працює воркер нагадувань
+    loop = asyncio.get_event_loop()
+    stop_event = asyncio.Event()
+    for stop_signal in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(stop_signal, stop_event.set)
+        except NotImplementedError:
+            pass
+    loop.run_until_complete(serve_webhook(application, WebhookServer(application), webhook_url,
+                                          stop_event=stop_event))
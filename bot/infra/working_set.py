@@ -0,0 +1,204 @@
+import logging
+import time
+from contextlib import asynccontextmanager
+from types import MappingProxyType
+
+from bot.infra import metrics
+from bot.infra.persistence import SQLPersistence, USER, CHAT
+from bot.infra.write_ahead import DB_OUTAGE_ERRORS, db_breaker
+from config import WORKING_SET_IDLE_TTL_SEC, WORKING_SET_MAX_ENTRIES
+
+logger = logging.getLogger(__name__)
+
+_loads_total = metrics.counter(
+    "working_set_loads_total", "Підвантаження записів з БД у робочий набір", ("kind", "mode"))
+_evictions_total = metrics.counter(
+    "working_set_evictions_total", "Вивантажені з пам'яті записи", ("kind", "reason"))
+
+
+class WorkingSet(dict):
+    """
+    Заміна defaultdict для Application._user_data / _chat_data.
+    Запам'ятовує час останнього звернення до кожного запису; відсутній запис
+    підвантажується з persistence (або створюється порожнім), як у defaultdict.
+    Якщо БД недоступна, запис створюється порожнім і позначається в unsynced: persistence
+    не пише його поверх збереженого, а наступне оновлення пробує прочитати справжній.
+    """
+
+    def __init__(self, kind: str, factory, loader, unsynced: set | None = None):
+        super().__init__()
+        self.kind = kind
+        self._factory = factory
+        self._loader = loader
+        self._last_access: dict[int, float] = {}
+        self.unsynced = unsynced if unsynced is not None else set()
+
+    def __getitem__(self, key):
+        self._last_access[key] = time.monotonic()
+        return super().__getitem__(key)
+
+    def __setitem__(self, key, value):
+        self._last_access[key] = time.monotonic()
+        super().__setitem__(key, value)
+
+    def __missing__(self, key):
+        # Зазвичай запис уже підвантажено middleware; тут — блокуюче читання як запасний шлях
+        try:
+            value = self._loader(self.kind, key)
+        except DB_OUTAGE_ERRORS as e:
+            logger.warning('%s %s не прочитано, БД недоступна: %s', self.kind, key, e)
+            self.unsynced.add(key)
+            value = None
+        _loads_total.inc(kind=self.kind, mode="sync")
+        if value is None:
+            value = self._factory()
+        self[key] = value
+        return value
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def pop(self, key, *default):
+        self._last_access.pop(key, None)
+        self.unsynced.discard(key)
+        return super().pop(key, *default)
+
+    def adopt(self, key, value):
+        """Додає підвантажений запис, якщо за час читання його не створили інакше (або замінює тимчасовий)."""
+        if key not in self or key in self.unsynced:
+            self.unsynced.discard(key)
+            self[key] = self._factory() if value is None else value
+
+    def adopt_unsynced(self, key):
+        """Тимчасовий порожній запис на час недоступності БД."""
+        if key not in self:
+            self.unsynced.add(key)
+            self[key] = self._factory()
+
+    def last_access(self, key) -> float:
+        return self._last_access.get(key, 0.0)
+
+    def peek(self, key):
+        """Значення без оновлення часу звернення."""
+        return dict.get(self, key)
+
+    def eviction_candidates(self, idle_ttl: float, max_entries: int) -> list[tuple[int, str]]:
+        """Ключі, неактивні довше idle_ttl, плюс найдавніші понад max_entries (LRU)."""
+        by_age = sorted(self.keys(), key=self.last_access)
+        cutoff = time.monotonic() - idle_ttl
+        idle = [(key, "idle") for key in by_age if self.last_access(key) < cutoff]
+        overflow = len(self) - len(idle) - max_entries
+        if overflow > 0:
+            idle_keys = {key for key, _reason in idle}
+            idle.extend((key, "lru") for key in [k for k in by_age if k not in idle_keys][:overflow])
+        return idle
+
+
+class _ResidentMetric(metrics._Metric):
+    kind = "gauge"
+
+    def __init__(self, manager: "WorkingSetManager"):
+        super().__init__("working_set_resident", "Записи user_data / chat_data у пам'яті", ("kind",))
+        self._manager = manager
+
+    def samples(self) -> list[tuple[str, dict, float]]:
+        return [(self.name, {"kind": data.kind}, float(len(data))) for data in self._manager.working_sets()]
+
+
+class WorkingSetManager:
+    """Підвантаження записів перед обробкою оновлення та періодичне вивантаження неактивних."""
+
+    def __init__(self, application, persistence: SQLPersistence,
+                 idle_ttl: float = WORKING_SET_IDLE_TTL_SEC, max_entries: int = WORKING_SET_MAX_ENTRIES):
+        self.application = application
+        self.persistence = persistence
+        self.idle_ttl = idle_ttl
+        self.max_entries = max_entries
+        metrics.register(_ResidentMetric(self))
+
+    def working_sets(self) -> list[WorkingSet]:
+        return [data for data in (self.application._user_data, self.application._chat_data)
+                if isinstance(data, WorkingSet)]
+
+    @asynccontextmanager
+    async def preload(self, update):
+        """Middleware оновлення: читає user_data / chat_data з БД у пулі потоків, а не в циклі подій."""
+        user = getattr(update, "effective_user", None)
+        chat = getattr(update, "effective_chat", None)
+        for data, key in ((self.application._user_data, user.id if user else None),
+                          (self.application._chat_data, chat.id if chat else None)):
+            if key is None or not isinstance(data, WorkingSet) or (key in data and key not in data.unsynced):
+                continue
+            # Недоступна БД не зупиняє обробку: запис журналу чи завдання збережеться в локальному журналі
+            if db_breaker.allow():
+                try:
+                    value = await self.persistence.load_record(data.kind, key)
+                except Exception as e:
+                    db_breaker.record(e)
+                    if not isinstance(e, DB_OUTAGE_ERRORS):
+                        raise
+                    logger.warning('%s %s не прочитано, БД недоступна: %s', data.kind, key, e)
+                else:
+                    db_breaker.record_success()
+                    data.adopt(key, value)
+                    _loads_total.inc(kind=data.kind, mode="preload")
+                    continue
+            data.adopt_unsynced(key)
+        yield
+
+    def _pinned(self) -> tuple[set[int], set[int]]:
+        """Користувачі й чати з активними задачами JobQueue (таймери Pomodoro) не вивантажуються."""
+        users, chats = set(), set()
+        job_queue = self.application.job_queue
+        if job_queue is not None:
+            for job in job_queue.jobs():
+                if job.user_id is not None:
+                    users.add(job.user_id)
+                if job.chat_id is not None:
+                    chats.add(job.chat_id)
+        return users, chats
+
+    async def evict_idle(self, context=None):
+        """Зберігає неактивні записи в БД і прибирає їх із пам'яті."""
+        pinned_users, pinned_chats = self._pinned()
+        application = self.application
+        plans = []
+        for data, pinned, pending in (
+                (application._user_data, pinned_users, application._user_ids_to_be_updated_in_persistence),
+                (application._chat_data, pinned_chats, application._chat_ids_to_be_updated_in_persistence)):
+            if not isinstance(data, WorkingSet):
+                continue
+            # Записи, що ще чекають на звичайний цикл persistence, не чіпаємо до його завершення
+            candidates = [(key, reason) for key, reason in data.eviction_candidates(self.idle_ttl, self.max_entries)
+                          if key not in pinned and key not in pending]
+            self.persistence.stage_records(data.kind, {key: data.peek(key) for key, _reason in candidates})
+            plans.append((data, candidates, time.monotonic()))
+
+        if not any(candidates for _data, candidates, _started in plans):
+            return
+        if not await self.persistence.flush():
+            logger.warning('записи робочого набору не збережено в БД, вивантаження відкладено')
+
+        for data, candidates, started in plans:
+            for key, reason in candidates:
+                # До запису могло надійти нове оновлення від користувача — тоді лишаємо в пам'яті;
+                # незбережене в БД (збій запису, недоступна БД) теж лишається до наступного циклу
+                if key in data and data.last_access(key) < started and not self.persistence.is_unsaved(data.kind, key):
+                    data.pop(key)
+                    self.persistence.forget(data.kind, key)
+                    _evictions_total.inc(kind=data.kind, reason=reason)
+
+
+def install_working_set(application, persistence: SQLPersistence) -> WorkingSetManager:
+    """
+    Замінює сховища user_data / chat_data застосунку на WorkingSet.
+    Викликати до application.initialize(); persistence має бути створено з lazy=True.
+    """
+    application._user_data = WorkingSet(USER, application.context_types.user_data, persistence.load_record_sync,
+                                        persistence.unsynced[USER])
+    application._chat_data = WorkingSet(CHAT, application.context_types.chat_data, persistence.load_record_sync,
+                                        persistence.unsynced[CHAT])
+    application.user_data = MappingProxyType(application._user_data)
+    application.chat_data = MappingProxyType(application._chat_data)
+    return WorkingSetManager(application, persistence)
@@ -0,0 +1,338 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import DateTime, delete, insert, select
+from sqlalchemy.exc import DBAPIError, OperationalError, InterfaceError, TimeoutError as PoolTimeoutError
+
+from bot.infra import metrics
+from bot.infra.db_executor import get_db_executor
+from bot.models import db, AppliedWrite
+from config import (
+    DB_CIRCUIT_FAILURE_THRESHOLD, DB_CIRCUIT_RESET_SEC, WAL_DIR, WAL_FSYNC_MS, WAL_REPLAY_BATCH_SIZE,
+    WAL_KEY_RETENTION_DAYS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Помилки, що означають недоступну БД (а не некоректні дані): з'єднання, мережа, тайм-аут пулу
+DB_OUTAGE_ERRORS = (OperationalError, InterfaceError, PoolTimeoutError)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+_STATE_VALUES = {CLOSED: 0, OPEN: 1, HALF_OPEN: 2}
+
+_circuit_state = metrics.gauge("db_circuit_state", "Стан запобіжника БД: 0 — closed, 1 — open, 2 — half_open")
+_circuit_transitions = metrics.counter("db_circuit_transitions_total", "Переходи запобіжника БД", ("state",))
+_wal_pending = metrics.gauge("wal_pending_records", "Записи в локальному журналі, що ще не перенесені в БД")
+_wal_records = metrics.counter(
+    "wal_records_total", "Записи локального журналу: buffered, replayed, duplicate, rejected", ("event",))
+_wal_fsync_seconds = metrics.histogram(
+    "wal_fsync_seconds", "Тривалість дозапису пакета в локальний журнал разом з fsync",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5))
+
+
+class CircuitBreaker:
+    """
+    Запобіжник звернень до БД: після failure_threshold збоїв поспіль (closed → open) запити не
+    робляться reset_seconds; потім один пробний (half_open): успіх замикає запобіжник, збій знову
+    розмикає. Кожен, хто отримав True від allow(), має повідомити результат через record(); якщо
+    результат пробного запиту так і не надійшов, через reset_seconds дозволяється наступний.
+    Викликається і з циклу подій, і з потоків пулу БД.
+    """
+
+    def __init__(self, failure_threshold: int = DB_CIRCUIT_FAILURE_THRESHOLD, reset_seconds: float = DB_CIRCUIT_RESET_SEC):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+        _circuit_state.set_function(lambda: _STATE_VALUES[self.state])
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            self.state = state
+            _circuit_transitions.inc(state=state)
+            logger.warning('запобіжник БД: %s', state)
+
+    def allow(self) -> bool:
+        """Чи можна звертатися до БД; у half_open дозволено лише один пробний запит за reset_seconds."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                # Відлік для half_open — від початку проби: загублений результат не блокує запобіжник назавжди
+                self._opened_at = time.monotonic()
+                self._set_state(HALF_OPEN)
+                return True
+            return False
+
+    def record(self, error: BaseException | None):
+        """
+        Результат звернення до БД: помилка недоступності — збій; відповідь БД, зокрема відмова
+        в запиті (DBAPIError поза DB_OUTAGE_ERRORS), — успіх. Інші помилки виникли до звернення або
+        після нього, тож нічого не кажуть про БД і рахуються як збій, щоб не лишити пробу без результату.
+        """
+        if error is None or (isinstance(error, DBAPIError) and not isinstance(error, DB_OUTAGE_ERRORS)):
+            self.record_success()
+        else:
+            self.record_failure()
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._set_state(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} не серіалізується в журнал")
+
+
+def _fsync_dir(directory: str):
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(directory, os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class WriteAheadLog:
+    """
+    Локальний журнал записів, які не вдалося (або не можна через розімкнений запобіжник) записати в БД.
+    Рядок файлу — JSON {key, table, row}; key — ключ ідемпотентності. Дозапис і fsync робляться
+    пакетами: append() чекає на fsync пакета, у який потрапив його запис. replay() переносить записи
+    в БД у порядку надходження разом із ключами в applied_writes, тож повторне перенесення після
+    збою посеред прогону нічого не дублює. Під час перенесення журнал перейменовується, а нові записи
+    пишуться в новий файл.
+    """
+
+    def __init__(self, directory: str = WAL_DIR, fsync_ms: float = WAL_FSYNC_MS,
+                 batch_size: int = WAL_REPLAY_BATCH_SIZE):
+        self.directory = directory
+        self.fsync_seconds = fsync_ms / 1000
+        self.batch_size = batch_size
+        self.active_path = os.path.join(directory, "wal.jsonl")
+        self.replaying_path = os.path.join(directory, "wal.replaying.jsonl")
+        self.rejected_path = os.path.join(directory, "wal.rejected.jsonl")
+        self._pending: int | None = None
+        self._buffer: list[tuple[str, asyncio.Future]] = []
+        self._flush_task: asyncio.Task | None = None
+        self._file_lock: asyncio.Lock | None = None
+        self._replay_lock: asyncio.Lock | None = None
+        self._flask_app = None
+        _wal_pending.set_function(lambda: self.pending)
+
+    @property
+    def pending(self) -> int:
+        """Записи, що ще не перенесені в БД (разом із тими, що зараз дописуються)."""
+        if self._pending is None:
+            self._pending = sum(self._count_lines(path) for path in (self.replaying_path, self.active_path))
+        return self._pending
+
+    @staticmethod
+    def _count_lines(path: str) -> int:
+        try:
+            with open(path, "rb") as file:
+                return sum(1 for line in file if line.strip())
+        except FileNotFoundError:
+            return 0
+
+    def _locks(self):
+        if self._file_lock is None:
+            self._file_lock = asyncio.Lock()
+            self._replay_lock = asyncio.Lock()
+
+    async def append(self, table_name: str, row: dict) -> str:
+        """Дописує рядок таблиці в журнал і чекає на fsync; повертає ключ ідемпотентності."""
+        self._locks()
+        key = str(uuid.uuid4())
+        line = json.dumps({"key": key, "table": table_name, "row": row}, ensure_ascii=False, default=_encode)
+        future = asyncio.get_running_loop().create_future()
+        self._pending = self.pending + 1
+        self._buffer.append((line, future))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_buffer())
+        try:
+            await future
+        except Exception:
+            self._pending -= 1
+            raise
+        _wal_records.inc(event="buffered")
+        return key
+
+    async def _flush_buffer(self):
+        # Записи, що надійшли за fsync_ms (і поки йде попередній fsync), потрапляють в один пакет
+        await asyncio.sleep(self.fsync_seconds)
+        while self._buffer:
+            batch, self._buffer = self._buffer, []
+            started = time.perf_counter()
+            try:
+                async with self._file_lock:
+                    await asyncio.to_thread(self._write_lines, [line for line, _future in batch])
+            except Exception as e:
+                logger.error('не вдалося дописати %s записів у локальний журнал: %s', len(batch), e)
+                for _line, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            _wal_fsync_seconds.observe(time.perf_counter() - started)
+            for _line, future in batch:
+                if not future.done():
+                    future.set_result(None)
+
+    def _write_lines(self, lines: list[str]):
+        created = not os.path.exists(self.active_path)
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.active_path, "a", encoding="utf-8") as file:
+            file.write("".join(line + "\n" for line in lines))
+            file.flush()
+            os.fsync(file.fileno())
+        if created:
+            _fsync_dir(self.directory)
+
+    async def replay(self) -> int:
+        """
+        Переносить записи журналу в БД; повертає кількість перенесених. Помилка недоступності БД
+        прокидається викликачу, а вже перенесені записи при наступному прогоні пропускаються за ключем.
+        """
+        self._locks()
+        async with self._replay_lock:
+            if not os.path.exists(self.replaying_path):
+                async with self._file_lock:
+                    if not os.path.exists(self.active_path):
+                        return 0
+                    os.replace(self.active_path, self.replaying_path)
+                    _fsync_dir(self.directory)
+            if self._flask_app is None:
+                self._flask_app = current_app._get_current_object()
+            loop = asyncio.get_running_loop()
+            replayed, processed = await loop.run_in_executor(get_db_executor(), self._replay_file)
+            os.remove(self.replaying_path)
+            self._pending = max(0, self.pending - processed)
+            return replayed
+
+    def _read_records(self) -> tuple[list[dict], int]:
+        """Записи файлу, що переноситься, і кількість його непорожніх рядків."""
+        records = []
+        lines = 0
+        with open(self.replaying_path, encoding="utf-8") as file:
+            for number, line in enumerate(file, 1):
+                if not line.strip():
+                    continue
+                lines += 1
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # Обірваний останній рядок (збій посеред дозапису) — запис не було підтверджено
+                    logger.error('пошкоджений рядок %s локального журналу пропущено', number)
+        return records, lines
+
+    def _replay_file(self) -> tuple[int, int]:
+        records, lines = self._read_records()
+        replayed = 0
+        with self._flask_app.app_context():
+            engine = db.engine
+            for start in range(0, len(records), self.batch_size):
+                chunk = records[start:start + self.batch_size]
+                with engine.begin() as connection:
+                    applied = self._applied_keys(connection, [record["key"] for record in chunk])
+                    for record in chunk:
+                        if record["key"] in applied:
+                            _wal_records.inc(event="duplicate")
+                            continue
+                        if self._apply(connection, record):
+                            replayed += 1
+            with engine.begin() as connection:
+                cutoff = datetime.utcnow() - timedelta(days=WAL_KEY_RETENTION_DAYS)
+                connection.execute(delete(AppliedWrite.__table__).where(AppliedWrite.__table__.c.applied_at < cutoff))
+        if replayed:
+            logger.info('з локального журналу перенесено в БД %s записів', replayed)
+        return replayed, lines
+
+    @staticmethod
+    def _applied_keys(connection, keys: list[str]) -> set[str]:
+        table = AppliedWrite.__table__
+        return set(connection.execute(select(table.c.key).where(table.c.key.in_(keys))).scalars())
+
+    def _apply(self, connection, record: dict) -> bool:
+        table = db.metadata.tables.get(record["table"])
+        if table is None:
+            self._reject(record, "невідома таблиця")
+            return False
+        row = dict(record["row"])
+        for name, value in row.items():
+            column = table.c.get(name)
+            if column is not None and isinstance(column.type, DateTime) and isinstance(value, str):
+                row[name] = datetime.fromisoformat(value)
+        # Точка збереження: некоректний рядок відкидається, не зриваючи решту пакета
+        savepoint = connection.begin_nested()
+        try:
+            connection.execute(insert(table).values(row))
+            connection.execute(insert(AppliedWrite.__table__).values(key=record["key"], applied_at=datetime.utcnow()))
+        except DB_OUTAGE_ERRORS:
+            savepoint.rollback()
+            raise
+        except Exception as e:
+            savepoint.rollback()
+            self._reject(record, str(e))
+            return False
+        savepoint.commit()
+        _wal_records.inc(event="replayed")
+        return True
+
+    def _reject(self, record: dict, reason: str):
+        logger.error('запис %s (%s) не вдалося перенести з локального журналу: %s', record["key"], record["table"], reason)
+        with open(self.rejected_path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        _wal_records.inc(event="rejected")
+
+
+db_breaker = CircuitBreaker()
+write_ahead_log = WriteAheadLog()
+
+
+def accepts_direct_writes() -> bool:
+    """
+    Чи писати в БД напряму. Поки в журналі є неперенесені записи, нові теж ідуть у журнал,
+    щоб зберегти порядок. Перевіряється лише стан запобіжника (без allow()), щоб не витратити
+    пробний запит half_open: пробу роблять перенесення журналу й підвантаження робочого набору.
+    """
+    return not write_ahead_log.pending and db_breaker.state == CLOSED
+
+
+async def buffer_write(table, row: dict) -> str:
+    """Записує рядок таблиці в локальний журнал замість БД; повертає ключ ідемпотентності."""
+    return await write_ahead_log.append(table.name, row)
+
+
+async def replay_write_ahead_job(context=None):
+    """Періодично переносить локальний журнал у БД, якщо запобіжник дозволяє звернення."""
+    if not write_ahead_log.pending or not db_breaker.allow():
+        return
+    try:
+        await write_ahead_log.replay()
+    except DB_OUTAGE_ERRORS as e:
+        db_breaker.record_failure()
+        logger.warning('перенесення локального журналу відкладено, БД недоступна: %s', e)
+        return
+    except Exception as e:
+        db_breaker.record(e)
+        logger.exception('Не вдалося перенести локальний журнал')
+        return
+    db_breaker.record_success()
@@ -0,0 +1,19 @@
+from bot.infra.callback_router import CallbackRoute
+
+# Формати callback_data кнопок поза розмовами; обробники прив'язуються в bot.bot.register_handlers.
+# Довге написання літерала — формат кнопок, надісланих раніше; коротке пишеться в нові кнопки.
+
+TASK_ACTION = CallbackRoute("task|t:{action}:{target:int}")
+TASKS_SUBMENU = CallbackRoute("tasks_submenu|ts:{action}")
+REMINDER_ACTION = CallbackRoute("{action:done|delay}:{task_id:int}")
+
+JOURNAL_VIEW_ALL = CallbackRoute("journal_submenu|js:view_all|all")
+MOOD_VIEW_ALL = CallbackRoute("mood_submenu|ms:view_all|all")
+ENTRIES_PAGE = CallbackRoute("{entry_config_key:journal|mood}:page|p:{page:int}")
+FILTERED_ENTRIES_PAGE = CallbackRoute(
+    "{entry_config_key:journal|mood}:{filter_type:tag|type}:{filter_value}:page|p:{page:int}")
+ENTRY_EXPAND = CallbackRoute("{entry_config_key:journal|mood}:x:{entry_id:int}")
+
+POMODORO_ACTION = CallbackRoute("pom|p:{action}")
+POMODORO_SUBMENU = CallbackRoute("pomodoro_submenu|ps:{action}")
+POMODORO_SUBMENU_TARGET = CallbackRoute("pomodoro_submenu|ps:{action}:{target:int}")
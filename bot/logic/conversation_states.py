@@ -0,0 +1,14 @@
+# Стани ConversationHandler. Окремо від модулів обробників: bot.bot.register_handlers будує розмови,
+# не імпортуючи самі обробники (вони завантажуються під час першого виклику).
+# Значення зберігаються в persistence, тому їх не можна змінювати.
+
+# Додавання завдання (bot.commands.tasks)
+(GET_TASK_DESCRIPTION,
+ ASK_PRIORITY,
+ AWAIT_POMODORO_CONFIRM,
+ AWAIT_REMINDER_CONFIRM,
+ GET_REMINDER_TIME_CONV) = range(5)
+
+# Записи журналу та настрою з меню (bot.commands.journaling)
+GET_JOURNAL_ENTRY_TEXT_FROM_MENU = range(20, 21)
+GET_MOOD_ENTRY_FROM_MENU = range(21, 22)
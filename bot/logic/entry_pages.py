@@ -0,0 +1,103 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from bot.infra import metrics
+from config import ENTRY_PAGES_CACHE_MAX_ENTRIES, ENTRY_PAGES_CACHE_TTL_SEC
+
+logger = logging.getLogger(__name__)
+
+_layout_lookups = metrics.counter(
+    "entry_page_layouts_total", "Звернення до кешу меж сторінок журналу й настрою: hit, miss, stale", ("result",))
+
+
+def pack_entries(lengths: list[int], budget: int, max_entries: int) -> int:
+    """
+    Скільки перших записів (lengths — видима довжина блоку кожного) вміщується в budget,
+    не більше max_entries. Щонайменше один: задовгий запис сторінка показує обрізаним.
+    """
+    used = 0
+    for count, length in enumerate(lengths[:max_entries]):
+        # +1 — перенос рядка між блоками
+        used += length + 1
+        if used > budget:
+            return max(count, 1)
+    return min(len(lengths), max_entries)
+
+
+class PageLayout:
+    """
+    Межі сторінок записів одного користувача з одним фільтром: starts[p] — зсув першого запису
+    сторінки p серед відфільтрованих (від найновіших). Межі дописуються в міру гортання; total —
+    кількість записів, з якою їх пораховано: інша кількість означає, що записи змінились.
+    """
+    __slots__ = ("total", "starts")
+
+    def __init__(self, total: int):
+        self.total = total
+        self.starts = [0]
+
+    def start(self, page: int) -> int | None:
+        return self.starts[page] if page < len(self.starts) else None
+
+    def has_next(self, page: int) -> bool:
+        return page + 1 < len(self.starts) and self.starts[page + 1] < self.total
+
+    def locate(self, page: int, first_page: int, lengths: list[int], budget: int, max_entries: int) -> slice | None:
+        """
+        Розкладає отримані записи (lengths, перший — початок сторінки first_page) на сторінки до page
+        включно і запам'ятовує межі. Повертає зріз lengths сторінки page; None — таких записів немає.
+        """
+        offset = self.starts[first_page]
+        index = 0
+        for current in range(first_page, page + 1):
+            if index >= len(lengths):
+                return None
+            count = pack_entries(lengths[index:], budget, max_entries)
+            next_start = offset + index + count
+            if current + 1 < len(self.starts):
+                self.starts[current + 1] = next_start
+                del self.starts[current + 2:]
+            else:
+                self.starts.append(next_start)
+            if current == page:
+                return slice(index, index + count)
+            index += count
+        return None
+
+
+class PageLayoutCache:
+    """Межі сторінок за (user_id, журнал, фільтр) у пам'яті процесу: LRU з обмеженою кількістю та TTL."""
+
+    def __init__(self, max_entries: int = ENTRY_PAGES_CACHE_MAX_ENTRIES, ttl_seconds: float = ENTRY_PAGES_CACHE_TTL_SEC):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._layouts: OrderedDict[tuple, tuple[float, PageLayout]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> PageLayout | None:
+        with self._lock:
+            item = self._layouts.get(key)
+            if item is None or item[0] <= time.monotonic():
+                self._layouts.pop(key, None)
+                _layout_lookups.inc(result="miss")
+                return None
+            self._layouts.move_to_end(key)
+            _layout_lookups.inc(result="hit")
+            return item[1]
+
+    def reset(self, key: tuple, total: int, stale: bool = False) -> PageLayout:
+        """Нова розкладка для key (stale — попередню відкинуто, бо кількість записів змінилась)."""
+        if stale:
+            _layout_lookups.inc(result="stale")
+        layout = PageLayout(total)
+        with self._lock:
+            self._layouts[key] = (time.monotonic() + self.ttl_seconds, layout)
+            self._layouts.move_to_end(key)
+            while len(self._layouts) > self.max_entries:
+                self._layouts.popitem(last=False)
+        return layout
+
+
+page_layouts = PageLayoutCache()
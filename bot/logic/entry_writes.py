@@ -0,0 +1,87 @@
+import logging
+
+from bot.infra.db_executor import run_db
+from bot.infra.group_commit import entry_writer
+from bot.infra.write_ahead import DB_OUTAGE_ERRORS, db_breaker, accepts_direct_writes, buffer_write
+from bot.logic.logic import (
+    build_generic_entry_logic, save_generic_entry_logic, entry_save_error_message, build_task_row, create_task_logic,
+)
+from bot.models import Task
+from config import ENTRY_WRITE_MODE
+
+logger = logging.getLogger(__name__)
+
+BUFFERED_NOTE = "База даних зараз недоступна: запис збережено й з'явиться в історії, щойно вона запрацює."
+
+
+async def save_entry(user_id: int, command: str, full_content_input: str,
+                     mode: str = ENTRY_WRITE_MODE) -> tuple[bool, str, list[str] | None, str | None]:
+    """
+    Зберігає запис журналу чи настрою; повертає (збережено, повідомлення для користувача, теги,
+    текст для аналізу настрою). Режим — див. ENTRY_WRITE_MODE: 'sync' — окремий коміт у транзакції
+    оновлення, 'group' — спільний коміт пакета, 'async' — підтвердження після постановки в чергу.
+    Якщо БД недоступна, запис потрапляє в локальний журнал і теж вважається збереженим.
+    """
+    if mode == "sync":
+        return await _save_entry_sync(user_id, command, full_content_input)
+
+    entry_model, entry_data, message_for_user, parsed_tags, text_for_analysis = build_generic_entry_logic(
+        user_id, command, full_content_input)
+    if entry_model is None:
+        return False, message_for_user, None, None
+    try:
+        buffered = await entry_writer.submit(entry_model.__table__, entry_data, wait=mode != "async")
+    except Exception as e:
+        logger.error('Не вдалося зберегти %s для user %s: %s', command, user_id, e)
+        return False, entry_save_error_message(command), None, None
+    if buffered:
+        message_for_user = f"{message_for_user}\n\n{BUFFERED_NOTE}"
+    return True, message_for_user, parsed_tags, text_for_analysis
+
+
+async def _save_entry_sync(user_id: int, command: str, full_content_input: str):
+    if accepts_direct_writes():
+        try:
+            created_entry, message_for_user, parsed_tags, text_for_analysis = await run_db(
+                save_generic_entry_logic, user_id, command, full_content_input)
+        except DB_OUTAGE_ERRORS as e:
+            db_breaker.record_failure()
+            logger.warning('БД недоступна, %s для user %s іде в локальний журнал: %s', command, user_id, e)
+        else:
+            db_breaker.record_success()
+            return created_entry is not None, message_for_user, parsed_tags, text_for_analysis
+
+    entry_model, entry_data, message_for_user, parsed_tags, text_for_analysis = build_generic_entry_logic(
+        user_id, command, full_content_input)
+    if entry_model is None:
+        return False, message_for_user, None, None
+    try:
+        await buffer_write(entry_model.__table__, entry_data)
+    except Exception as e:
+        logger.error('Не вдалося зберегти %s для user %s у локальний журнал: %s', command, user_id, e)
+        return False, entry_save_error_message(command), None, None
+    return True, f"{message_for_user}\n\n{BUFFERED_NOTE}", parsed_tags, text_for_analysis
+
+
+async def create_task(user_id: int, description: str, default_priority: int) -> tuple[int | None, bool]:
+    """
+    Створює завдання; повертає (id, відкладено). Якщо БД недоступна, завдання записується в локальний
+    журнал: id ще немає (None, True), а в списку воно з'явиться після перенесення журналу в БД.
+    (None, False) — завдання не збережено.
+    """
+    if accepts_direct_writes():
+        try:
+            new_task_id, _description = await run_db(create_task_logic, user_id, description, default_priority)
+        except DB_OUTAGE_ERRORS as e:
+            db_breaker.record_failure()
+            logger.warning('БД недоступна, завдання user %s іде в локальний журнал: %s', user_id, e)
+        else:
+            db_breaker.record_success()
+            return new_task_id, False
+
+    try:
+        await buffer_write(Task.__table__, build_task_row(user_id, description, default_priority))
+    except Exception as e:
+        logger.error('Не вдалося зберегти завдання user %s у локальний журнал: %s', user_id, e)
+        return None, False
+    return None, True
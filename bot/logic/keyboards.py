@@ -0,0 +1,122 @@
+import functools
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from bot.logic.callback_data import (
+    TASK_ACTION, TASKS_SUBMENU, REMINDER_ACTION, JOURNAL_VIEW_ALL, MOOD_VIEW_ALL, POMODORO_ACTION, POMODORO_SUBMENU,
+)
+from config import TASK_KEYBOARD_CACHE_SIZE
+
+# Розмітки й кнопки PTB незмінні, тож одну й ту саму розмітку можна віддавати в усі повідомлення.
+# Статичні клавіатури будуються під час першого запиту (не під час імпорту) і далі беруться з кешу;
+# клавіатури завдань складаються з рядків, закешованих за id завдання.
+
+_RUNNING_STATES = frozenset(('work', 'short_break', 'long_break'))
+
+# callback_data кнопок завдань: префікс серіалізовано заздалегідь, на кнопку — лише id у base36
+_task_done = TASK_ACTION.packer(action="done")
+_task_prio = TASK_ACTION.packer(action="prio")
+_task_remind = TASK_ACTION.packer(action="remind")
+_task_page = TASK_ACTION.packer(action="page")
+_reminder_done = REMINDER_ACTION.packer(action="done")
+_reminder_delay = REMINDER_ACTION.packer(action="delay")
+
+
+def get_pomodoro_keyboard(state, paused=False) -> InlineKeyboardMarkup:
+    """Повертає клавіатуру відповідно до стану таймера."""
+    if state == 'idle':
+        return _pomodoro_keyboard('idle', False)
+    if state in _RUNNING_STATES:
+        return _pomodoro_keyboard('running', bool(paused))
+    return _pomodoro_keyboard(None, False)
+
+
+@functools.cache
+def _pomodoro_keyboard(kind: str | None, paused: bool) -> InlineKeyboardMarkup:
+    buttons = []
+    if kind == 'idle':
+        buttons.append([InlineKeyboardButton("🚀 Розпочати (25 хв)", callback_data=POMODORO_ACTION.pack(action="start_work"))])
+    elif kind == 'running':
+        row = []
+        if paused:
+            row.append(InlineKeyboardButton("▶️ Відновити", callback_data=POMODORO_ACTION.pack(action="resume")))
+        else:
+            row.append(InlineKeyboardButton("⏸️ Пауза", callback_data=POMODORO_ACTION.pack(action="pause")))
+        row.append(InlineKeyboardButton("⏹️ Зупинити", callback_data=POMODORO_ACTION.pack(action="stop")))
+        buttons.append(row)
+    return InlineKeyboardMarkup(buttons)
+
+
+@functools.cache
+def pomodoro_options_keyboard() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton("🚀 Запустити Pomodoro (без прив'язки)",
+                              callback_data=POMODORO_SUBMENU.pack(action="start_any"))],
+        [InlineKeyboardButton("🔗 Запустити для завдання...",
+                              callback_data=POMODORO_SUBMENU.pack(action="start_linked_select_task"))],
+    ])
+
+
+@functools.cache
+def tasks_submenu_keyboard() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup([
+        # Точка входу ConversationHandler — зіставляється його regex-шаблоном, тому без версії
+        [InlineKeyboardButton("➕ Додати нове завдання", callback_data="tasks_submenu:add")],
+        [InlineKeyboardButton("📋 Переглянути список завдань", callback_data=TASKS_SUBMENU.pack(action="list"))],
+    ])
+
+
+@functools.cache
+def journal_submenu_keyboard() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup([
+        [
+            InlineKeyboardButton("💡 Ідея", callback_data="journal_submenu:new:idea"),
+            InlineKeyboardButton("💭 Думка", callback_data="journal_submenu:new:thought"),
+            InlineKeyboardButton("🌙 Сон", callback_data="journal_submenu:new:dream"),
+        ],
+        [InlineKeyboardButton("📚 Переглянути мій журнал", callback_data=JOURNAL_VIEW_ALL.pack())],
+    ])
+
+
+@functools.cache
+def mood_submenu_keyboard() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton("✏️ Записати настрій", callback_data="mood_submenu:new")],
+        [InlineKeyboardButton("📊 Переглянути історію настрою", callback_data=MOOD_VIEW_ALL.pack())],
+    ])
+
+
+@functools.lru_cache(maxsize=TASK_KEYBOARD_CACHE_SIZE)
+def _task_row(task_id: int) -> tuple[InlineKeyboardButton, ...]:
+    return (
+        InlineKeyboardButton(f"✅ {task_id}", callback_data=_task_done(task_id)),
+        InlineKeyboardButton(f"📊 {task_id}", callback_data=_task_prio(task_id)),
+        InlineKeyboardButton(f"⏰ {task_id}", callback_data=_task_remind(task_id)),
+    )
+
+
+@functools.lru_cache(maxsize=64)
+def _task_pagination_row(page: int, has_next: bool) -> tuple[InlineKeyboardButton, ...]:
+    row = []
+    if page > 0:
+        row.append(InlineKeyboardButton("⬅️ Попередня", callback_data=_task_page(page - 1)))
+    if has_next:
+        row.append(InlineKeyboardButton("Вперед ➡️", callback_data=_task_page(page + 1)))
+    return tuple(row)
+
+
+@functools.lru_cache(maxsize=TASK_KEYBOARD_CACHE_SIZE)
+def task_list_keyboard(task_ids: tuple[int, ...], page: int, has_next: bool) -> InlineKeyboardMarkup | None:
+    """Клавіатура сторінки /list: рядок дій на кожне завдання і рядок гортання; None — кнопок немає."""
+    rows = [_task_row(task_id) for task_id in task_ids]
+    pagination_row = _task_pagination_row(page, has_next)
+    if pagination_row:
+        rows.append(pagination_row)
+    return InlineKeyboardMarkup(rows) if rows else None
+
+
+def reminder_keyboard(task_id: int) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup([[
+        InlineKeyboardButton("✅ Виконано", callback_data=_reminder_done(task_id)),
+        InlineKeyboardButton("⏱ Перенести", callback_data=_reminder_delay(task_id)),
+    ]])
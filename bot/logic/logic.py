@@ -1,9 +1,15 @@
+import logging
 import re
 from datetime import datetime, timedelta, timezone
 
-from sqlalchemy import func
-
 from bot.models import db, Task, JournalEntry, MoodEntry, PomodoroSession
+from bot.logic.stats import record_task_completed, record_pomodoro_finished, read_rollup_statistics
+from bot.logic.stats_cache import stats_cache
+from bot.infra.unit_of_work import commit_session, rollback_session, close_session
+from bot.infra.db_routing import read_only
+from bot.infra.write_ahead import DB_OUTAGE_ERRORS
+
+logger = logging.getLogger(__name__)
 
 ENTRY_TYPE_CONFIG_LOGIC = {
     "idea": {"model": JournalEntry, "display_name": "Ідея"},
@@ -14,6 +20,18 @@ ENTRY_TYPE_CONFIG_LOGIC = {
 }
 
 
+def _get_user_task(session, user_id: int, task_id: int) -> Task | None:
+    """
+    Завдання користувача за первинним ключем.
+    session.get спершу дивиться в identity map, тож у межах одного оновлення
+    повторний пошук того самого завдання не робить SQL-запиту.
+    """
+    task = session.get(Task, task_id)
+    if task is None or task.user_id != user_id:
+        return None
+    return task
+
+
 def mark_task_as_done_logic(user_id: int, task_id: int) -> tuple[Task | None, str]:
     """
     Знаходить завдання за ID та user_id, позначає його як виконане.
@@ -23,7 +41,7 @@ def mark_task_as_done_logic(user_id: int, task_id: int) -> tuple[Task | None, st
     message = ""
     task_obj = None
     try:
-        task_obj = Task.query.filter_by(id=task_id, user_id=user_id).first()
+        task_obj = _get_user_task(db.session, user_id, task_id)
 
         if not task_obj:
             message = "Такого завдання не існує або воно належить іншому користувачу."
@@ -37,17 +55,18 @@ def mark_task_as_done_logic(user_id: int, task_id: int) -> tuple[Task | None, st
         task_obj.completed_at = datetime.utcnow()
         task_obj.reminder_sent = True
         task_obj.follow_up_sent = True
-        db.session.commit()
+        record_task_completed(db.session, user_id, task_obj.completed_at)
+        commit_session(db.session, durable=True)
         message = f"✅ Завдання «{task_obj.description}» успішно позначено як виконане!"
-        print(f"LOGIC: Завдання {task_id} користувача {user_id} позначено як виконане.")
+        logger.debug('Завдання %s користувача %s позначено як виконане.', task_id, user_id)
         return task_obj, message
     except Exception as e:
-        db.session.rollback()
-        print(f"Помилка в mark_task_as_done_logic для task_id {task_id}: {e}")
+        rollback_session(db.session)
+        logger.error('Помилка в mark_task_as_done_logic для task_id %s: %s', task_id, e)
         message = f"Сталася помилка при оновленні завдання: {e}"
         return None, message
     finally:
-        db.session.close()
+        close_session(db.session)
 
 
 def set_task_reminder_logic(user_id: int, task_id: int, remind_time_str: str | None) -> tuple[Task | None, str]:
@@ -58,7 +77,7 @@ def set_task_reminder_logic(user_id: int, task_id: int, remind_time_str: str | N
     """
     session = db.session
     try:
-        task = session.query(Task).filter_by(id=task_id, user_id=user_id).first()
+        task = _get_user_task(session, user_id, task_id)
         if not task:
             return None, "Завдання не знайдено."
 
@@ -66,7 +85,7 @@ def set_task_reminder_logic(user_id: int, task_id: int, remind_time_str: str | N
             task.remind_at = None
             task.reminder_sent = False
             task.follow_up_sent = False
-            session.commit()
+            commit_session(session, durable=True)
             return task, "⏰ Нагадування вимкнено."
 
         parsed_local_naive = None
@@ -96,7 +115,7 @@ def set_task_reminder_logic(user_id: int, task_id: int, remind_time_str: str | N
 
             task.reminder_sent = False
             task.follow_up_sent = False
-            session.commit()
+            commit_session(session, durable=True)
             return task, f"⏰ Нагадування для «{task.description}» встановлено на {parsed_local_naive.strftime('%d.%m.%Y %H:%M')} (ваш місцевий час)."
         else:
             return task, "Помилка обробки часу."
@@ -104,18 +123,18 @@ def set_task_reminder_logic(user_id: int, task_id: int, remind_time_str: str | N
     except ValueError as ve:
         return None, f"⚠️ Невірний формат часу: {ve}. Використовуйте HH:MM, dd.mm.YYYY HH:MM або YYYY-MM-DD HH:MM."
     except Exception as e:
-        session.rollback()
-        print(f"Помилка в set_task_reminder_logic для task_id {task_id}: {e}")
+        rollback_session(session)
+        logger.error('Помилка в set_task_reminder_logic для task_id %s: %s', task_id, e)
         return None, f"Сталася помилка при встановленні нагадування: {e}"
     finally:
-        session.close()
+        close_session(session)
 
 
 def delay_task_reminder_logic(user_id: int, task_id: int, user_input_delay: str) -> tuple[Task | None, str]:
     """Переносить нагадування для завдання. Конвертує в UTC."""
     session = db.session
     try:
-        task = session.query(Task).filter_by(id=task_id, user_id=user_id).first()
+        task = _get_user_task(session, user_id, task_id)
         if not task:
             return None, "⚠️ Завдання не знайдено."
 
@@ -144,17 +163,17 @@ def delay_task_reminder_logic(user_id: int, task_id: int, user_input_delay: str)
 
             task.reminder_sent = False
             task.follow_up_sent = False
-            session.commit()
+            commit_session(session, durable=True)
             return task, f"🔁 Нагадування перенесено на {time_str_for_reply}."
         else:
             return task, "Помилка розрахунку нового часу для перенесення."
 
     except Exception as e:
-        session.rollback()
-        print(f"Помилка в delay_task_reminder_logic для task_id {task_id}: {e}")
+        rollback_session(session)
+        logger.error('Помилка в delay_task_reminder_logic для task_id %s: %s', task_id, e)
         return None, f"❌ Помилка при перенесенні: {str(e)}"
     finally:
-        session.close()
+        close_session(session)
 
 
 def update_pomodoro_session_db(session_id: int | None, status: str,
@@ -166,23 +185,25 @@ def update_pomodoro_session_db(session_id: int | None, status: str,
     session_db_obj = None
     session = db.session
     try:
-        session_db_obj = session.query(PomodoroSession).get(session_id)
+        session_db_obj = session.get(PomodoroSession, session_id)
         if session_db_obj:
+            previous_status = session_db_obj.status
             session_db_obj.status = status
             session_db_obj.end_time = end_time_utc if end_time_utc else datetime.now(timezone.utc).replace(
                 tzinfo=None)
-            session.commit()
-            print(f"LOGIC: Pomodoro сесія {session_id} оновлена, статус: {status}")
+            record_pomodoro_finished(session, session_db_obj, previous_status)
+            commit_session(session)
+            logger.debug('Pomodoro сесія %s оновлена, статус: %s', session_id, status)
             return session_db_obj
         else:
-            print(f"LOGIC WARNING: Pomodoro сесія {session_id} не знайдена для оновлення.")
+            logger.warning('Pomodoro сесія %s не знайдена для оновлення.', session_id)
             return None
     except Exception as e:
-        session.rollback()
-        print(f"Помилка в update_pomodoro_session_db для session_id {session_id}: {e}")
+        rollback_session(session)
+        logger.error('Помилка в update_pomodoro_session_db для session_id %s: %s', session_id, e)
         return None
     finally:
-        session.close()
+        close_session(session)
 
 
 def create_pomodoro_session_db(user_id: int, duration_minutes: int, session_type: str,
@@ -199,31 +220,29 @@ def create_pomodoro_session_db(user_id: int, duration_minutes: int, session_type
             start_time=datetime.now(timezone.utc).replace(tzinfo=None)
         )
         session.add(new_pom_session)
-        session.commit()
-        print(f"LOGIC: Створено Pomodoro сесію {new_pom_session.id} для user {user_id}, task_id: {task_id}")
+        commit_session(session)
+        logger.debug('Створено Pomodoro сесію %s для user %s, task_id: %s', new_pom_session.id, user_id, task_id)
         return new_pom_session.id
     except Exception as e:
-        session.rollback()
-        print(f"Помилка в create_pomodoro_session_db: {e}")
+        rollback_session(session)
+        logger.error('Помилка в create_pomodoro_session_db: %s', e)
         return None
     finally:
-        session.close()
+        close_session(session)
 
 
-def save_generic_entry_logic(
+def build_generic_entry_logic(
         user_id: int,
         command: str,
-        full_content_input: str) -> tuple[object | None, str, list[str] | None, str | None]:
-
-    session = db.session
-    created_entry_obj = None
-    message_for_user = ""
-    parsed_tags_list = []
-    text_for_mood_analysis = None
-
+        full_content_input: str) -> tuple[type | None, dict | None, str, list[str] | None, str | None]:
+    """
+    Розбирає та перевіряє запис журналу чи настрою без звернення до БД.
+    Повертає (модель, значення рядка, повідомлення для користувача, теги, текст для аналізу настрою);
+    якщо запис некоректний — (None, None, пояснення, None, None).
+    """
     config = ENTRY_TYPE_CONFIG_LOGIC.get(command)
     if not config:
-        return None, "Невідомий тип запису для збереження.", None, None
+        return None, None, "Невідомий тип запису для збереження.", None, None
 
     entry_model = config["model"]
     display_entry_type_for_msg = config["display_name"]
@@ -231,102 +250,128 @@ def save_generic_entry_logic(
 
     rating = None
     text_content_for_db = full_content_input
+    text_for_mood_analysis = None
 
-    try:
-        if entry_type_for_db == "mood":
-            mood_args = full_content_input.split(' ', 1)
-            if mood_args and mood_args[0].isdigit():
-                potential_rating = int(mood_args[0])
-                if 1 <= potential_rating <= 5:
-                    rating = potential_rating
-                    text_content_for_db = mood_args[1].strip() if len(mood_args) > 1 else ""
-
-            if rating is None and not text_content_for_db.strip():
-                return None, f"Будь ласка, для /{command} додайте опис настрою або оцінку (1-5).", None, None
-
-        parsed_tags_list = re.findall(r"#(\w+)", full_content_input)
-        tags_str_for_db = ",".join(sorted(list(set(parsed_tags_list)))) if parsed_tags_list else None
-
-        entry_data = {
-            "user_id": user_id,
-            "created_at": datetime.now(timezone.utc).replace(tzinfo=None)
-        }
-
-        if entry_model == JournalEntry:
-            entry_data["entry_type"] = entry_type_for_db
-            entry_data["content"] = text_content_for_db
-            entry_data["tags_str"] = tags_str_for_db
-        elif entry_model == MoodEntry:
-            entry_data["rating"] = rating
-            entry_data["text"] = text_content_for_db if text_content_for_db.strip() else None
-            entry_data["tags_str"] = tags_str_for_db
-            text_for_mood_analysis = text_content_for_db
+    if entry_type_for_db == "mood":
+        mood_args = full_content_input.split(' ', 1)
+        if mood_args and mood_args[0].isdigit():
+            potential_rating = int(mood_args[0])
+            if 1 <= potential_rating <= 5:
+                rating = potential_rating
+                text_content_for_db = mood_args[1].strip() if len(mood_args) > 1 else ""
+
+        if rating is None and not text_content_for_db.strip():
+            return None, None, f"Будь ласка, для /{command} додайте опис настрою або оцінку (1-5).", None, None
+
+    parsed_tags_list = re.findall(r"#(\w+)", full_content_input)
+    tags_str_for_db = ",".join(sorted(list(set(parsed_tags_list)))) if parsed_tags_list else None
+
+    entry_data = {
+        "user_id": user_id,
+        "created_at": datetime.now(timezone.utc).replace(tzinfo=None)
+    }
+
+    if entry_model == JournalEntry:
+        entry_data["entry_type"] = entry_type_for_db
+        entry_data["content"] = text_content_for_db
+        entry_data["tags_str"] = tags_str_for_db
+    elif entry_model == MoodEntry:
+        entry_data["rating"] = rating
+        entry_data["text"] = text_content_for_db if text_content_for_db.strip() else None
+        entry_data["tags_str"] = tags_str_for_db
+        text_for_mood_analysis = text_content_for_db
+
+    message_parts = [f"{display_entry_type_for_msg} успішно збережено!"]
+    if entry_model == MoodEntry and rating:
+        message_parts.append(f"Оцінка: {rating}/5")
+
+    text_in_confirmation = text_content_for_db
+    if text_in_confirmation and text_in_confirmation.strip():
+        display_text_confirm = text_in_confirmation[:100] + "..." if len(
+            text_in_confirmation) > 100 else text_in_confirmation
+        message_parts.append(f"Запис: «{display_text_confirm}»")
+    if parsed_tags_list:
+        message_parts.append(f"Теги: {', '.join([f'#{t}' for t in parsed_tags_list])}")
+
+    return entry_model, entry_data, "\n".join(message_parts), parsed_tags_list, text_for_mood_analysis
+
+
+def entry_save_error_message(command: str) -> str:
+    config = ENTRY_TYPE_CONFIG_LOGIC.get(command)
+    display_name = config["display_name"] if config else "запис"
+    return f"Вибачте, сталася помилка. При збереженні вашого запису ({display_name})."
 
-        new_entry = entry_model(**entry_data)
-        session.add(new_entry)
-        session.commit()
-        created_entry_obj = new_entry
 
-        message_parts = [f"{display_entry_type_for_msg} успішно збережено!"]
-        if entry_model == MoodEntry and rating:
-            message_parts.append(f"Оцінка: {rating}/5")
+def save_generic_entry_logic(
+        user_id: int,
+        command: str,
+        full_content_input: str) -> tuple[object | None, str, list[str] | None, str | None]:
+
+    entry_model, entry_data, message_for_user, parsed_tags_list, text_for_mood_analysis = build_generic_entry_logic(
+        user_id, command, full_content_input)
+    if entry_model is None:
+        return None, message_for_user, None, None
 
-        text_in_confirmation = text_content_for_db
-        if text_in_confirmation and text_in_confirmation.strip():
-            display_text_confirm = text_in_confirmation[:100] + "..." if len(
-                text_in_confirmation) > 100 else text_in_confirmation
-            message_parts.append(f"Запис: «{display_text_confirm}»")
-        if parsed_tags_list:
-            message_parts.append(f"Теги: {', '.join([f'#{t}' for t in parsed_tags_list])}")
-        message_for_user = "\n".join(message_parts)
+    session = db.session
+    try:
+        new_entry = entry_model(**entry_data)
+        session.add(new_entry)
+        commit_session(session, durable=True)
 
-        print(f"LOGIC: Збережено {entry_type_for_db} для user {user_id}. ID: {new_entry.id}, Теги: {tags_str_for_db}")
-        return created_entry_obj, message_for_user, parsed_tags_list, text_for_mood_analysis
+        logger.debug('Збережено %s для user %s. ID: %s, Теги: %s', command, user_id, new_entry.id, entry_data["tags_str"])
+        return new_entry, message_for_user, parsed_tags_list, text_for_mood_analysis
 
+    except DB_OUTAGE_ERRORS:
+        # БД недоступна: запис зберігає викликач у локальному журналі (bot.logic.entry_writes)
+        rollback_session(session)
+        raise
     except Exception as e:
-        session.rollback()
-        print(f"Помилка в save_generic_entry_logic ({entry_type_for_db}): {e}")
-        import traceback
-        traceback.print_exc()
-        message_for_user = f"Вибачте, сталася помилка. При збереженні вашого запису ({display_entry_type_for_msg})."
-        return None, message_for_user, None, None
+        rollback_session(session)
+        logger.exception('Помилка в save_generic_entry_logic (%s): %s', command, e)
+        return None, entry_save_error_message(command), None, None
     finally:
-        session.close()
+        close_session(session)
+
+
+def build_task_row(user_id: int, description: str, default_priority: int) -> dict:
+    return {
+        "user_id": user_id,
+        "description": description,
+        "priority": default_priority,
+        "created_at": datetime.now(timezone.utc).replace(tzinfo=None)
+    }
 
 
 def create_task_logic(
         user_id: int,
         description: str,
         default_priority: int
-) -> Task | None:
+) -> tuple[int | None, str | None]:
     """
     Створює нове завдання з описом та пріоритетом за замовчуванням.
-    Повертає створений об'єкт Task або None у разі помилки.
+    Повертає (id, опис) створеного завдання або (None, None) у разі помилки;
+    недоступність БД (DB_OUTAGE_ERRORS) прокидається викликачу.
     """
     session = db.session
     new_task_id = None
     task_description = None
     try:
-        new_task = Task(
-            user_id=user_id,
-            description=description,
-            priority=default_priority,
-            created_at=datetime.now(timezone.utc).replace(tzinfo=None)
-        )
+        new_task = Task(**build_task_row(user_id, description, default_priority))
         session.add(new_task)
-        session.commit()
+        commit_session(session, durable=True)
         new_task_id = new_task.id
         task_description = new_task.description
-        print(f"LOGIC: Створено завдання ID {new_task_id} для user {user_id} з пріоритетом {default_priority}")
+        logger.debug('Створено завдання ID %s для user %s з пріоритетом %s', new_task_id, user_id, default_priority)
         return new_task_id, task_description
+    except DB_OUTAGE_ERRORS:
+        rollback_session(session)
+        raise
     except Exception as e:
-        session.rollback()
-        print(f"Помилка в create_task_logic: {e}")
-        import traceback
-        traceback.print_exc()
+        rollback_session(session)
+        logger.exception('Помилка в create_task_logic: %s', e)
         return None, None
     finally:
-        session.close()
+        close_session(session)
 
 
 def set_task_priority_logic(
@@ -346,23 +391,73 @@ def set_task_priority_logic(
     actual_priority_set = None
     task = None
     try:
-        task = session.query(Task).filter_by(id=task_id, user_id=user_id).first()
+        task = _get_user_task(session, user_id, task_id)
         if not task:
             return None, "Завдання не знайдено", None
 
         task.priority = priority_value
-        session.commit()
+        commit_session(session, durable=True)
         task_description = task.description
         actual_priority_set = task.priority
         return task, task_description, actual_priority_set
     except Exception as e:
-        session.rollback()
-        print(f"Помилка в set_task_priority_logic для task_id {task_id}: {e}")
+        rollback_session(session)
+        logger.error('Помилка в set_task_priority_logic для task_id %s: %s', task_id, e)
         return None, f"Помилка оновлення пріоритету: {e}", None
     finally:
-        session.close()
+        close_session(session)
 
 
+def get_user_task_logic(user_id: int, task_id: int, only_active: bool = False) -> Task | None:
+    """
+    Повертає завдання користувача за ID (або None).
+    Об'єкт від'єднаний від сесії, але його поля вже завантажені.
+    """
+    session = db.session
+    try:
+        task = _get_user_task(session, user_id, task_id)
+        if task is not None and only_active and task.completed:
+            return None
+        return task
+    except Exception as e:
+        logger.error('Помилка в get_user_task_logic для task_id %s: %s', task_id, e)
+        return None
+    finally:
+        close_session(session)
+
+
+def mark_reminder_sent_logic(task_id: int, follow_up_time: datetime) -> bool:
+    """Фіксує відправку першого нагадування та час повторного."""
+    session = db.session
+    try:
+        updated = session.query(Task).filter_by(id=task_id).update(
+            {"reminder_sent": True, "follow_up_time": follow_up_time})
+        commit_session(session)
+        return bool(updated)
+    except Exception as e:
+        rollback_session(session)
+        logger.error('Помилка в mark_reminder_sent_logic для task_id %s: %s', task_id, e)
+        return False
+    finally:
+        close_session(session)
+
+
+def mark_follow_up_sent_logic(task_id: int) -> bool:
+    """Фіксує відправку повторного нагадування."""
+    session = db.session
+    try:
+        updated = session.query(Task).filter_by(id=task_id).update({"follow_up_sent": True})
+        commit_session(session)
+        return bool(updated)
+    except Exception as e:
+        rollback_session(session)
+        logger.error('Помилка в mark_follow_up_sent_logic для task_id %s: %s', task_id, e)
+        return False
+    finally:
+        close_session(session)
+
+
+@read_only
 def get_active_tasks_page_logic(
         user_id: int,
         page: int,
@@ -402,163 +497,93 @@ def get_active_tasks_page_logic(
         if (num_pages == 0 and total_active_tasks > 0):
             num_pages = 1
 
-        print(
-            f"LOGIC: get_active_tasks_page - User {user_id}, "
-            f"Page {page}, PageSize {page_size}. "
-            f"Found {len(tasks_on_page)} tasks on page, "
-            f"Total active: {total_active_tasks}, "
-            f"NumPages: {num_pages}"
-        )
+        logger.debug('get_active_tasks_page - User %s, Page %s, PageSize %s. '
+                     'Found %s tasks on page, Total active: %s, NumPages: %s',
+                     user_id, page, page_size, len(tasks_on_page), total_active_tasks, num_pages)
         return tasks_on_page, total_active_tasks, num_pages
 
     except Exception as e:
-        print(f"Помилка в get_active_tasks_page_logic для user {user_id}: {e}")
+        logger.error('Помилка в get_active_tasks_page_logic для user %s: %s', user_id, e)
         return [], 0, 0
     finally:
-        session.close()
+        close_session(session)
+
+
+def _entries_query(session, user_id: int, model_to_query: db.Model, tag_filter: str | None,
+                   entry_type_filter: str | None):
+    query = session.query(model_to_query).filter_by(user_id=user_id)
+    if tag_filter and hasattr(model_to_query, 'tags_str'):
+        query = query.filter(model_to_query.tags_str.ilike(f"%{tag_filter}%"))
+    if model_to_query == JournalEntry and entry_type_filter:
+        query = query.filter(model_to_query.entry_type == entry_type_filter)
+    return query
 
 
-def get_paginated_entries_logic(
+@read_only
+def get_entries_window_logic(
         user_id: int,
-        page: int,
-        page_size: int,
         model_to_query: db.Model,
+        offset: int,
+        limit: int,
         tag_filter: str | None = None,
         entry_type_filter: str | None = None
-) -> tuple[list, int, int]:
+) -> tuple[list, int]:
     """
-    Універсальна функція для отримання сторінки записів (JournalEntry або MoodEntry)
-    з фільтрами та пагінацією.
+    Записи (JournalEntry або MoodEntry) з фільтрами, від найновіших: limit записів починаючи з offset
+    і загальна кількість відфільтрованих. Межі сторінок визначає обробник (bot.logic.entry_pages).
     """
     session = db.session
-    entries_on_page = []
-    total_filtered_entries = 0
-    num_pages = 0
-
     try:
-        query = session.query(model_to_query).filter_by(user_id=user_id)
-
-        if tag_filter and hasattr(model_to_query, 'tags_str'):
-            query = query.filter(model_to_query.tags_str.ilike(f"%{tag_filter}%"))
-
-        if (model_to_query == JournalEntry
-                and entry_type_filter
-                and hasattr(model_to_query,
-                            'entry_type'
-                            )):
-            query = query.filter(model_to_query.entry_type == entry_type_filter)
-
-        query = query.order_by(model_to_query.created_at.desc())
-
+        query = _entries_query(session, user_id, model_to_query, tag_filter, entry_type_filter)
         total_filtered_entries = query.count()
+        entries = query.order_by(model_to_query.created_at.desc(), model_to_query.id.desc()) \
+            .offset(offset).limit(limit).all()
 
-        offset = page * page_size
-        entries_on_page = query.offset(offset).limit(page_size).all()
+        logger.debug("get_entries_window - User %s, Model %s, Offset %s, Limit %s, Tag '%s', Type '%s'. "
+                     "Found %s, Total: %s",
+                     user_id, model_to_query.__name__, offset, limit, tag_filter, entry_type_filter,
+                     len(entries), total_filtered_entries)
+        return entries, total_filtered_entries
 
-        if total_filtered_entries > 0:
-            num_pages = (total_filtered_entries + page_size - 1) // page_size
-        if num_pages == 0 and total_filtered_entries > 0 :
-            num_pages = 1
+    except Exception as e:
+        logger.error('Помилка в get_entries_window_logic для user %s, model %s: %s', user_id, model_to_query.__name__, e)
+        return [], 0
+    finally:
+        close_session(session)
 
-        print(f"LOGIC: get_paginated_entries - User {user_id}, "
-              f"Model {model_to_query.__name__}, Page {page}, "
-              f"Tag '{tag_filter}', Type '{entry_type_filter}'. "
-              f"Found {len(entries_on_page)} on page, "
-              f"Total: {total_filtered_entries}, "
-              f"NumPages: {num_pages}")
-        return entries_on_page, total_filtered_entries, num_pages
 
+@read_only
+def get_entry_logic(user_id: int, model_to_query: db.Model, entry_id: int):
+    """Один запис користувача за id (None, якщо його немає або він чужий)."""
+    session = db.session
+    try:
+        return session.query(model_to_query).filter_by(id=entry_id, user_id=user_id).first()
     except Exception as e:
-        print(f"Помилка в get_paginated_entries_logic для user {user_id}, "
-              f"model {model_to_query.__name__}: {e}")
-        return [], 0, 0
+        logger.error('Помилка в get_entry_logic для user %s, entry %s: %s', user_id, entry_id, e)
+        return None
     finally:
-        session.close()
+        close_session(session)
 
 
 def get_statistics_logic(user_id: int) -> dict:
-    # """
-    # Збирає статистику для користувача (завдання, Pomodoro).
-    # Повертає словник зі статистичними даними.
-    # """
-    stats_data = {}
+    """
+    Збирає статистику для користувача (завдання, Pomodoro) із зведеної таблиці user_daily_stats.
+    Результат кешується на STATS_CACHE_TTL_SEC і скидається при виконанні завдання чи сесії Pomodoro.
+    Повертає словник зі статистичними даними.
+    """
+    return stats_cache.get_or_load(user_id, lambda: _load_statistics(user_id))
+
+
+@read_only
+def _load_statistics(user_id: int) -> dict:
     session = db.session
     try:
-        now_utc = datetime.now(timezone.utc)
-        today_start_utc = now_utc.replace(hour=0, minute=0, second=0, microsecond=0)
-        week_start_utc = today_start_utc - timedelta(days=now_utc.weekday())
-        month_start_utc = today_start_utc.replace(day=1)
-
-        stats_data['tasks_today'] = session.query(func.count(Task.id)).filter(
-            Task.user_id == user_id, Task.completed.is_(True),
-            Task.completed_at >= today_start_utc
-        ).scalar() or 0
-        stats_data['tasks_week'] = session.query(func.count(Task.id)).filter(
-            Task.user_id == user_id, Task.completed.is_(True),
-            Task.completed_at >= week_start_utc
-        ).scalar() or 0
-        stats_data['tasks_month'] = session.query(func.count(Task.id)).filter(
-            Task.user_id == user_id, Task.completed.is_(True),
-            Task.completed_at >= month_start_utc
-        ).scalar() or 0
-
-        stats_data['total_pomodoros_today'] = session.query(
-            func.count(PomodoroSession.id)).filter(
-            PomodoroSession.user_id == user_id,
-            PomodoroSession.status == 'completed',
-            PomodoroSession.session_type == 'work',
-            PomodoroSession.end_time >= today_start_utc
-        ).scalar() or 0
-        stats_data['total_pomodoros_week'] = session.query(
-            func.count(PomodoroSession.id)).filter(
-            PomodoroSession.user_id == user_id,
-            PomodoroSession.status == 'completed',
-            PomodoroSession.session_type == 'work',
-            PomodoroSession.end_time >= week_start_utc
-        ).scalar() or 0
-        stats_data['total_pomodoros_month'] = session.query(
-            func.count(PomodoroSession.id)).filter(
-            PomodoroSession.user_id == user_id,
-            PomodoroSession.status == 'completed',
-            PomodoroSession.session_type == 'work',
-            PomodoroSession.end_time >= month_start_utc
-        ).scalar() or 0
-
-        # Pomodoro по завданнях
-        stats_data['completed_pomodoros_per_task'] = session.query(
-            Task.description, func.count(PomodoroSession.id)
-        ).join(PomodoroSession, PomodoroSession.task_id == Task.id) \
-            .filter(PomodoroSession.user_id == user_id,
-                    PomodoroSession.status == 'completed',
-                    PomodoroSession.session_type == 'work') \
-            .group_by(Task.id, Task.description) \
-            .order_by(func.count(PomodoroSession.id).desc()).limit(5).all()
-
-        # Перервані Pomodoro
-        stopped_sessions_week_q = session.query(
-            PomodoroSession.start_time, PomodoroSession.end_time
-        ).filter(
-            PomodoroSession.user_id == user_id,
-            PomodoroSession.status == 'stopped',
-            PomodoroSession.session_type == 'work',
-            PomodoroSession.end_time >= week_start_utc,
-            PomodoroSession.start_time.isnot(None),
-            PomodoroSession.end_time.isnot(None)
-        ).all()
-
-        stats_data['stopped_pom_count_week'] = len(stopped_sessions_week_q)
-        total_actual_stopped_duration_week = timedelta()
-        for start, end in stopped_sessions_week_q:
-            total_actual_stopped_duration_week += (end - start)
-            stats_data['total_stopped_minutes_week'] = int(
-                total_actual_stopped_duration_week.total_seconds() // 60
-            )
-
-        print(f"LOGIC: Зібрано статистику для user {user_id}")
+        stats_data = read_rollup_statistics(session, user_id, datetime.now(timezone.utc))
+        logger.debug('Зібрано статистику для user %s', user_id)
         return stats_data
 
     except Exception as e:
-        print(f"Помилка в get_statistics_logic для user {user_id}: {e}")
+        logger.error('Помилка в get_statistics_logic для user %s: %s', user_id, e)
         return {}
     finally:
-        session.close()
+        close_session(session)
@@ -1,12 +1,14 @@
 from telegram import (
     Update,
     ReplyKeyboardMarkup,
-    KeyboardButton,
-    InlineKeyboardMarkup,
-    InlineKeyboardButton
+    KeyboardButton
 )
 from telegram.ext import ContextTypes
 
+from bot.logic.keyboards import (
+    tasks_submenu_keyboard, journal_submenu_keyboard, mood_submenu_keyboard, pomodoro_options_keyboard,
+)
+
 # --- Тексти для кнопок Головного Меню ---
 MENU_TASKS_TEXT = "📝 Завдання"
 MENU_JOURNAL_TEXT = "📖 Журнал"
@@ -55,80 +57,25 @@ async def send_main_menu(
 
 
 async def show_tasks_submenu(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    keyboard = [
-        [InlineKeyboardButton(
-            "➕ Додати нове завдання",
-            callback_data="tasks_submenu:add"
-        )],
-        [InlineKeyboardButton(
-            "📋 Переглянути список завдань",
-            callback_data="tasks_submenu:list"
-        )],
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-
     await update.message.reply_text(
         "Оберіть дію із завданнями:",
-        reply_markup=reply_markup
+        reply_markup=tasks_submenu_keyboard()
     )
 
 
 async def show_journal_submenu(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    keyboard = [
-        [
-            InlineKeyboardButton(
-                "💡 Ідея",
-                callback_data="journal_submenu:new:idea"
-            ),
-            InlineKeyboardButton(
-                "💭 Думка",
-                callback_data="journal_submenu:new:thought"
-            ),
-            InlineKeyboardButton(
-                "🌙 Сон",
-                callback_data="journal_submenu:new:dream"
-            ),
-        ],
-        [InlineKeyboardButton(
-            "📚 Переглянути мій журнал",
-            callback_data="journal_submenu:view_all"
-        )]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
     await update.message.reply_text(
         "Що бажаєте зробити з журналом?",
-        reply_markup=reply_markup
+        reply_markup=journal_submenu_keyboard()
     )
 
 
 async def show_mood_submenu(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    keyboard = [
-        [InlineKeyboardButton(
-            "✏️ Записати настрій",
-            callback_data="mood_submenu:new"
-        )],
-        [InlineKeyboardButton(
-            "📊 Переглянути історію настрою",
-            callback_data="mood_submenu:view_all"
-        )]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
     await update.message.reply_text(
         "Оберіть дію для журналу настрою:",
-        reply_markup=reply_markup
+        reply_markup=mood_submenu_keyboard()
     )
 
 
 async def show_pomodoro_submenu(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    keyboard = [
-        [InlineKeyboardButton(
-            "🚀 Запустити Pomodoro (без прив'язки)",
-            callback_data="pomodoro_submenu:start_any"
-        )],
-        [InlineKeyboardButton(
-            "🔗 Запустити для завдання...",
-            callback_data="pomodoro_submenu:start_linked_select_task"
-        )]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    await update.message.reply_text("Налаштування Pomodoro:", reply_markup=reply_markup)
+    await update.message.reply_text("Налаштування Pomodoro:", reply_markup=pomodoro_options_keyboard())
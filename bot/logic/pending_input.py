@@ -0,0 +1,167 @@
+import time
+
+from telegram import Update
+from telegram.ext import BaseHandler, filters
+
+from bot.infra import metrics
+from config import PENDING_INPUT_TTL_SEC
+
+# chat_data[PENDING_INPUT_KEY] = {"kind": ..., "task_id": ..., "since": unix-час}
+PENDING_INPUT_KEY = 'pending_input'
+# Час запису проміжного стану розмов у user_data: {ключ: unix-час}
+STATE_STAMPS_KEY = 'state_stamps'
+
+REMINDER_TIME = 'reminder_time'
+DELAY_TIME = 'delay_time'
+
+# Проміжний стан розмов ConversationHandler у user_data
+CONVERSATION_STATE_KEYS = ('conv_task_id', 'conv_journal_entry_type')
+
+# Ключі старого формату очікування вводу, які більше ніде не читаються
+LEGACY_CHAT_KEYS = ('delay_task_id', 'waiting_for_time', 'set_reminder_task_id', 'remind_task_id_from_button')
+
+_live_pending = metrics.gauge(
+    "pending_input_live", "Активні очікування вводу та проміжні стани розмов (на момент останнього прибирання)",
+    ("kind",))
+_expired_total = metrics.counter(
+    "pending_input_expired_total", "Прострочені очікування вводу та стани розмов", ("kind",))
+# Текстовий ввід, який може бути відповіддю на очікування (команди обробляються окремо)
+_TEXT_INPUT = filters.TEXT & ~filters.COMMAND
+
+# Типи, для яких гейдж уже виставлявся: зниклий тип має показувати 0, а не останнє значення
+_seen_kinds: set[str] = {REMINDER_TIME, DELAY_TIME}
+
+
+def _is_expired(since: float, now: float | None = None) -> bool:
+    return (now or time.time()) - since > PENDING_INPUT_TTL_SEC
+
+
+def set_pending_input(chat_data: dict, kind: str, task_id: int):
+    """Чат чекає на текстовий ввід певного типу (новий запит замінює попередній)."""
+    chat_data[PENDING_INPUT_KEY] = {"kind": kind, "task_id": task_id, "since": time.time()}
+
+
+def peek_pending_input(chat_data: dict) -> dict | None:
+    """Поточне очікування чату або None; прострочене очікування прибирається."""
+    pending = chat_data.get(PENDING_INPUT_KEY)
+    if pending is None:
+        return None
+    if _is_expired(pending["since"]):
+        chat_data.pop(PENDING_INPUT_KEY, None)
+        _expired_total.inc(kind=pending["kind"])
+        return None
+    return pending
+
+
+def pop_pending_input(chat_data: dict, kind: str) -> int | None:
+    """Забирає очікування вказаного типу та повертає ID завдання (або None)."""
+    pending = peek_pending_input(chat_data)
+    if pending is None or pending["kind"] != kind:
+        return None
+    chat_data.pop(PENDING_INPUT_KEY, None)
+    return pending["task_id"]
+
+
+class PendingInputHandler(BaseHandler):
+    """
+    Один обробник для всіх очікувань текстового вводу: тип очікування чату береться
+    з chat_data[PENDING_INPUT_KEY], і повідомлення передається одразу відповідному
+    колбеку з callbacks. Для чатів, що нічого не чекають, обробник не спрацьовує.
+    """
+
+    def __init__(self, application, callbacks: dict, block: bool = True):
+        super().__init__(self._dispatch, block=block)
+        self.chat_data = application.chat_data
+        self.callbacks = dict(callbacks)
+
+    def check_update(self, update: object) -> str | None:
+        chat = update.effective_chat if isinstance(update, Update) else None
+        if chat is None:
+            return None
+        # dict.get, а не [] — без підвантаження запису та оновлення часу звернення робочого набору
+        chat_data = self.chat_data.get(chat.id)
+        pending = chat_data.get(PENDING_INPUT_KEY) if chat_data else None
+        if pending is None or pending["kind"] not in self.callbacks or not _TEXT_INPUT.check_update(update):
+            return None
+        return pending["kind"]
+
+    async def _dispatch(self, update: Update, context):
+        # Повторна перевірка через peek_pending_input прибирає прострочене очікування
+        pending = peek_pending_input(context.chat_data)
+        if pending is None:
+            return None
+        return await self.callbacks[pending["kind"]](update, context)
+
+
+def remember_state(user_data: dict, key: str, value):
+    """Зберігає проміжний стан розмови з часовою міткою, щоб прибиральник міг його прострочити."""
+    user_data[key] = value
+    user_data.setdefault(STATE_STAMPS_KEY, {})[key] = time.time()
+
+
+def forget_state(user_data: dict, key: str, default=None):
+    stamps = user_data.get(STATE_STAMPS_KEY)
+    if stamps is not None:
+        stamps.pop(key, None)
+        if not stamps:
+            user_data.pop(STATE_STAMPS_KEY, None)
+    return user_data.pop(key, default)
+
+
+def _sweep_chat_data(chat_data: dict, now: float, live: dict[str, int]) -> bool:
+    changed = False
+    for key in LEGACY_CHAT_KEYS:
+        if key in chat_data:
+            chat_data.pop(key, None)
+            _expired_total.inc(kind='legacy')
+            changed = True
+    pending = chat_data.get(PENDING_INPUT_KEY)
+    if pending is not None:
+        if _is_expired(pending["since"], now):
+            chat_data.pop(PENDING_INPUT_KEY, None)
+            _expired_total.inc(kind=pending["kind"])
+            changed = True
+        else:
+            live[pending["kind"]] = live.get(pending["kind"], 0) + 1
+    return changed
+
+
+def _sweep_user_data(user_data: dict, now: float, live: dict[str, int]) -> bool:
+    stamps = user_data.get(STATE_STAMPS_KEY)
+    if not stamps:
+        return False
+    changed = False
+    for key, since in list(stamps.items()):
+        if _is_expired(since, now):
+            forget_state(user_data, key)
+            _expired_total.inc(kind=key)
+            changed = True
+        else:
+            live[key] = live.get(key, 0) + 1
+    return changed
+
+
+def sweep_pending_states(application) -> dict[str, int]:
+    """
+    Прибирає прострочені очікування вводу (chat_data) та стани розмов (user_data)
+    у записах, що зараз у пам'яті. Змінені записи позначаються для збереження.
+    Повертає кількість живих станів за типом.
+    """
+    now = time.time()
+    live: dict[str, int] = {}
+    changed_chats = [chat_id for chat_id, chat_data in list(application.chat_data.items())
+                     if _sweep_chat_data(chat_data, now, live)]
+    changed_users = [user_id for user_id, user_data in list(application.user_data.items())
+                     if _sweep_user_data(user_data, now, live)]
+    if changed_chats or changed_users:
+        application.mark_data_for_update_persistence(chat_ids=changed_chats, user_ids=changed_users)
+
+    _seen_kinds.update(live)
+    for kind in _seen_kinds:
+        _live_pending.set(live.get(kind, 0), kind=kind)
+    return live
+
+
+async def sweep_pending_states_job(context):
+    """Періодична задача JobQueue для sweep_pending_states."""
+    sweep_pending_states(context.application)
@@ -0,0 +1,292 @@
+import logging
+import re
+from typing import NamedTuple
+
+from telegram.constants import ParseMode
+
+logger = logging.getLogger(__name__)
+
+# Ліміт тексту повідомлення Telegram після розбору розмітки (у кодових одиницях UTF-16)
+MESSAGE_LIMIT = 4096
+
+# Символи, які MarkdownV2 вимагає екранувати поза сутностями; '\' — першим, щоб не екранувати додані
+MARKDOWN_V2_SPECIAL = "\\_*[]()~`>#+-=|{}.!"
+_ESCAPES = tuple((char, "\\" + char) for char in MARKDOWN_V2_SPECIAL)
+# Усередині ``` і ` екрануються лише '\' та '`'
+_PRE_ESCAPES = (("\\", "\\\\"), ("`", "\\`"))
+
+
+def escape_markdown_v2(text) -> str:
+    """
+    Екранує текст для MarkdownV2. Послідовність str.replace лише для символів, що є в тексті:
+    кожна перевірка й заміна — прохід на C, а str.translate з багатосимвольними замінами на
+    кириличному тексті йде повільним шляхом і програє навіть regex.
+    """
+    text = str(text)
+    for char, escaped in _ESCAPES:
+        if char in text:
+            text = text.replace(char, escaped)
+    return text
+
+
+def escape_pre(text) -> str:
+    """Екранує текст усередині блоку ``` або `."""
+    text = str(text)
+    for char, escaped in _PRE_ESCAPES:
+        if char in text:
+            text = text.replace(char, escaped)
+    return text
+
+
+class MarkdownV2Error(ValueError):
+    """Текст не є коректним MarkdownV2 або задовгий для одного повідомлення."""
+
+
+# Екранована пара (будь-який символ з кодом 1..126); у перевірці замінюється двома \x00, тож позиції
+# решти символів не зсуваються, а '`' і маркери, що залишились, — справжня розмітка
+_ESCAPE_PAIR = re.compile(r"\\[\x01-\x7e]")
+_ESCAPED = re.compile(r"\\([\s\S])")
+_CODE_SPAN = re.compile(r"```([^`]*)```|`([^`]*)`")
+_PRE_LANGUAGE = re.compile(r"[^\s`]*\n")
+# Поза блоками коду: символи маркерів сутностей і зарезервовані символи. Лише клас символів —
+# такий шаблон сканується значно швидше за альтернативу з "__" і "||", їх добирає _check_outside
+_OUTSIDE_CHAR = re.compile(r"[*_~`\[\]()>#+\-=|{}.!]")
+_OUTSIDE_MARKUP = re.compile(r"\\([\s\S])|__|\|\||[*_~]")
+_ENTITY_MARKS = frozenset(("*", "_", "__", "~", "||"))
+
+
+def telegram_length(text: str) -> int:
+    """Довжина так, як її рахує Telegram: символи поза BMP (частина емодзі) займають дві одиниці."""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _pre_language_length(stripped: str, code) -> int:
+    language = _PRE_LANGUAGE.match(stripped, code.start(1), code.end(1))
+    return 0 if language is None else language.end() - language.start()
+
+
+def _check_outside(stripped: str, start: int, end: int, open_entities: list) -> int:
+    """Перевіряє відрізок поза блоками коду; повертає кількість символів маркерів у ньому."""
+    markup = 0
+    skip_until = -1
+    for match in _OUTSIDE_CHAR.finditer(stripped, start, end):
+        pos = match.start()
+        if pos < skip_until:
+            continue
+        token = match.group()
+        if token in "_|" and stripped.startswith(token, pos + 1, end):
+            token += token
+            skip_until = pos + 2
+        if token in _ENTITY_MARKS:
+            if open_entities and open_entities[-1] == token:
+                open_entities.pop()
+            elif token in open_entities:
+                raise MarkdownV2Error(f"перехрещені сутності '{token}' і '{open_entities[-1]}' на позиції {pos}")
+            else:
+                open_entities.append(token)
+            markup += len(token)
+        elif token == "`":
+            raise MarkdownV2Error(f"незакритий блок коду з позиції {pos}")
+        else:
+            raise MarkdownV2Error(f"неекранований символ '{token}' на позиції {pos}")
+    return markup
+
+
+def markdown_v2_length(text: str) -> int:
+    """
+    Перевіряє розмітку, яку формує бот, і повертає довжину видимого тексту (як її рахує Telegram).
+
+    Підтримується підмножина MarkdownV2 без посилань і цитат: *жирний*, _курсив_, __підкреслений__,
+    ~закреслений~, ||спойлер||, `код` і ```блок```. MarkdownV2Error — неекранований зарезервований
+    символ, незакрита чи перехрещена сутність або незакритий блок коду.
+    Екранування прибирається одним re.sub, тож у циклі на Python — лише маркери сутностей.
+    """
+    stripped = _ESCAPE_PAIR.sub("\x00\x00", text)
+    bad_escape = stripped.find("\\")
+    if bad_escape != -1:
+        raise MarkdownV2Error(f"'\\' без ASCII-символу після нього на позиції {bad_escape}")
+
+    hidden = stripped.count("\x00") // 2
+    open_entities = []
+    pos = 0
+    for code in _CODE_SPAN.finditer(stripped):
+        hidden += _check_outside(stripped, pos, code.start(), open_entities)
+        if code.group(1) is not None:
+            hidden += 6 + _pre_language_length(stripped, code)
+        else:
+            hidden += 2
+        pos = code.end()
+    hidden += _check_outside(stripped, pos, len(stripped), open_entities)
+    if open_entities:
+        raise MarkdownV2Error(f"незакрита сутність '{open_entities[-1]}'")
+    return telegram_length(text) - hidden
+
+
+def validate_markdown_v2(text: str) -> int:
+    """markdown_v2_length і перевірка ліміту: MarkdownV2Error, якщо текст довший за MESSAGE_LIMIT."""
+    length = markdown_v2_length(text)
+    if length > MESSAGE_LIMIT:
+        raise MarkdownV2Error(f"довжина {length} більша за ліміт {MESSAGE_LIMIT}")
+    return length
+
+
+def markdown_v2_to_plain(text: str) -> str:
+    """Видимий текст повідомлення: без екранування, маркерів сутностей і обрамлення блоків коду."""
+    stripped = _ESCAPE_PAIR.sub("\x00\x00", text)
+    parts = []
+    pos = 0
+    for code in _CODE_SPAN.finditer(stripped):
+        parts.append(_OUTSIDE_MARKUP.sub(r"\1", text[pos:code.start()]))
+        if code.group(1) is not None:
+            parts.append(_ESCAPED.sub(r"\1", text[code.start(1) + _pre_language_length(stripped, code):code.end(1)]))
+        else:
+            parts.append(_ESCAPED.sub(r"\1", text[code.start(2):code.end(2)]))
+        pos = code.end()
+    parts.append(_OUTSIDE_MARKUP.sub(r"\1", text[pos:]))
+    return "".join(parts)
+
+
+class Rendered(NamedTuple):
+    text: str
+    parse_mode: str | None
+
+    @property
+    def plain(self) -> str:
+        """Видимий текст: так його поверне Telegram у message.text."""
+        return self.text if self.parse_mode is None else markdown_v2_to_plain(self.text)
+
+
+def truncate_text(text: str, limit: int = MESSAGE_LIMIT) -> str:
+    """Обрізає текст до limit одиниць довжини Telegram (разом з '…' в кінці)."""
+    if telegram_length(text) <= limit:
+        return text
+    return text.encode("utf-16-le")[:max(limit - 1, 0) * 2].decode("utf-16-le", errors="ignore") + "…"
+
+
+def split_text(text: str, limit: int) -> list[str]:
+    """Ділить текст на частини не довші за limit, по можливості — на межі рядка чи слова."""
+    chunks = []
+    while telegram_length(text) > limit:
+        head = text.encode("utf-16-le")[:limit * 2].decode("utf-16-le", errors="ignore")
+        cut = max(head.rfind("\n"), head.rfind(" "))
+        if cut < len(head) // 2:
+            cut = len(head)
+        chunks.append(text[:cut].rstrip())
+        text = text[cut:].lstrip()
+    if text:
+        chunks.append(text)
+    return chunks
+
+
+def finalize(text: str) -> Rendered:
+    """
+    Остання перевірка перед відправкою: коректний MarkdownV2 надсилається як є, інакше — той самий
+    текст без розмітки (parse_mode=None), обрізаний до ліміту. Відкат відбувається до виклику API,
+    тож помилка форматування не коштує BadRequest і другого запиту.
+    """
+    try:
+        validate_markdown_v2(text)
+    except MarkdownV2Error as e:
+        logger.error('Некоректний MarkdownV2 (%s), надсилаю без розмітки: %.300r', e, text)
+        return Rendered(truncate_text(markdown_v2_to_plain(text)), None)
+    return Rendered(text, ParseMode.MARKDOWN_V2)
+
+
+# --- Таблиця завдань -------------------------------------------------------------------------------
+
+_PRIO_WIDTH, _ID_WIDTH, _DESC_WIDTH, _REMINDER_WIDTH = 3, 1, 25, 12
+
+_TASK_ROW = f"{{:<{_PRIO_WIDTH}}}{{:<{_ID_WIDTH}}}  {{:<{_DESC_WIDTH}}}  {{:<{_REMINDER_WIDTH}}}".format
+_TASK_TABLE_HEAD = escape_pre(
+    _TASK_ROW("П", "ID", "Завдання", "Нагадування") + "\n"
+    + f"{'-' * (_PRIO_WIDTH - 1)}-+{'-' * _ID_WIDTH}-+-{'-' * _DESC_WIDTH}-+-{'-' * _REMINDER_WIDTH}"
+)
+_REMINDER_FORMAT = "⏰%d.%m %H:%M"
+
+
+def render_task_table(title: str, tasks, priority_icons: dict, default_icon: str) -> Rendered:
+    """
+    Заголовок і моноширинна таблиця завдань у блоці ```. Клітинки вирівнюються до екранування
+    (ширина рахується за видимими символами), а рядки таблиці екрануються разом одним викликом escape_pre.
+    """
+    rows = []
+    for task in tasks:
+        description = task.description
+        if len(description) > _DESC_WIDTH:
+            description = description[:_DESC_WIDTH - 3] + "..."
+        rows.append(_TASK_ROW(priority_icons.get(task.priority, default_icon), task.id, description,
+                              task.remind_at.strftime(_REMINDER_FORMAT) if task.remind_at else ""))
+    body = escape_pre("\n".join(rows))
+    return finalize(f"{escape_markdown_v2(title)}\n```\n{_TASK_TABLE_HEAD}\n{body}\n```")
+
+
+# --- Сторінки журналу й настрою -----------------------------------------------------------------
+
+_ENTRY_DATE_FORMAT = escape_markdown_v2("%d.%m.%Y %H:%M")
+_ENTRY_SEPARATOR = "\n────────────────────"
+_ENTRY_PART_SEPARATOR = " \\- "
+_TAGS_PREFIX = "\n*Теги:* "
+
+
+def _entry_date(entry) -> str:
+    return entry.created_at.strftime(_ENTRY_DATE_FORMAT) if entry.created_at else "невідомо"
+
+
+def _entry_tags(entry) -> str:
+    if not entry.tags_str:
+        return ""
+    tags = [tag.strip() for tag in entry.tags_str.split(",") if tag.strip()]
+    if not tags:
+        return ""
+    return _TAGS_PREFIX + escape_markdown_v2(", ".join("#" + tag for tag in tags))
+
+
+def _journal_parts(entry, type_display: str) -> tuple[list[str], str | None]:
+    return [f"*{escape_markdown_v2(type_display)}*"], entry.content
+
+
+def _mood_parts(entry) -> tuple[list[str], str | None]:
+    return ([f"Оцінка: *{entry.rating}/5*"] if entry.rating is not None else []), entry.text
+
+
+def _entry_block(entry, parts: list[str], content: str | None, content_limit: int | None) -> str:
+    if content:
+        if content_limit is not None:
+            content = truncate_text(content, content_limit)
+        parts = parts + [escape_markdown_v2(content)]
+    head = f"\n🗓️ *{_entry_date(entry)}*"
+    if parts:
+        head += _ENTRY_PART_SEPARATOR + _ENTRY_PART_SEPARATOR.join(parts)
+    return head + _entry_tags(entry) + _ENTRY_SEPARATOR
+
+
+def render_journal_entry(entry, type_display: str, content_limit: int | None = None) -> str:
+    """Блок одного запису журналу (вже в MarkdownV2); content_limit — обрізати текст запису до цієї довжини."""
+    return _entry_block(entry, *_journal_parts(entry, type_display), content_limit)
+
+
+def render_mood_entry(entry, content_limit: int | None = None) -> str:
+    """Блок одного запису настрою (вже в MarkdownV2); content_limit — обрізати текст запису до цієї довжини."""
+    return _entry_block(entry, *_mood_parts(entry), content_limit)
+
+
+def render_entries_page(header: str, entry_blocks: list[str]) -> Rendered:
+    """Сторінка записів: екранований заголовок і блоки render_journal_entry / render_mood_entry."""
+    return finalize("\n".join([escape_markdown_v2(header) + "\n", *entry_blocks]))
+
+
+def render_full_entry(entry, type_display: str | None = None) -> list[Rendered]:
+    """
+    Запис повністю (кнопка «розгорнути»): одне або кілька повідомлень, якщо текст довший за ліміт.
+    type_display — тип запису журналу; None — запис настрою.
+    """
+    parts, content = _journal_parts(entry, type_display) if type_display is not None else _mood_parts(entry)
+    head = f"🗓️ *{_entry_date(entry)}*"
+    if parts:
+        head += _ENTRY_PART_SEPARATOR + _ENTRY_PART_SEPARATOR.join(parts)
+    tags = _entry_tags(entry)
+    reserve = markdown_v2_length(head + tags) + len(_ENTRY_PART_SEPARATOR)
+    chunks = [escape_markdown_v2(chunk) for chunk in split_text(content or "", MESSAGE_LIMIT - reserve)] or [""]
+    chunks[0] = head + (_ENTRY_PART_SEPARATOR + chunks[0] if chunks[0] else "")
+    chunks[-1] += tags
+    return [finalize(chunk) for chunk in chunks]
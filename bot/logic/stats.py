@@ -0,0 +1,248 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, insert
+from sqlalchemy.dialects import postgresql, sqlite
+
+from bot.models import db, Task, PomodoroSession, UserDailyStats, UserTaskPomodoroStats
+from bot.logic.stats_cache import schedule_stats_invalidation
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_CHUNK_SIZE = 500
+BACKFILL_WORKERS = 4
+
+_UPSERT_BY_DIALECT = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def _upsert_increment(session, model, keys: dict, increments: dict):
+    """
+    Додає значення до лічильників рядка зведеної таблиці, створюючи рядок за потреби.
+    Для PostgreSQL/SQLite це один атомарний INSERT ... ON CONFLICT DO UPDATE.
+    """
+    insert_for_dialect = _UPSERT_BY_DIALECT.get(session.get_bind().dialect.name)
+    if insert_for_dialect is not None:
+        stmt = insert_for_dialect(model).values(**keys, **increments)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={name: getattr(model, name) + stmt.excluded[name] for name in increments}
+        )
+        session.execute(stmt)
+        return
+
+    row = session.get(model, keys)
+    if row is None:
+        row = model(**keys, **{name: 0 for name in increments})
+        session.add(row)
+    for name, value in increments.items():
+        setattr(row, name, (getattr(row, name) or 0) + value)
+
+
+def record_task_completed(session, user_id: int, completed_at: datetime):
+    """Враховує виконане завдання у денній статистиці (в тій самій транзакції)."""
+    _upsert_increment(
+        session, UserDailyStats,
+        {"user_id": user_id, "day": completed_at.date()},
+        {"tasks_completed": 1}
+    )
+    schedule_stats_invalidation(session, user_id)
+
+
+def record_pomodoro_finished(session, pom_session: PomodoroSession, previous_status: str):
+    """
+    Враховує завершену або перервану робочу сесію Pomodoro у зведених таблицях.
+    Рахується лише перехід зі стану 'started', тож повторне оновлення сесії не дублює дані.
+    """
+    if (pom_session.session_type != 'work'
+            or previous_status != 'started'
+            or pom_session.end_time is None):
+        return
+
+    day_keys = {"user_id": pom_session.user_id, "day": pom_session.end_time.date()}
+
+    if pom_session.status == 'completed':
+        _upsert_increment(session, UserDailyStats, day_keys, {
+            "pomodoros_completed": 1,
+            "focused_minutes": pom_session.duration_minutes,
+        })
+        if pom_session.task_id:
+            _upsert_increment(
+                session, UserTaskPomodoroStats,
+                {"user_id": pom_session.user_id, "task_id": pom_session.task_id},
+                {"pomodoros_completed": 1, "focused_minutes": pom_session.duration_minutes}
+            )
+    elif pom_session.status == 'stopped' and pom_session.start_time is not None:
+        stopped_seconds = int((pom_session.end_time - pom_session.start_time).total_seconds())
+        _upsert_increment(session, UserDailyStats, day_keys, {
+            "pomodoros_stopped": 1,
+            "stopped_seconds": max(stopped_seconds, 0),
+        })
+    else:
+        return
+    schedule_stats_invalidation(session, pom_session.user_id)
+
+
+def read_rollup_statistics(session, user_id: int, now_utc: datetime) -> dict:
+    """
+    Збирає статистику користувача із зведених таблиць.
+    Читає щонайбільше 31 денний рядок та топ-5 завдань за кількістю Pomodoro.
+    """
+    today = now_utc.date()
+    week_start = today - timedelta(days=today.weekday())
+    month_start = today.replace(day=1)
+
+    daily_rows = session.query(UserDailyStats).filter(
+        UserDailyStats.user_id == user_id,
+        UserDailyStats.day >= min(week_start, month_start)
+    ).all()
+
+    stats_data = {
+        'tasks_today': 0, 'tasks_week': 0, 'tasks_month': 0,
+        'total_pomodoros_today': 0, 'total_pomodoros_week': 0, 'total_pomodoros_month': 0,
+        'stopped_pom_count_week': 0,
+    }
+    stopped_seconds_week = 0
+    for row in daily_rows:
+        if row.day == today:
+            stats_data['tasks_today'] += row.tasks_completed
+            stats_data['total_pomodoros_today'] += row.pomodoros_completed
+        if row.day >= week_start:
+            stats_data['tasks_week'] += row.tasks_completed
+            stats_data['total_pomodoros_week'] += row.pomodoros_completed
+            stats_data['stopped_pom_count_week'] += row.pomodoros_stopped
+            stopped_seconds_week += row.stopped_seconds
+        if row.day >= month_start:
+            stats_data['tasks_month'] += row.tasks_completed
+            stats_data['total_pomodoros_month'] += row.pomodoros_completed
+    stats_data['total_stopped_minutes_week'] = stopped_seconds_week // 60
+
+    top_tasks = session.query(
+        Task.description, UserTaskPomodoroStats.pomodoros_completed
+    ).join(Task, Task.id == UserTaskPomodoroStats.task_id) \
+        .filter(UserTaskPomodoroStats.user_id == user_id,
+                UserTaskPomodoroStats.pomodoros_completed > 0) \
+        .order_by(UserTaskPomodoroStats.pomodoros_completed.desc()).limit(5).all()
+    # Прості списки, а не Row: статистика кешується й у Redis (JSON) і має читатися звідти так само
+    stats_data['completed_pomodoros_per_task'] = [[description, count] for description, count in top_tasks]
+
+    return stats_data
+
+
+def _as_date(value) -> date:
+    """func.date() повертає date у PostgreSQL і рядок у SQLite."""
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def backfill_users_statistics(user_ids: list[int]) -> int:
+    """
+    Перераховує зведені таблиці для вказаних користувачів із сирих tasks / pomodoro_sessions.
+    Викликається в контексті застосунку; повертає кількість оброблених користувачів.
+    """
+    session = db.session
+    try:
+        daily: dict[tuple[int, date], dict] = {}
+
+        def daily_row(user_id, day):
+            return daily.setdefault((user_id, day), {
+                "user_id": user_id, "day": day,
+                "tasks_completed": 0, "pomodoros_completed": 0, "pomodoros_stopped": 0,
+                "focused_minutes": 0, "stopped_seconds": 0,
+            })
+
+        completed_tasks = session.query(
+            Task.user_id, func.date(Task.completed_at), func.count(Task.id)
+        ).filter(
+            Task.user_id.in_(user_ids), Task.completed.is_(True), Task.completed_at.isnot(None)
+        ).group_by(Task.user_id, func.date(Task.completed_at)).all()
+        for user_id, day, count in completed_tasks:
+            daily_row(user_id, _as_date(day))["tasks_completed"] = count
+
+        completed_pomodoros = session.query(
+            PomodoroSession.user_id, func.date(PomodoroSession.end_time),
+            func.count(PomodoroSession.id), func.sum(PomodoroSession.duration_minutes)
+        ).filter(
+            PomodoroSession.user_id.in_(user_ids),
+            PomodoroSession.status == 'completed',
+            PomodoroSession.session_type == 'work',
+            PomodoroSession.end_time.isnot(None)
+        ).group_by(PomodoroSession.user_id, func.date(PomodoroSession.end_time)).all()
+        for user_id, day, count, minutes in completed_pomodoros:
+            row = daily_row(user_id, _as_date(day))
+            row["pomodoros_completed"] = count
+            row["focused_minutes"] = minutes or 0
+
+        stopped_pomodoros = session.query(
+            PomodoroSession.user_id, PomodoroSession.start_time, PomodoroSession.end_time
+        ).filter(
+            PomodoroSession.user_id.in_(user_ids),
+            PomodoroSession.status == 'stopped',
+            PomodoroSession.session_type == 'work',
+            PomodoroSession.start_time.isnot(None),
+            PomodoroSession.end_time.isnot(None)
+        ).all()
+        for user_id, start, end in stopped_pomodoros:
+            row = daily_row(user_id, end.date())
+            row["pomodoros_stopped"] += 1
+            row["stopped_seconds"] += max(int((end - start).total_seconds()), 0)
+
+        per_task = session.query(
+            PomodoroSession.user_id, PomodoroSession.task_id,
+            func.count(PomodoroSession.id), func.sum(PomodoroSession.duration_minutes)
+        ).filter(
+            PomodoroSession.user_id.in_(user_ids),
+            PomodoroSession.task_id.isnot(None),
+            PomodoroSession.status == 'completed',
+            PomodoroSession.session_type == 'work'
+        ).group_by(PomodoroSession.user_id, PomodoroSession.task_id).all()
+        per_task_rows = [
+            {"user_id": user_id, "task_id": task_id,
+             "pomodoros_completed": count, "focused_minutes": minutes or 0}
+            for user_id, task_id, count, minutes in per_task
+        ]
+
+        session.query(UserDailyStats).filter(
+            UserDailyStats.user_id.in_(user_ids)).delete(synchronize_session=False)
+        session.query(UserTaskPomodoroStats).filter(
+            UserTaskPomodoroStats.user_id.in_(user_ids)).delete(synchronize_session=False)
+        if daily:
+            session.execute(insert(UserDailyStats), list(daily.values()))
+        if per_task_rows:
+            session.execute(insert(UserTaskPomodoroStats), per_task_rows)
+        session.commit()
+        return len(user_ids)
+    except Exception as e:
+        session.rollback()
+        logger.error('Помилка в backfill_users_statistics для %s користувачів: %s', len(user_ids), e)
+        raise
+    finally:
+        session.close()
+
+
+def _backfill_chunk(flask_app, user_ids: list[int]) -> int:
+    with flask_app.app_context():
+        return backfill_users_statistics(user_ids)
+
+
+def backfill_statistics(flask_app, workers: int = BACKFILL_WORKERS,
+                        chunk_size: int = BACKFILL_CHUNK_SIZE) -> int:
+    """
+    Паралельно заповнює зведені таблиці для всіх користувачів.
+    Користувачі діляться на частини, кожна обробляється у власному потоці та сесії.
+    """
+    with flask_app.app_context():
+        task_users = db.session.query(Task.user_id).distinct()
+        pomodoro_users = db.session.query(PomodoroSession.user_id).distinct()
+        all_user_ids = sorted({uid for (uid,) in task_users.union(pomodoro_users).all()})
+        db.session.close()
+
+    chunks = [all_user_ids[i:i + chunk_size] for i in range(0, len(all_user_ids), chunk_size)]
+    processed = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for done_count in executor.map(lambda chunk: _backfill_chunk(flask_app, chunk), chunks):
+            processed += done_count
+            logger.info('Backfill статистики: оброблено %s/%s користувачів', processed, len(all_user_ids))
+    return processed
@@ -0,0 +1,148 @@
+import logging
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from config import STATS_CACHE_BACKEND, STATS_CACHE_TTL_SEC, STATS_CACHE_MAX_ENTRIES, REDIS_URL
+from bot.infra import metrics
+
+logger = logging.getLogger(__name__)
+
+_PENDING_INVALIDATIONS_KEY = "stats_cache_invalidate"
+
+cache_hits = metrics.counter("stats_cache_hits_total", "Кількість влучань у кеш статистики.")
+cache_misses = metrics.counter("stats_cache_misses_total", "Кількість промахів кешу статистики.")
+cache_invalidations = metrics.counter(
+    "stats_cache_invalidations_total", "Кількість інвалідацій кешу статистики подіями.")
+
+
+class LRUStatsBackend:
+    """Кеш у пам'яті процесу з обмеженою кількістю записів та TTL."""
+
+    def __init__(self, max_entries: int = STATS_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: dict, ttl_seconds: int):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class RedisStatsBackend:
+    """
+    Спільний кеш для кількох реплік бота.
+    Приймає будь-який клієнт із методами get/set(ex=...)/delete, тож у тестах його
+    можна замінити локальною заглушкою замість справжнього Redis.
+    """
+
+    def __init__(self, client, key_prefix: str = "yanis:stats:"):
+        self.client = client
+        self.key_prefix = key_prefix
+
+    def get(self, key: str) -> dict | None:
+        raw = self.client.get(self.key_prefix + key)
+        return json.loads(raw) if raw else None
+
+    def set(self, key: str, value: dict, ttl_seconds: int):
+        self.client.set(self.key_prefix + key, json.dumps(value, ensure_ascii=False), ex=ttl_seconds)
+
+    def delete(self, key: str):
+        self.client.delete(self.key_prefix + key)
+
+
+def create_backend(kind: str = STATS_CACHE_BACKEND):
+    if kind == "redis":
+        import redis  # необов'язкова залежність, потрібна лише для спільного кешу
+        return RedisStatsBackend(redis.Redis.from_url(REDIS_URL))
+    return LRUStatsBackend()
+
+
+class StatsCache:
+    """Кеш статистики користувача з коротким TTL та інвалідацією за подіями."""
+
+    def __init__(self, backend, ttl_seconds: int = STATS_CACHE_TTL_SEC):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+
+    def get_or_load(self, user_id: int, loader) -> dict:
+        """Повертає статистику з кешу або завантажує її через loader() і кешує непорожній результат."""
+        today = datetime.now(timezone.utc).date().isoformat()
+        try:
+            cached = self.backend.get(str(user_id))
+        except Exception as e:
+            logger.error('Помилка читання кешу статистики для user %s: %s', user_id, e)
+            cached = None
+
+        # Дані минулого дня вважаються промахом, щоб лічильники "Сьогодні" не застрягали після півночі.
+        if cached is not None and cached.get("day") == today:
+            cache_hits.inc()
+            return cached["stats"]
+
+        cache_misses.inc()
+        stats_data = loader()
+        if stats_data:
+            try:
+                self.backend.set(str(user_id), {"day": today, "stats": stats_data}, self.ttl_seconds)
+            except Exception as e:
+                logger.error('Помилка запису кешу статистики для user %s: %s', user_id, e)
+        return stats_data
+
+    def invalidate(self, user_id: int):
+        cache_invalidations.inc()
+        try:
+            self.backend.delete(str(user_id))
+        except Exception as e:
+            logger.error('Помилка інвалідації кешу статистики для user %s: %s', user_id, e)
+
+
+stats_cache = StatsCache(create_backend())
+
+
+def configure_stats_cache(backend, ttl_seconds: int = STATS_CACHE_TTL_SEC):
+    """Замінює бекенд кешу (наприклад, на Redis-сумісну заглушку)."""
+    stats_cache.backend = backend
+    stats_cache.ttl_seconds = ttl_seconds
+
+
+def schedule_stats_invalidation(session, user_id: int):
+    """
+    Позначає кеш користувача до інвалідації після успішного коміту транзакції.
+    Так кеш не скидається передчасно і не заповнюється даними, яких ще не видно в БД.
+    """
+    session.info.setdefault(_PENDING_INVALIDATIONS_KEY, set()).add(user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    for user_id in session.info.pop(_PENDING_INVALIDATIONS_KEY, ()):
+        stats_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending_after_rollback(session):
+    session.info.pop(_PENDING_INVALIDATIONS_KEY, None)
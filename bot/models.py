@@ -1,7 +1,10 @@
 from flask_sqlalchemy import SQLAlchemy
 
 from datetime import datetime
-db = SQLAlchemy()
+
+from bot.infra.db_routing import RoutingSession
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 
 class Task(db.Model):
@@ -76,3 +79,53 @@ class MoodEntry(db.Model):
 
     def __repr__(self):
         return f"<MoodEntry {self.id} (User: {self.user_id}, Rating: {self.rating})>"
+
+
+class UserDailyStats(db.Model):
+    __tablename__ = 'user_daily_stats'
+
+    user_id = db.Column(db.BigInteger, primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    tasks_completed = db.Column(db.Integer, default=0, nullable=False)
+    pomodoros_completed = db.Column(db.Integer, default=0, nullable=False)
+    pomodoros_stopped = db.Column(db.Integer, default=0, nullable=False)
+    focused_minutes = db.Column(db.Integer, default=0, nullable=False)
+    stopped_seconds = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<UserDailyStats (User: {self.user_id}, Day: {self.day})>"
+
+
+class UserTaskPomodoroStats(db.Model):
+    __tablename__ = 'user_task_pomodoro_stats'
+
+    user_id = db.Column(db.BigInteger, primary_key=True)
+    task_id = db.Column(db.Integer, db.ForeignKey('tasks.id', ondelete='CASCADE'), primary_key=True)
+    pomodoros_completed = db.Column(db.Integer, default=0, nullable=False)
+    focused_minutes = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return (f"<UserTaskPomodoroStats (User: {self.user_id}, Task: {self.task_id}, "
+                f"Pomodoros: {self.pomodoros_completed})>")
+
+
+class BotPersistenceRecord(db.Model):
+    """Один запис стану PTB: user_data / chat_data / bot_data / стан розмови."""
+    __tablename__ = 'bot_persistence'
+
+    kind = db.Column(db.String(16), primary_key=True)
+    namespace = db.Column(db.String(64), primary_key=True, default='')
+    key = db.Column(db.String(255), primary_key=True)
+    data = db.Column(db.LargeBinary, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<BotPersistenceRecord {self.kind}:{self.namespace}:{self.key}>"
+
+
+class AppliedWrite(db.Model):
+    """Ключ ідемпотентності запису, перенесеного з локального журналу (bot.infra.write_ahead)."""
+    __tablename__ = 'applied_writes'
+
+    key = db.Column(db.String(36), primary_key=True)
+    applied_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
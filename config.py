@@ -5,3 +5,136 @@ load_dotenv()
 
 BOT_TOKEN = os.getenv('BOT_TOKEN')
 DATABASE_URL = os.getenv('DATABASE_URL')
+# Адреса Bot API (власний сервер telegram-bot-api або фейковий Telegram у benchmarks/)
+BOT_API_BASE_URL = os.getenv('BOT_API_BASE_URL', 'https://api.telegram.org/bot')
+
+# Кеш статистики: 'lru' (у процесі) або 'redis' (спільний для кількох реплік)
+STATS_CACHE_BACKEND = os.getenv('STATS_CACHE_BACKEND', 'lru')
+STATS_CACHE_TTL_SEC = int(os.getenv('STATS_CACHE_TTL_SEC', '60'))
+STATS_CACHE_MAX_ENTRIES = int(os.getenv('STATS_CACHE_MAX_ENTRIES', '10000'))
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+
+# Межі сторінок журналу й настрою (скільки записів уміщується в одне повідомлення) за користувачем і фільтром:
+# скільки розкладок тримати в пам'яті та час життя, сек
+ENTRY_PAGES_CACHE_MAX_ENTRIES = int(os.getenv('ENTRY_PAGES_CACHE_MAX_ENTRIES', '10000'))
+ENTRY_PAGES_CACHE_TTL_SEC = int(os.getenv('ENTRY_PAGES_CACHE_TTL_SEC', '1800'))
+
+# Готові клавіатури завдань (/list): скільки рядків кнопок і сторінок тримати в пам'яті
+TASK_KEYBOARD_CACHE_SIZE = int(os.getenv('TASK_KEYBOARD_CACHE_SIZE', '4096'))
+
+# Пул потоків для синхронних запитів до БД з асинхронних обробників
+DB_EXECUTOR_WORKERS = int(os.getenv('DB_EXECUTOR_WORKERS', '8'))
+
+# Запис журналу й настрою: 'sync' — окрема транзакція на кожен запис, 'group' — спільний коміт пакета
+# (відповідь після коміту), 'async' — відповідь одразу після постановки в чергу. Пакет — до ENTRY_WRITE_BATCH_SIZE
+# записів, що накопичились, поки йшов попередній коміт, плюс очікування на нові до ENTRY_WRITE_FLUSH_MS мс
+# (0 — не чекати); повна черга (ENTRY_WRITE_QUEUE_SIZE) пригальмовує обробники
+ENTRY_WRITE_MODE = os.getenv('ENTRY_WRITE_MODE', 'group')
+ENTRY_WRITE_BATCH_SIZE = int(os.getenv('ENTRY_WRITE_BATCH_SIZE', '200'))
+ENTRY_WRITE_FLUSH_MS = float(os.getenv('ENTRY_WRITE_FLUSH_MS', '0'))
+ENTRY_WRITE_QUEUE_SIZE = int(os.getenv('ENTRY_WRITE_QUEUE_SIZE', '5000'))
+
+# Недоступна БД: після DB_CIRCUIT_FAILURE_THRESHOLD збоїв поспіль запити до неї припиняються на DB_CIRCUIT_RESET_SEC с,
+# а нові записи й завдання пишуться в локальний журнал (WAL_DIR; fsync пакетами раз на WAL_FSYNC_MS мс) і
+# переносяться в БД кожні WAL_REPLAY_INTERVAL_SEC с по WAL_REPLAY_BATCH_SIZE; ключі вже перенесених записів
+# зберігаються WAL_KEY_RETENTION_DAYS днів
+DB_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('DB_CIRCUIT_FAILURE_THRESHOLD', '3'))
+DB_CIRCUIT_RESET_SEC = float(os.getenv('DB_CIRCUIT_RESET_SEC', '15'))
+WAL_DIR = os.getenv('WAL_DIR', 'data/wal')
+WAL_FSYNC_MS = float(os.getenv('WAL_FSYNC_MS', '2'))
+WAL_REPLAY_INTERVAL_SEC = float(os.getenv('WAL_REPLAY_INTERVAL_SEC', '5'))
+WAL_REPLAY_BATCH_SIZE = int(os.getenv('WAL_REPLAY_BATCH_SIZE', '200'))
+WAL_KEY_RETENTION_DAYS = int(os.getenv('WAL_KEY_RETENTION_DAYS', '7'))
+
+# Скільки оновлень різних користувачів обробляються одночасно (1 — послідовно);
+# оновлення одного користувача/чату завжди йдуть по черзі
+UPDATE_CONCURRENCY = int(os.getenv('UPDATE_CONCURRENCY', '32'))
+
+# Вихідні запити до Telegram: загальний ліміт (повідомлень/с), ліміт на чат (повідомлень/с і запас),
+# кількість повторів після RetryAfter
+OUTBOUND_GLOBAL_RATE = float(os.getenv('OUTBOUND_GLOBAL_RATE', '30'))
+OUTBOUND_CHAT_RATE = float(os.getenv('OUTBOUND_CHAT_RATE', '1'))
+OUTBOUND_CHAT_BURST = float(os.getenv('OUTBOUND_CHAT_BURST', '3'))
+OUTBOUND_MAX_RETRIES = int(os.getenv('OUTBOUND_MAX_RETRIES', '2'))
+
+# Логування: рівень, формат ('json' — один JSON-об'єкт на рядок, 'text'), скільки DEBUG-записів на секунду
+# дозволено з одного місця виклику (0 — без обмеження), розмір черги записів до потоку виводу
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json').lower()
+LOG_DEBUG_RATE = float(os.getenv('LOG_DEBUG_RATE', '5'))
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+
+# Метрики Prometheus: збір і ендпоінт /metrics (в режимі polling — окремий сервер на METRICS_PORT,
+# у режимі вебхука — на сервері вебхука)
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+METRICS_LISTEN = os.getenv('METRICS_LISTEN', '0.0.0.0')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '9100'))
+# Монітор циклу подій: період вимірювання затримки, с; поріг, після якого в лог пишеться стек заблокованого циклу, с;
+# вбудоване логування повільних колбеків asyncio (debug-режим циклу, помітно сповільнює — лише для діагностики)
+LOOP_LAG_INTERVAL_SEC = float(os.getenv('LOOP_LAG_INTERVAL_SEC', '1'))
+LOOP_LAG_THRESHOLD_SEC = float(os.getenv('LOOP_LAG_THRESHOLD_SEC', '0.25'))
+LOOP_ASYNCIO_DEBUG = os.getenv('LOOP_ASYNCIO_DEBUG', 'false').lower() in ('1', 'true', 'yes')
+
+# Telegram id адміністраторів через кому (команда /profile); порожньо — адмін-команди вимкнено
+ADMIN_USER_IDS = [int(user_id) for user_id in os.getenv('ADMIN_USER_IDS', '').split(',') if user_id.strip()]
+# Профілювання обробників: каталог для звітів і .prof (порожньо — не зберігати), рядків у звіті,
+# період знімків стеку (режим sampling), найдовший сеанс, с
+PROFILE_DIR = os.getenv('PROFILE_DIR', '')
+PROFILE_TOP_N = int(os.getenv('PROFILE_TOP_N', '30'))
+PROFILE_SAMPLE_INTERVAL_SEC = float(os.getenv('PROFILE_SAMPLE_INTERVAL_SEC', '0.005'))
+PROFILE_MAX_SECONDS = int(os.getenv('PROFILE_MAX_SECONDS', '600'))
+# Профілювання з запуску: обробники через кому або 'all' (порожньо — вимкнено), тривалість, режим sampling|cprofile
+PROFILE_HANDLERS = os.getenv('PROFILE_HANDLERS', '')
+PROFILE_SECONDS = int(os.getenv('PROFILE_SECONDS', '60'))
+PROFILE_MODE = os.getenv('PROFILE_MODE', 'sampling').lower()
+
+# Інструментування SQL: поріг N+1 (однакових запитів на оновлення), топ повільних запитів, період звіту в лог
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv('SQL_N_PLUS_ONE_THRESHOLD', '5'))
+SQL_SLOWEST_STATEMENTS = int(os.getenv('SQL_SLOWEST_STATEMENTS', '5'))
+SQL_SUMMARY_INTERVAL_SEC = int(os.getenv('SQL_SUMMARY_INTERVAL_SEC', '300'))
+
+# Пул з'єднань з БД (для SQLite в пам'яті не застосовується)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '5'))
+DB_POOL_TIMEOUT_SEC = int(os.getenv('DB_POOL_TIMEOUT_SEC', '10'))
+DB_POOL_RECYCLE_SEC = int(os.getenv('DB_POOL_RECYCLE_SEC', '1800'))
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+# Обмеження часу одного запиту на боці PostgreSQL, мс (0 — без обмеження)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '15000'))
+
+# Репліка PostgreSQL для read-only запитів (/list, журнал, настрій, статистика); порожньо — все на основну БД
+DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL') or None
+# Скільки секунд після запису читання користувача йдуть на основну БД
+REPLICA_STICKINESS_SEC = float(os.getenv('REPLICA_STICKINESS_SEC', '5'))
+
+# Збереження стану PTB у таблиці bot_persistence: період збору змін, затримка пакетного запису, рядків на пакет
+PERSISTENCE_UPDATE_INTERVAL_SEC = float(os.getenv('PERSISTENCE_UPDATE_INTERVAL_SEC', '60'))
+PERSISTENCE_WRITE_DELAY_SEC = float(os.getenv('PERSISTENCE_WRITE_DELAY_SEC', '0.5'))
+PERSISTENCE_BATCH_SIZE = int(os.getenv('PERSISTENCE_BATCH_SIZE', '1000'))
+
+# Робочий набір user_data / chat_data у пам'яті: неактивні записи вивантажуються в БД і підвантажуються за потреби
+WORKING_SET_IDLE_TTL_SEC = int(os.getenv('WORKING_SET_IDLE_TTL_SEC', '1800'))
+WORKING_SET_MAX_ENTRIES = int(os.getenv('WORKING_SET_MAX_ENTRIES', '10000'))
+WORKING_SET_EVICTION_INTERVAL_SEC = int(os.getenv('WORKING_SET_EVICTION_INTERVAL_SEC', '300'))
+
+# Очікування текстового вводу (час нагадування, перенесення) та проміжний стан розмов, сек
+PENDING_INPUT_TTL_SEC = int(os.getenv('PENDING_INPUT_TTL_SEC', '900'))
+PENDING_SWEEP_INTERVAL_SEC = int(os.getenv('PENDING_SWEEP_INTERVAL_SEC', '60'))
+# Тайм-аут ConversationHandler-ів (0 — без тайм-ауту)
+CONVERSATION_TIMEOUT_SEC = int(os.getenv('CONVERSATION_TIMEOUT_SEC', '900'))
+
+# Модулі обробників завантажуються під час першого виклику; через скільки секунд після старту
+# довантажити решту у фоновому потоці
+HANDLER_PRELOAD_DELAY_SEC = float(os.getenv('HANDLER_PRELOAD_DELAY_SEC', '1'))
+
+# Режим отримання оновлень: 'polling' (за замовчуванням, для розробки) або 'webhook'
+BOT_MODE = os.getenv('BOT_MODE', 'polling').lower()
+# Вебхук: публічна адреса (без шляху), на якій Telegram бачить сервер бота, та параметри локального сервера
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/telegram')
+WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8080'))
+# Значення заголовка X-Telegram-Bot-Api-Secret-Token; запити без нього відхиляються
+WEBHOOK_SECRET_TOKEN = os.getenv('WEBHOOK_SECRET_TOKEN', '')
+# Скільки одночасних HTTPS-з'єднань Telegram відкриває до вебхука (1-100)
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv('WEBHOOK_MAX_CONNECTIONS', '40'))
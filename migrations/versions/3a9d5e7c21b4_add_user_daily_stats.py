@@ -0,0 +1,47 @@
+"""Add user_daily_stats rollup
+
+Revision ID: 3a9d5e7c21b4
+Revises: f7615ae1438b
+Create Date: 2026-10-19 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a9d5e7c21b4'
+down_revision: Union[str, None] = 'f7615ae1438b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_daily_stats',
+    sa.Column('user_id', sa.BigInteger(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('tasks_completed', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('pomodoros_completed', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('pomodoros_stopped', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('focused_minutes', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('stopped_seconds', sa.Integer(), nullable=False, server_default='0'),
+    sa.PrimaryKeyConstraint('user_id', 'day')
+    )
+    op.create_table('user_task_pomodoro_stats',
+    sa.Column('user_id', sa.BigInteger(), nullable=False),
+    sa.Column('task_id', sa.Integer(), nullable=False),
+    sa.Column('pomodoros_completed', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('focused_minutes', sa.Integer(), nullable=False, server_default='0'),
+    sa.ForeignKeyConstraint(['task_id'], ['tasks.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'task_id')
+    )
+    # Дані заповнюються командою `flask --app app backfill-stats`
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_task_pomodoro_stats')
+    op.drop_table('user_daily_stats')
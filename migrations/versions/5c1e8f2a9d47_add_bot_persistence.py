@@ -0,0 +1,36 @@
+"""Add bot_persistence table
+
+Revision ID: 5c1e8f2a9d47
+Revises: 3a9d5e7c21b4
+Create Date: 2026-10-19 14:02:17.540912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e8f2a9d47'
+down_revision: Union[str, None] = '3a9d5e7c21b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('bot_persistence',
+    sa.Column('kind', sa.String(length=16), nullable=False),
+    sa.Column('namespace', sa.String(length=64), nullable=False, server_default=''),
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('kind', 'namespace', 'key')
+    )
+    # Наявний data/bot_persistence.pickle переноситься командою `flask --app app import-pickle-persistence`
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('bot_persistence')
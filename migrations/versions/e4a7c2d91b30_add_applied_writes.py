@@ -0,0 +1,34 @@
+"""Add applied_writes table
+
+Revision ID: e4a7c2d91b30
+Revises: 5c1e8f2a9d47
+Create Date: 2026-10-19 19:10:42.318507
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a7c2d91b30'
+down_revision: Union[str, None] = '5c1e8f2a9d47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('applied_writes',
+    sa.Column('key', sa.String(length=36), nullable=False),
+    sa.Column('applied_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_applied_writes_applied_at'), 'applied_writes', ['applied_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_applied_writes_applied_at'), table_name='applied_writes')
+    op.drop_table('applied_writes')
@@ -0,0 +1,76 @@
+import pytest
+
+from bot.infra.callback_router import CallbackRoute, CallbackRouter, MAX_CALLBACK_DATA_BYTES
+
+TASK = CallbackRoute("task|t:{action}:{target:int}")
+REMINDER = CallbackRoute("{action:done|delay}:{task_id:int}")
+PAGE = CallbackRoute("{kind:journal|mood}:page|p:{page:int}")
+EXPAND = CallbackRoute("{kind:journal|mood}:x:{entry_id:int}")
+
+
+def _router() -> CallbackRouter:
+    router = CallbackRouter()
+    for route in (TASK, REMINDER, PAGE, EXPAND):
+        router.add(route, route.template)
+    return router
+
+
+def test_pack_uses_short_literals_and_base36():
+    assert TASK.pack(action="done", target=1295) == "1:t:done:zz"
+    assert PAGE.pack(kind="mood", page=2) == "1:mood:p:2"
+
+
+def test_resolve_round_trips_packed_data():
+    router = _router()
+    for route, params in ((TASK, {"action": "prio", "target": 123456}),
+                          (REMINDER, {"action": "delay", "task_id": 42}),
+                          (PAGE, {"kind": "journal", "page": 35}),
+                          (EXPAND, {"kind": "mood", "entry_id": 7})):
+        assert router.resolve(route.pack(**params)) == (route, params)
+
+
+def test_resolve_accepts_legacy_unversioned_data():
+    router = _router()
+    # Кнопки, надіслані до появи версії: довгі літерали й десяткові числа
+    assert router.resolve("task:done:35") == (TASK, {"action": "done", "target": 35})
+    assert router.resolve("journal:page:10") == (PAGE, {"kind": "journal", "page": 10})
+
+
+def test_resolve_rejects_unknown_or_malformed_data():
+    router = _router()
+    assert router.resolve("1:t:done") is None
+    assert router.resolve("1:archive:3") is None
+    assert router.resolve("1:journal:p:не_число") is None
+    assert router.resolve("") is None
+
+
+def test_overlapping_routes_are_rejected():
+    router = _router()
+    with pytest.raises(ValueError):
+        router.add(CallbackRoute("t:{action}:{target:int}"), None)
+
+
+def test_pack_enforces_64_byte_limit():
+    with pytest.raises(ValueError):
+        TASK.pack(action="a" * MAX_CALLBACK_DATA_BYTES, target=1)
+    # Кирилиця займає два байти на символ: межа рахується в байтах, а не в символах
+    with pytest.raises(ValueError):
+        TASK.pack(action="д" * 30, target=1)
+    assert len(TASK.pack(action="a" * 50, target=1).encode()) <= MAX_CALLBACK_DATA_BYTES
+
+
+def test_packer_matches_pack_and_enforces_limit():
+    pack = TASK.packer(action="done")
+    assert pack(1295) == TASK.pack(action="done", target=1295)
+    long_pack = TASK.packer(action="a" * 55)
+    with pytest.raises(ValueError):
+        long_pack(36 ** 5)
+    with pytest.raises(ValueError):
+        TASK.packer(action="a" * MAX_CALLBACK_DATA_BYTES)
+
+
+def test_param_values_cannot_contain_separator():
+    with pytest.raises(ValueError):
+        TASK.pack(action="a:b", target=1)
+    with pytest.raises(ValueError):
+        REMINDER.pack(action="snooze", task_id=1)
@@ -0,0 +1,67 @@
+from bot.logic.entry_pages import PageLayout, PageLayoutCache, pack_entries
+
+
+def test_pack_entries_fills_budget_with_separators():
+    # 10 + 1 і ще 10 + 1 вміщуються в 22, третій запис — ні
+    assert pack_entries([10, 10, 10], budget=22, max_entries=5) == 2
+    assert pack_entries([10, 10, 10], budget=33, max_entries=5) == 3
+
+
+def test_pack_entries_respects_max_entries_and_short_lists():
+    assert pack_entries([1] * 20, budget=1000, max_entries=5) == 5
+    assert pack_entries([1, 1], budget=1000, max_entries=5) == 2
+    assert pack_entries([], budget=1000, max_entries=5) == 0
+
+
+def test_pack_entries_keeps_at_least_one_oversized_entry():
+    assert pack_entries([5000, 10], budget=4000, max_entries=5) == 1
+
+
+def test_locate_records_page_boundaries():
+    layout = PageLayout(total=7)
+    lengths = [30, 30, 30, 30, 30, 30, 30]
+    # На сторінку вміщується два записи (31 + 31 <= 70)
+    assert layout.locate(0, 0, lengths, budget=70, max_entries=5) == slice(0, 2)
+    assert layout.starts == [0, 2]
+    assert layout.has_next(0)
+
+    assert layout.locate(2, 0, lengths, budget=70, max_entries=5) == slice(4, 6)
+    assert layout.starts == [0, 2, 4, 6]
+    assert layout.start(2) == 4
+
+
+def test_locate_continues_from_known_page_start():
+    layout = PageLayout(total=7)
+    layout.locate(1, 0, [30] * 7, budget=70, max_entries=5)
+    # Записи отримано лише з початку сторінки 1: зріз — відносно отриманого
+    assert layout.locate(2, 1, [30] * 5, budget=70, max_entries=5) == slice(2, 4)
+    assert layout.starts == [0, 2, 4, 6]
+
+
+def test_locate_beyond_last_entry_returns_none():
+    layout = PageLayout(total=2)
+    assert layout.locate(0, 0, [10, 10], budget=100, max_entries=5) == slice(0, 2)
+    assert not layout.has_next(0)
+    assert layout.locate(1, 0, [10, 10], budget=100, max_entries=5) is None
+
+
+def test_relocating_earlier_page_drops_later_boundaries():
+    layout = PageLayout(total=6)
+    layout.locate(2, 0, [30] * 6, budget=70, max_entries=5)
+    assert layout.starts == [0, 2, 4, 6]
+    # Сторінку 0 перераховано з іншими довжинами: старі межі далі неактуальні
+    assert layout.locate(0, 0, [60, 10, 10, 30, 30, 30], budget=70, max_entries=5) == slice(0, 1)
+    assert layout.starts == [0, 1]
+
+
+def test_layout_cache_expires_and_evicts():
+    cache = PageLayoutCache(max_entries=2, ttl_seconds=60)
+    first = cache.reset(("u1",), total=3)
+    assert cache.get(("u1",)) is first
+    cache.reset(("u2",), total=3)
+    cache.reset(("u3",), total=3)
+    assert cache.get(("u1",)) is None
+
+    expired = PageLayoutCache(max_entries=2, ttl_seconds=0)
+    expired.reset(("u1",), total=3)
+    assert expired.get(("u1",)) is None
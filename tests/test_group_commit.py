@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from bot.infra.group_commit import GroupCommitWriter
+from bot.models import db, JournalEntry
+
+
+def _row(content: str) -> dict:
+    return {"user_id": 1, "entry_type": "idea", "content": content}
+
+
+def _count() -> int:
+    return db.session.query(JournalEntry).count()
+
+
+def test_unexpected_error_fails_batch_and_writer_keeps_running(flask_app, monkeypatch):
+    writer = GroupCommitWriter(flush_ms=0)
+    commit = writer._commit
+    calls = 0
+
+    async def flaky_commit(batch):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise ValueError("непередбачена помилка")
+        return await commit(batch)
+
+    monkeypatch.setattr(writer, "_commit", flaky_commit)
+
+    async def scenario():
+        with pytest.raises(ValueError):
+            await writer.submit(JournalEntry.__table__, _row("перший"))
+        assert await writer.submit(JournalEntry.__table__, _row("другий")) is False
+        await writer.close()
+
+    asyncio.run(scenario())
+    assert _count() == 1
+
+
+def test_queued_rows_fail_when_writer_task_dies(flask_app, monkeypatch):
+    writer = GroupCommitWriter(flush_ms=0)
+    crash = asyncio.Event()
+
+    async def dying_collect():
+        await crash.wait()
+        raise RuntimeError("задача конвеєра впала")
+
+    monkeypatch.setattr(writer, "_collect", dying_collect)
+
+    async def scenario():
+        submits = [asyncio.ensure_future(writer.submit(JournalEntry.__table__, _row(str(i)))) for i in range(3)]
+        await asyncio.sleep(0)
+        assert writer._queue.qsize() == 3
+        crash.set()
+        # Рядки з черги зупиненої задачі отримують помилку, а не висять до скасування оновлення
+        results = await asyncio.wait_for(asyncio.gather(*submits, return_exceptions=True), 1)
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+        monkeypatch.undo()
+        assert await writer.submit(JournalEntry.__table__, _row("після перезапуску")) is False
+        await writer.close()
+
+    asyncio.run(scenario())
+    assert _count() == 1
@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+from telegram.error import RetryAfter
+
+from bot.infra.outbound import OutboundScheduler, Priority
+
+
+def _scheduler(**kwargs) -> OutboundScheduler:
+    options = {"global_rate": 1000, "chat_rate": 1000, "chat_burst": 1000, "max_retries": 2}
+    options.update(kwargs)
+    return OutboundScheduler(**options)
+
+
+def _request(scheduler, sent: list, name: str, endpoint: str = "sendMessage", priority: Priority | None = None,
+             chat_id: int = 1, message_id: int | None = None):
+    async def callback():
+        sent.append(name)
+        return name
+
+    data = {"chat_id": chat_id}
+    if message_id is not None:
+        data["message_id"] = message_id
+    return scheduler.process_request(callback, (), {}, endpoint, data, priority)
+
+
+def test_higher_priority_is_sent_first():
+    scheduler = _scheduler()
+    sent = []
+
+    async def scenario():
+        # Усі запити стають у чергу до першого проходу диспетчера
+        await asyncio.gather(
+            _request(scheduler, sent, "timer", priority=Priority.TIMER_EDIT),
+            _request(scheduler, sent, "reminder", priority=Priority.REMINDER),
+            _request(scheduler, sent, "reply"),
+            _request(scheduler, sent, "phase", priority=Priority.PHASE),
+        )
+        await scheduler.shutdown()
+
+    asyncio.run(scenario())
+    assert sent == ["reply", "phase", "reminder", "timer"]
+
+
+def test_pending_timer_edits_of_one_message_are_merged():
+    scheduler = _scheduler()
+    sent = []
+
+    async def scenario():
+        results = await asyncio.gather(*(
+            _request(scheduler, sent, f"tick {number}", "editMessageText", Priority.TIMER_EDIT, message_id=5)
+            for number in range(3)))
+        await scheduler.shutdown()
+        return results
+
+    results = asyncio.run(scenario())
+    assert sent == ["tick 2"]
+    assert results == ["tick 2"] * 3
+
+
+def test_other_edit_drops_pending_timer_edit():
+    scheduler = _scheduler()
+    sent = []
+
+    async def scenario():
+        results = await asyncio.gather(
+            _request(scheduler, sent, "tick", "editMessageText", Priority.TIMER_EDIT, message_id=5),
+            _request(scheduler, sent, "finished", "editMessageText", message_id=5),
+        )
+        await scheduler.shutdown()
+        return results
+
+    results = asyncio.run(scenario())
+    assert sent == ["finished"]
+    assert results == [True, "finished"]
+
+
+def test_retry_after_pauses_and_retries():
+    scheduler = _scheduler()
+    attempts = []
+
+    async def flaky():
+        attempts.append(asyncio.get_running_loop().time())
+        if len(attempts) == 1:
+            raise RetryAfter(0.05)
+        return "ok"
+
+    async def scenario():
+        result = await scheduler.process_request(flaky, (), {}, "sendMessage", {"chat_id": 1}, None)
+        await scheduler.shutdown()
+        return result
+
+    assert asyncio.run(scenario()) == "ok"
+    assert len(attempts) == 2
+    assert attempts[1] - attempts[0] >= 0.04
+
+
+def test_retry_after_gives_up_after_max_retries():
+    scheduler = _scheduler(max_retries=1)
+    attempts = 0
+
+    async def flooded():
+        nonlocal attempts
+        attempts += 1
+        raise RetryAfter(0)
+
+    async def scenario():
+        try:
+            with pytest.raises(RetryAfter):
+                await scheduler.process_request(flooded, (), {}, "sendMessage", {"chat_id": 1}, None)
+        finally:
+            await scheduler.shutdown()
+
+    asyncio.run(scenario())
+    assert attempts == 2
+
+
+def test_unlimited_endpoints_bypass_the_queue():
+    scheduler = _scheduler()
+    sent = []
+
+    async def scenario():
+        return await _request(scheduler, sent, "answer", "answerCallbackQuery")
+
+    assert asyncio.run(scenario()) == "answer"
+    assert scheduler._dispatcher is None
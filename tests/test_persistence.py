@@ -0,0 +1,68 @@
+import asyncio
+
+from bot.infra.persistence import SQLPersistence, USER
+
+
+def _persistence(flask_app) -> SQLPersistence:
+    return SQLPersistence(flask_app, write_delay=0, lazy=True)
+
+
+def test_unchanged_record_is_not_staged_again(flask_app):
+    persistence = _persistence(flask_app)
+
+    async def scenario():
+        persistence.stage_records(USER, {1: {"mode": "idea"}})
+        assert persistence.is_unsaved(USER, 1)
+        assert await persistence.flush()
+        assert not persistence.is_unsaved(USER, 1)
+        persistence.stage_records(USER, {1: {"mode": "idea"}})
+        assert not persistence.is_unsaved(USER, 1)
+        assert await persistence.load_record(USER, 1) == {"mode": "idea"}
+
+    asyncio.run(scenario())
+
+
+def test_failed_flush_keeps_record_unsaved(flask_app, monkeypatch):
+    persistence = _persistence(flask_app)
+
+    def failing_write(batch):
+        raise RuntimeError("БД недоступна")
+
+    async def scenario():
+        monkeypatch.setattr(persistence, "write_batch", failing_write)
+        persistence.stage_records(USER, {1: {"pomodoro": "running"}})
+        assert not await persistence.flush()
+        assert persistence.is_unsaved(USER, 1)
+        monkeypatch.undo()
+        assert await persistence.flush()
+        assert not persistence.is_unsaved(USER, 1)
+
+    asyncio.run(scenario())
+
+
+def test_unsynced_record_is_never_written(flask_app):
+    persistence = _persistence(flask_app)
+    persistence.unsynced[USER].add(1)
+
+    async def scenario():
+        persistence.stage_records(USER, {1: {}})
+        await persistence.update_user_data(1, {})
+        assert persistence.is_unsaved(USER, 1)
+        assert not persistence._dirty
+
+    asyncio.run(scenario())
+
+
+def test_forgotten_record_can_still_be_dropped(flask_app):
+    persistence = _persistence(flask_app)
+
+    async def scenario():
+        persistence.stage_records(USER, {1: {"mode": "idea"}})
+        await persistence.flush()
+        persistence.forget(USER, 1)
+        assert not persistence._digests
+        await persistence.drop_user_data(1)
+        await persistence.flush()
+        assert await persistence.load_record(USER, 1) is None
+
+    asyncio.run(scenario())
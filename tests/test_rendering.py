@@ -0,0 +1,84 @@
+import pytest
+from telegram.constants import ParseMode
+
+from bot.logic.rendering import (
+    MARKDOWN_V2_SPECIAL, MESSAGE_LIMIT, MarkdownV2Error, escape_markdown_v2, escape_pre, finalize,
+    markdown_v2_length, markdown_v2_to_plain, split_text, telegram_length, truncate_text,
+)
+
+
+@pytest.mark.parametrize("text", [
+    "Звичайний текст",
+    MARKDOWN_V2_SPECIAL,
+    "a\\b_c*d [x](y) 1.5! #тег",
+    "емодзі 🍅 і \\ наприкінці\\",
+    "",
+])
+def test_escaped_text_is_valid_and_reads_back_unchanged(text):
+    escaped = escape_markdown_v2(text)
+    assert markdown_v2_length(escaped) == telegram_length(text)
+    assert markdown_v2_to_plain(escaped) == text
+
+
+def test_escape_accepts_non_strings():
+    assert escape_markdown_v2(3.5) == "3\\.5"
+
+
+def test_escape_pre_escapes_only_backslash_and_backtick():
+    assert escape_pre("a\\b`c*d.") == "a\\\\b\\`c*d."
+    block = f"```\n{escape_pre('x = `y` * 2.')}\n```"
+    assert markdown_v2_to_plain(block) == "x = `y` * 2.\n"
+
+
+@pytest.mark.parametrize("text, plain", [
+    ("*жирний* і _курсив_", "жирний і курсив"),
+    ("__підкреслений__ ~закреслений~ ||спойлер||", "підкреслений закреслений спойлер"),
+    ("`код \\` з бектиком`", "код ` з бектиком"),
+    ("```python\nprint(1)\n```", "print(1)\n"),
+])
+def test_entities_are_counted_as_hidden_markup(text, plain):
+    assert markdown_v2_to_plain(text) == plain
+    assert markdown_v2_length(text) == telegram_length(plain)
+
+
+@pytest.mark.parametrize("text", [
+    "крапка в кінці.",
+    "*незакрита сутність",
+    "*перехрещені _сутності* тут_",
+    "`незакритий код",
+    "\\й — після \\ не ASCII",
+])
+def test_invalid_markdown_is_rejected(text):
+    with pytest.raises(MarkdownV2Error):
+        markdown_v2_length(text)
+
+
+def test_finalize_sends_valid_markdown_as_is():
+    rendered = finalize("*Заголовок*\n" + escape_markdown_v2("1. пункт!"))
+    assert rendered.parse_mode == ParseMode.MARKDOWN_V2
+    assert rendered.plain == "Заголовок\n1. пункт!"
+
+
+def test_finalize_falls_back_to_plain_text():
+    rendered = finalize("*незакрита сутність.")
+    assert rendered.parse_mode is None
+    assert rendered.text == "незакрита сутність."
+
+
+def test_finalize_truncates_overlong_fallback():
+    rendered = finalize("." * (MESSAGE_LIMIT + 10))
+    assert rendered.parse_mode is None
+    assert telegram_length(rendered.text) == MESSAGE_LIMIT
+    assert rendered.text.endswith("…")
+
+
+def test_length_counts_utf16_code_units():
+    assert telegram_length("🍅") == 2
+    assert telegram_length(truncate_text("🍅" * 10, 5)) <= 5
+
+
+def test_split_text_prefers_line_and_word_boundaries():
+    text = "перший рядок\nдругий рядок тексту"
+    chunks = split_text(text, 14)
+    assert chunks == ["перший рядок", "другий рядок", "тексту"]
+    assert all(telegram_length(chunk) <= 14 for chunk in chunks)
@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+
+from bot.models import db, Task, UserTaskPomodoroStats
+from bot.logic.stats import read_rollup_statistics
+from bot.logic.stats_cache import StatsCache, RedisStatsBackend, LRUStatsBackend
+
+
+class FakeRedis:
+    """Redis-сумісний клієнт на словнику: значення зберігаються байтами, як у справжньому Redis."""
+
+    def __init__(self):
+        self.store: dict[str, bytes] = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value, ex=None):
+        self.store[key] = value.encode() if isinstance(value, str) else value
+
+    def delete(self, key):
+        self.store.pop(key, None)
+
+
+def _seed_pomodoro_stats(user_id: int):
+    for description, pomodoros in (("Звіт", 3), ("Код ревʼю", 5)):
+        task = Task(user_id=user_id, description=description)
+        db.session.add(task)
+        db.session.flush()
+        db.session.add(UserTaskPomodoroStats(user_id=user_id, task_id=task.id, pomodoros_completed=pomodoros))
+    db.session.commit()
+
+
+def _fail_loader():
+    raise AssertionError("очікувалось влучання в кеш")
+
+
+def _load(user_id: int) -> dict:
+    return read_rollup_statistics(db.session, user_id, datetime.now(timezone.utc))
+
+
+def test_statistics_round_trip_through_redis_backend(flask_app):
+    _seed_pomodoro_stats(7)
+    client = FakeRedis()
+    cache = StatsCache(RedisStatsBackend(client), ttl_seconds=60)
+
+    loaded = cache.get_or_load(7, lambda: _load(7))
+    assert client.store, "статистику з Row не вдалося серіалізувати в JSON"
+
+    cached = cache.get_or_load(7, _fail_loader)
+    assert cached == loaded
+    assert cached["completed_pomodoros_per_task"] == [["Код ревʼю", 5], ["Звіт", 3]]
+
+
+def test_redis_and_lru_backends_return_same_statistics(flask_app):
+    _seed_pomodoro_stats(8)
+    from_redis = StatsCache(RedisStatsBackend(FakeRedis()), ttl_seconds=60)
+    from_lru = StatsCache(LRUStatsBackend(), ttl_seconds=60)
+    for cache in (from_redis, from_lru):
+        cache.get_or_load(8, lambda: _load(8))
+
+    redis_stats = from_redis.get_or_load(8, _fail_loader)
+    lru_stats = from_lru.get_or_load(8, _fail_loader)
+    assert redis_stats == lru_stats
+    # Обробник /stats розпаковує кожен елемент у (опис, кількість)
+    assert [(description, count) for description, count in redis_stats["completed_pomodoros_per_task"]] == \
+        [(description, count) for description, count in lru_stats["completed_pomodoros_per_task"]]
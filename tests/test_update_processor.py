@@ -0,0 +1,78 @@
+import asyncio
+from datetime import datetime
+
+from telegram import Chat, Message, Update, User
+
+from bot.infra.update_processor import KeyedUpdateProcessor, update_keys
+
+
+def _update(update_id: int, user_id: int) -> Update:
+    user = User(user_id, "user", False)
+    message = Message(update_id, datetime.now(), Chat(user_id, Chat.PRIVATE), from_user=user, text="x")
+    return Update(update_id, message=message)
+
+
+def test_update_keys_cover_user_and_chat():
+    assert update_keys(_update(1, 42)) == (("user", 42), ("chat", 42))
+    assert update_keys(object()) == ()
+
+
+def test_updates_of_one_user_run_in_arrival_order():
+    processor = KeyedUpdateProcessor(4)
+    order = []
+
+    async def handler(name: str, delay: float):
+        order.append(f"{name}:start")
+        await asyncio.sleep(delay)
+        order.append(f"{name}:end")
+
+    async def scenario():
+        # Перше оновлення довше за друге, але друге однаково чекає на нього
+        await asyncio.gather(
+            processor.do_process_update(_update(1, 7), handler("a", 0.05)),
+            processor.do_process_update(_update(2, 7), handler("b", 0)),
+        )
+
+    asyncio.run(scenario())
+    assert order == ["a:start", "a:end", "b:start", "b:end"]
+    assert not processor._tails
+
+
+def test_different_users_run_concurrently_up_to_limit():
+    processor = KeyedUpdateProcessor(2)
+    running = peak = 0
+
+    async def handler():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    async def scenario():
+        await asyncio.gather(*(processor.do_process_update(_update(i, 100 + i), handler()) for i in range(6)))
+
+    asyncio.run(scenario())
+    assert peak == 2
+
+
+def test_failed_update_does_not_block_the_next_one_of_same_user():
+    processor = KeyedUpdateProcessor(2)
+    handled = []
+
+    async def failing():
+        raise RuntimeError("помилка обробника")
+
+    async def handler():
+        handled.append("next")
+
+    async def scenario():
+        results = await asyncio.gather(
+            processor.do_process_update(_update(1, 7), failing()),
+            processor.do_process_update(_update(2, 7), handler()),
+            return_exceptions=True,
+        )
+        assert isinstance(results[0], RuntimeError)
+
+    asyncio.run(scenario())
+    assert handled == ["next"]
@@ -0,0 +1,55 @@
+import asyncio
+
+from bot.infra import write_ahead
+from bot.infra.write_ahead import CircuitBreaker, WriteAheadLog, CLOSED, OPEN, HALF_OPEN
+
+
+def _open_breaker(breaker: CircuitBreaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+def test_non_outage_error_during_probe_does_not_stall_breaker(tmp_path, monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    wal = WriteAheadLog(str(tmp_path))
+    wal._pending = 1
+    monkeypatch.setattr(write_ahead, "db_breaker", breaker)
+    monkeypatch.setattr(write_ahead, "write_ahead_log", wal)
+
+    async def broken_replay():
+        assert breaker.state == HALF_OPEN
+        raise ValueError("не помилка недоступності")
+
+    monkeypatch.setattr(wal, "replay", broken_replay)
+    _open_breaker(breaker)
+
+    asyncio.run(write_ahead.replay_write_ahead_job())
+
+    assert breaker.state == OPEN
+    # Наступний прогін знову отримує пробний запит
+    assert breaker.allow()
+
+
+def test_half_open_probe_without_result_expires():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=60)
+    _open_breaker(breaker)
+    breaker._opened_at -= 60
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker._opened_at -= 60
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_accepts_direct_writes_does_not_spend_probe(tmp_path, monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    monkeypatch.setattr(write_ahead, "db_breaker", breaker)
+    monkeypatch.setattr(write_ahead, "write_ahead_log", WriteAheadLog(str(tmp_path)))
+    _open_breaker(breaker)
+
+    assert not write_ahead.accepts_direct_writes()
+    assert breaker.state == OPEN
+    assert breaker.allow()